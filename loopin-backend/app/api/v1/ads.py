@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.sponsor_proximity import SponsorPoint, sponsor_proximity
+from app.core.sponsor_tiles import sponsor_tiles
 from app.models.sponsor import SponsoredLocation, Sponsor
 from app.schemas.sponsor import SponsoredLocationResponse, SponsoredLocationCreate
 
@@ -49,13 +51,50 @@ async def create_sponsored_location(location: SponsoredLocationCreate, db: Async
         await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-    return new_location
+    sponsor_tiles.invalidate(location.lat, location.lng)
+    sponsor_proximity.add(SponsorPoint(
+        new_location.id, new_location.sponsor_id, new_location.name,
+        new_location.bid_price, location.lat, location.lng
+    ))
+
+    return SponsoredLocationResponse(
+        id=new_location.id,
+        sponsor_id=new_location.sponsor_id,
+        name=new_location.name,
+        bid_price=new_location.bid_price or 0.0,
+        lat=location.lat,
+        lng=location.lng
+    )
 
 @router.get("/locations", response_model=List[SponsoredLocationResponse])
-async def get_sponsored_locations(db: AsyncSession = Depends(get_db)):
+async def get_sponsored_locations(
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_m: Optional[float] = Query(None, gt=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Fetch all active sponsored locations for the AI Manager.
+    Fetch sponsored locations for the AI Manager and clients, highest bid first.
+    Filter by a bounding box (min_lat, min_lng, max_lat, max_lng) or a radius around
+    (lat, lng); with neither, the top bids anywhere are returned.
     """
-    result = await db.execute(select(SponsoredLocation))
-    locations = result.scalars().all()
-    return locations
+    bbox = (min_lat, min_lng, max_lat, max_lng)
+    radius = (lat, lng, radius_m)
+    try:
+        if all(v is not None for v in bbox):
+            if min_lat > max_lat or min_lng > max_lng:
+                raise ValueError("min_lat/min_lng must not exceed max_lat/max_lng")
+            return await sponsor_tiles.in_bbox(db, *bbox, limit=limit)
+        if all(v is not None for v in radius):
+            return await sponsor_tiles.in_radius(db, *radius, limit=limit)
+        if any(v is not None for v in bbox + radius):
+            raise ValueError("Give all of min_lat, min_lng, max_lat, max_lng or all of lat, lng, radius_m")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await sponsor_tiles.top(db, limit)
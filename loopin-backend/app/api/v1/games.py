@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.models.game import GameSession
+from app.core.game_cache import game_detail_cache
+from app.core.lobby import lobby_cache
+from app.core.partitions import ensure_game_partitions
+from app.core.player_cache import player_cache
 from app.models.player import Player
 from app.schemas.game import GameResponse, GameSessionDetail
 
@@ -18,27 +22,52 @@ class JoinRequest(BaseModel):
     signature: str # Placeholder for now, used to verify ownership
 
 @router.get("/lobby", response_model=List[GameResponse])
-async def get_lobby(db: AsyncSession = Depends(get_db)):
+async def get_lobby(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Fetch all active games with status 'lobby'.
+    Fetch a page of games with status 'lobby', soonest start first, with player counts.
+    The next page's cursor is returned in the X-Next-Cursor header.
+    Pages are served from a short-lived cache and support If-None-Match.
     """
-    result = await db.execute(select(GameSession).where(GameSession.status == "lobby"))
-    games = result.scalars().all()
-    # In a real scenario, we'd calculate player_count and prize_pool dynamicallly
-    return games
+    page = lobby_cache.get(cursor, limit)
+    if page is None:
+        try:
+            page = await lobby_cache.load(db, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": page.etag, "Cache-Control": f"max-age={int(settings.LOBBY_CACHE_TTL_SECONDS)}"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if if_none_match == page.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 @router.get("/{game_id}", response_model=GameSessionDetail)
-async def get_game_details(game_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_game_details(
+    game_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Fetch complete state of a specific game.
+    Fetch complete state of a specific game, with its participants and their players.
+    Served from a per-game cache that joins invalidate; supports If-None-Match.
     """
-    result = await db.execute(select(GameSession).where(GameSession.id == game_id))
-    game = result.scalar_one_or_none()
-    
-    if not game:
+    detail = game_detail_cache.get(game_id)
+    if detail is None:
+        detail = await game_detail_cache.load(db, game_id)
+
+    if not detail:
         raise HTTPException(status_code=404, detail="Game not found")
-        
-    return game
+
+    headers = {"ETag": detail.etag}
+    if if_none_match == detail.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=detail.body, media_type="application/json", headers=headers)
 
 @router.post("/{game_id}/confirm_join")
 async def confirm_join(
@@ -57,8 +86,7 @@ async def confirm_join(
     # verify_signature(join_request.wallet_address, join_request.signature)
 
     # 2. Find or Create Player
-    result = await db.execute(select(Player).where(Player.wallet_address == join_request.wallet_address))
-    player = result.scalar_one_or_none()
+    player = await player_cache.get_by_wallet(db, join_request.wallet_address)
 
     if not player:
         player = Player(wallet_address=join_request.wallet_address)
@@ -66,11 +94,9 @@ async def confirm_join(
         await db.flush()
 
     # 3. Add to Game
-    # CRITICAL: Clean up old trails from previous sessions to prevent artifacting
-    # This ensures every new game starts with a clean slate for the player.
-    from sqlalchemy import delete
-    from app.models.player import PlayerTrail
-    await db.execute(delete(PlayerTrail).where(PlayerTrail.player_id == player.id))
+    # Trails and territories are scoped by game, so previous sessions cannot leak into this one.
+    # Make sure this game's geometry partitions exist before the first position update.
+    await ensure_game_partitions(db, game_id)
 
     # Check if already in this game via GameParticipant
     from app.models.game import GameParticipant
@@ -82,6 +108,7 @@ async def confirm_join(
         )
     )
     participant = result.scalar_one_or_none()
+    participant_existed = participant is not None
 
     if not participant:
         # Create new participation
@@ -90,4 +117,9 @@ async def confirm_join(
     
     await db.commit()
 
+    # Player counts changed
+    if not participant_existed:
+        lobby_cache.invalidate()
+        game_detail_cache.invalidate(game_id)
+
     return {"status": "success", "message": "Player added to game", "player_id": str(player.id)}
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.heatmap import heatmap, naive_utc
+from app.core.unified_grid import SECTOR_SIZE_DEG
+from app.schemas.heatmap import HeatmapTileResponse
+
+router = APIRouter()
+
+@router.get("/tiles/{sector_x}/{sector_y}", response_model=HeatmapTileResponse)
+async def get_heatmap_tile(
+    sector_x: int,
+    sector_y: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Visit counts for one unified_grid sector between start and end (UTC, default the last 24 hours).
+    start is rounded down to the heatmap's time bucket.
+    """
+    # Timestamps with an offset are compared as naive UTC
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = heatmap.bucket_floor(start or end - timedelta(hours=24))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(hours=settings.HEATMAP_MAX_QUERY_HOURS):
+        raise HTTPException(status_code=400, detail=f"Time range too long: at most {settings.HEATMAP_MAX_QUERY_HOURS} hours")
+
+    counts = await heatmap.tile(db, sector_x, sector_y, start, end)
+    return HeatmapTileResponse(
+        sector_x=sector_x,
+        sector_y=sector_y,
+        south=sector_y * SECTOR_SIZE_DEG,
+        west=sector_x * SECTOR_SIZE_DEG,
+        cell_size_deg=SECTOR_SIZE_DEG / heatmap.side,
+        cells_per_side=heatmap.side,
+        start=start,
+        end=end,
+        total=sum(counts),
+        counts=counts
+    )
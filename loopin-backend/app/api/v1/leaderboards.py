@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.core.database import get_db
+from app.core.leaderboard import GLOBAL_METRICS, Leaderboard, leaderboards
+from app.schemas.leaderboard import LeaderboardEntry, LeaderboardResponse
+
+router = APIRouter()
+
+def _entry(board: Leaderboard, player_id: UUID) -> Optional[LeaderboardEntry]:
+    ranked = board.rank_of(player_id)
+    if ranked is None:
+        return None
+    rank, score = ranked
+    return LeaderboardEntry(rank=rank, player_id=player_id, score=score)
+
+def _page(metric: str, board: Leaderboard, limit: int, offset: int, player_id: Optional[UUID]) -> LeaderboardResponse:
+    return LeaderboardResponse(
+        metric=metric,
+        total=len(board),
+        entries=[
+            LeaderboardEntry(rank=rank, player_id=pid, score=score)
+            for rank, pid, score in board.top(limit, offset)
+        ],
+        me=_entry(board, player_id) if player_id else None
+    )
+
+async def _global_board(db: AsyncSession, metric: str) -> Leaderboard:
+    if metric not in GLOBAL_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown leaderboard; expected one of {', '.join(GLOBAL_METRICS)}")
+    return await leaderboards.global_board(db, metric)
+
+async def _game_board(db: AsyncSession, game_id: UUID) -> Leaderboard:
+    board = await leaderboards.game_board(db, game_id)
+    if board is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return board
+
+@router.get("/games/{game_id}", response_model=LeaderboardResponse)
+async def get_game_leaderboard(
+    game_id: UUID,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    player_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Players of one game ranked by the territory area they currently hold
+    (their final area once the game has ended).
+    """
+    return _page("area", await _game_board(db, game_id), limit, offset, player_id)
+
+@router.get("/games/{game_id}/players/{player_id}", response_model=LeaderboardEntry)
+async def get_game_rank(game_id: UUID, player_id: UUID, db: AsyncSession = Depends(get_db)):
+    entry = _entry(await _game_board(db, game_id), player_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Player not ranked in this game")
+    return entry
+
+@router.get("/{metric}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    metric: str,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    player_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Global top players for one of total_area, biggest_loop, longest_trail or total_earnings.
+    Pass player_id to also get that player's own rank.
+    """
+    board = await _global_board(db, metric)
+    return _page(metric, board, limit, offset, player_id)
+
+@router.get("/{metric}/players/{player_id}", response_model=LeaderboardEntry)
+async def get_rank(metric: str, player_id: UUID, db: AsyncSession = Depends(get_db)):
+    entry = _entry(await _global_board(db, metric), player_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Player not ranked")
+    return entry
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel, EmailStr
@@ -7,7 +7,10 @@ from uuid import UUID
 
 from app.core.database import get_db
 from app.core.deps import get_current_user
+from app.core.history import history_cache
+from app.core.player_cache import player_cache
 from app.models.player import Player, PlayerStats
+from app.schemas.stats import PlayerGameHistoryPage
 
 router = APIRouter()
 
@@ -81,8 +84,7 @@ async def get_player(
     wallet_address: str,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Player).where(Player.wallet_address == wallet_address))
-    player = result.scalar_one_or_none()
+    player = await player_cache.get_by_wallet(db, wallet_address)
     
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
@@ -96,6 +98,26 @@ async def get_player(
         joined_at=str(player.joined_at)
     )
 
+@router.get("/{wallet_address}/history", response_model=PlayerGameHistoryPage)
+async def get_player_history(
+    wallet_address: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    A player's finished games, newest first. Pass next_cursor back as cursor for older games.
+    """
+    player = await player_cache.get_by_wallet(db, wallet_address)
+
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    try:
+        return await history_cache.get_page(db, player.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.patch("/{wallet_address}/update", response_model=PlayerResponse)
 async def update_player(
     wallet_address: str,
@@ -122,6 +144,7 @@ async def update_player(
         
     await db.commit()
     await db.refresh(player)
+    player_cache.invalidate(player_id=player.id)
     
     return PlayerResponse(
         id=player.id,
@@ -1,13 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 import time
 
 from app.core.database import get_db
 from app.schemas.powerup import PowerupPurchase, PowerupActive
-from app.models.player import Player
-from app.models.powerup import PlayerPowerup
 from app.core.config import settings
+from app.core.inventory import inventory
+from app.core.player_cache import player_cache
 
 router = APIRouter()
 
@@ -17,44 +16,19 @@ async def purchase_powerup(purchase: PowerupPurchase, db: AsyncSession = Depends
     Validate purchase from Stacks chain (mocked for now) and activate powerup.
     """
     # Verify player exists
-    result = await db.execute(select(Player).where(Player.id == purchase.player_id))
-    player = result.scalar_one_or_none()
-    
+    player = await player_cache.get_by_id(db, purchase.player_id)
+
     if not player:
          raise HTTPException(status_code=404, detail="Player not found")
 
     # TODO: Verify transaction_id with Stacks node using settings.STACKS_RPC_URL
     
-    # Logic: Add to inventory (PlayerPowerup)
-    # Check if they already have this powerup
-    result = await db.execute(select(PlayerPowerup).where(
-        PlayerPowerup.player_id == player.id,
-        PlayerPowerup.powerup_id == purchase.type
-    ))
-    player_powerup = result.scalar_one_or_none()
+    # Logic: Add to inventory (PlayerPowerup) with a single atomic increment,
+    # so concurrent purchases and in-game uses never overwrite each other.
+    # Purchasing also marks it equipped for this MVP flow.
+    await inventory.add_stock(db, player.id, purchase.type)
 
-    if player_powerup:
-        player_powerup.quantity += 1
-    else:
-        player_powerup = PlayerPowerup(
-            player_id=player.id, 
-            powerup_id=purchase.type, 
-            quantity=1,
-            equipped=False 
-        )
-        db.add(player_powerup)
-    
-    # Check if we should auto-equip/activate?
-    # Schema says "equipped" field exists.
-    # The response expects "PowerupActive" with duration.
-    # Let's assume purchasing activates it immediately for this MVP flow.
-    
-    duration = 60 # Default
-    
-    # We could update 'equipped' to True here if we wanted to persist state
-    player_powerup.equipped = True
-    
-    await db.commit()
+    duration = settings.POWERUP_DURATION_SECONDS.get(purchase.type, settings.POWERUP_DEFAULT_DURATION_SECONDS)
         
     return PowerupActive(
         player_id=purchase.player_id,
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from datetime import datetime, timedelta
 from typing import Optional
 from pydantic import BaseModel
 from uuid import UUID
 
+from app.core import daily_rewards
+from app.core.daily_rewards import calculate_reward
 from app.core.database import get_db
-from app.models.player import Player, PlayerStats
+from app.core.leaderboard import leaderboards
+from app.core.player_cache import player_cache
 
 router = APIRouter()
 
@@ -24,31 +26,21 @@ class ClaimResponse(BaseModel):
     new_streak: int
     new_total_earnings: float
 
-def calculate_reward(streak: int) -> float:
-    # Base reward 100, increases by 50 for each streak day up to 1000 max
-    return min(100 + (streak * 50), 1000)
-
 @router.get("/status", response_model=RewardStatusResponse)
 async def get_daily_reward_status(wallet_address: str, db: AsyncSession = Depends(get_db)):
     """
     Check if the player can claim a daily reward.
     """
-    result = await db.execute(select(Player).where(Player.wallet_address == wallet_address))
-    player = result.scalar_one_or_none()
+    player = await player_cache.get_by_wallet(db, wallet_address)
 
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    # Ensure player has stats
-    if not player.stats:
-        player.stats = PlayerStats(player_id=player.id)
-        db.add(player.stats)
-        await db.commit()
-        await db.refresh(player)
-
-    last_claimed = player.stats.last_daily_reward_claimed_at
+    # A player without stats has never claimed; the first claim creates the row
+    stats = player.stats
+    last_claimed = stats.last_daily_reward_claimed_at if stats else None
     current_time = datetime.utcnow()
-    streak = player.stats.current_streak or 0
+    streak = (stats.current_streak if stats else 0) or 0
     
     claimed_today = False
     claimable = False
@@ -60,10 +52,10 @@ async def get_daily_reward_status(wallet_address: str, db: AsyncSession = Depend
         # For a more "calendar day" approach reset at midnight, but 24h window is safer for global users initially
         # Let's use a simple "can claim once every 20 hours" to be generous
         
-        if time_diff < timedelta(hours=20):
+        if time_diff < timedelta(hours=daily_rewards.CLAIM_COOLDOWN_HOURS):
             claimed_today = True
             claimable = False
-        elif time_diff > timedelta(hours=48):
+        elif time_diff > timedelta(hours=daily_rewards.STREAK_RESET_HOURS):
             # Streak broken
             streak = 0
             claimable = True
@@ -88,48 +80,27 @@ async def get_daily_reward_status(wallet_address: str, db: AsyncSession = Depend
 @router.post("/claim", response_model=ClaimResponse)
 async def claim_daily_reward(
     wallet_address: str = Body(..., embed=True), 
+    idempotency_key: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Claim the daily reward if available.
+    Retries carrying the same Idempotency-Key header get the original claim back.
     """
-    result = await db.execute(select(Player).where(Player.wallet_address == wallet_address))
-    player = result.scalar_one_or_none()
+    outcome = await daily_rewards.claim_daily_reward(db, wallet_address, idempotency_key)
 
-    if not player:
+    if outcome is None:
         raise HTTPException(status_code=404, detail="Player not found")
-        
-    if not player.stats:
-        player.stats = PlayerStats(player_id=player.id)
-        db.add(player.stats)
-    
-    last_claimed = player.stats.last_daily_reward_claimed_at
-    current_time = datetime.utcnow()
-    current_streak = player.stats.current_streak or 0
-    
-    if last_claimed:
-        time_diff = current_time - last_claimed
-        if time_diff < timedelta(hours=20):
-            raise HTTPException(status_code=400, detail="Daily reward already claimed today")
-        
-        if time_diff > timedelta(hours=48):
-            # Streak broken
-            current_streak = 0
-    
-    # Calculate reward for the NEW streak
-    new_streak = current_streak + 1
-    reward_amount = calculate_reward(new_streak)
-    
-    # Update stats
-    player.stats.current_streak = new_streak
-    player.stats.total_earnings = (player.stats.total_earnings or 0.0) + reward_amount
-    player.stats.last_daily_reward_claimed_at = current_time
-    
-    await db.commit()
+
+    if not outcome.claimed:
+        raise HTTPException(status_code=400, detail="Daily reward already claimed today")
+
+    player_cache.invalidate(player_id=outcome.player_id)
+    leaderboards.record("total_earnings", outcome.player_id, outcome.total_earnings)
     
     return ClaimResponse(
         success=True,
-        reward_amount=reward_amount,
-        new_streak=new_streak,
-        new_total_earnings=player.stats.total_earnings
+        reward_amount=outcome.reward_amount,
+        new_streak=outcome.streak,
+        new_total_earnings=outcome.total_earnings
     )
@@ -1,13 +1,30 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, text
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
 import json
 from uuid import UUID
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.player import Player, PlayerTrail, PlayerTerritory
-from app.models.powerup import PlayerPowerup
+from app.core.event_log import (
+    event_logs, EVENT_JOIN, EVENT_LEAVE, EVENT_MOVE, EVENT_POWERUP, EVENT_POWERUP_EXPIRED
+)
+from app.core.frame_buffer import FrameRingBuffer
+from app.core.game_cache import game_status
+from app.core.heatmap import heatmap
+from app.core.inventory import inventory
+from app.core.interest import (
+    InterestIndex, projected_cell, projected_interest_cells, sector_interest_cells, sectors_for_bbox
+)
+from app.core.raster import rasters
+from app.core.player_cache import player_cache
+from app.core.lod import LodCache, distance_to_bbox_m, select_tier, tier_for_zoom
+from app.core.territory import point_in_territory
+from app.core.write_batcher import write_batcher
+from app.core.timers import TimerHandle, timers
+from app.models.player import PlayerTrail, PlayerTerritory
 
 router = APIRouter()
 
@@ -17,6 +34,28 @@ class ConnectionManager:
         self.active_connections: Dict[UUID, List[WebSocket]] = {}
         # connection (WebSocket) -> {lat: float, lng: float, player_id: UUID}
         self.connection_states: Dict[WebSocket, dict] = {}
+        # Pre-simplified LOD tiers: trails keyed by player_id (versioned by point count),
+        # territory outer rings keyed by (territory_id, ring index) (versioned by territory.version)
+        self.trail_lod = LodCache()
+        self.territory_lod = LodCache()
+        # game_id -> territory_id -> number of cached rings
+        self.territory_polygon_counts: Dict[UUID, Dict[UUID, int]] = {}
+        # Area of interest: game_id -> projected-cell index of players,
+        # and game_id -> real-sector index of territory polygons keyed by (territory_id, ring index)
+        self.player_interest: Dict[UUID, InterestIndex] = {}
+        self.territory_interest: Dict[UUID, InterestIndex] = {}
+        # Resume support: per-game tick + ring buffer of recent deltas,
+        # last recorded positions per game (to build position deltas),
+        # and sessions of recently dropped players kept alive through a grace period
+        self.frames = FrameRingBuffer()
+        self.last_positions: Dict[UUID, Dict[UUID, tuple]] = {}
+        self.suspended_sessions: Dict[Tuple[UUID, UUID], dict] = {}
+        self.pending_leaves: Dict[Tuple[UUID, UUID], TimerHandle] = {}
+        # (game_id, player_id, powerup_id) -> expiry timer on the worker's timing wheel
+        self.powerup_timers: Dict[Tuple[UUID, UUID, str], TimerHandle] = {}
+        # Read-only viewers: game_id -> spectator sockets, fed by one low-rate task per game
+        self.spectators: Dict[UUID, List[WebSocket]] = {}
+        self.spectator_tasks: Dict[UUID, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, game_id: UUID):
         await websocket.accept()
@@ -27,10 +66,29 @@ class ConnectionManager:
             "lat": 0.0, 
             "lng": 0.0, 
             "player_id": None,
-            "active_powerups": [] # list of 'shield', 'invisibility', etc.
+            "active_powerups": [], # list of 'shield', 'invisibility', etc.
+            "zoom": None, # client-declared map zoom, used for LOD selection
+            "visible_players": set(), # entity ids last sent, for enter/leave notifications
+            "visible_territories": set()
         }
 
-    def disconnect(self, websocket: WebSocket, game_id: UUID):
+    def update_position(self, websocket: WebSocket, game_id: UUID, lat: float, lng: float):
+        """
+        Store the connection's latest position and move its player in the interest index.
+        """
+        state = self.connection_states[websocket]
+        state["lat"] = lat
+        state["lng"] = lng
+        if state["player_id"]:
+            index = self.player_interest.setdefault(game_id, InterestIndex())
+            index.update(state["player_id"], [projected_cell(lat, lng)])
+
+    def disconnect(self, websocket: WebSocket, game_id: UUID) -> Optional[dict]:
+        """
+        Remove a connection and return its last state.
+        A player's interest-index entry is kept; it goes away when their session expires.
+        """
+        state = self.connection_states.get(websocket)
         if game_id in self.active_connections:
             if websocket in self.active_connections[game_id]:
                 self.active_connections[game_id].remove(websocket)
@@ -38,8 +96,217 @@ class ConnectionManager:
                 del self.active_connections[game_id]
         if websocket in self.connection_states:
             del self.connection_states[websocket]
+        return state
+
+    def suspend(self, game_id: UUID, player_id: UUID, state: dict):
+        """
+        Keep a dropped player's session alive for RESUME_GRACE_SECONDS.
+        Other players keep seeing them (as reconnecting) and player_left is only
+        broadcast if they do not come back in time.
+        """
+        key = (game_id, player_id)
+        self.suspended_sessions[key] = {
+            "lat": state["lat"],
+            "lng": state["lng"],
+            "active_powerups": list(state["active_powerups"]),
+            "zoom": state["zoom"]
+        }
+        timers.cancel(self.pending_leaves.pop(key, None))
+        self.pending_leaves[key] = timers.schedule(settings.RESUME_GRACE_SECONDS, self._expire_session, game_id, player_id)
+
+    async def _expire_session(self, game_id: UUID, player_id: UUID):
+        key = (game_id, player_id)
+        self.pending_leaves.pop(key, None)
+        if self.suspended_sessions.pop(key, None) is None:
+            return
+
+        if game_id in self.player_interest:
+            self.player_interest[game_id].remove(player_id)
+            if not self.player_interest[game_id].entities():
+                del self.player_interest[game_id]
+        self.last_positions.get(game_id, {}).pop(player_id, None)
+        if not any(state["player_id"] == player_id for state in self.connection_states.values()):
+            inventory.evict(player_id)
+
+        event_logs.record(game_id, EVENT_LEAVE, player_id)
+        await self.broadcast({
+            "type": "player_left",
+            "player_id": str(player_id)
+        }, game_id)
+        self.release_if_idle(game_id)
+
+    def release_game(self, game_id: UUID):
+        """
+        Drop a game's render and resume state on this worker: tick counter and frames,
+        last positions, interest indexes and cached geometry tiers.
+        """
+        self.frames.drop(game_id)
+        for pid in self.last_positions.pop(game_id, {}):
+            self.trail_lod.discard(pid)
+        self.player_interest.pop(game_id, None)
+        self.territory_interest.pop(game_id, None)
+        for tid, count in self.territory_polygon_counts.pop(game_id, {}).items():
+            for idx in range(count):
+                self.territory_lod.discard((tid, idx))
+
+    def held_games(self) -> Set[UUID]:
+        """
+        Games with play state on this worker: ticks, positions, sessions and timers. Open connections
+        and the territory geometry a spectator frame reloads do not count.
+        """
+        games = set(self.frames.ticks) | set(self.last_positions) | set(self.player_interest)
+        games.update(key[0] for key in self.suspended_sessions)
+        games.update(key[0] for key in self.pending_leaves)
+        games.update(key[0] for key in self.powerup_timers)
+        return games
+
+    def release_if_idle(self, game_id: UUID):
+        """Release a game's state once nobody on this worker is playing, reconnecting to or watching it."""
+        if game_id in self.active_connections or game_id in self.spectators:
+            return
+        if any(key[0] == game_id for key in self.suspended_sessions):
+            return
+        self.release_game(game_id)
+
+    def finish_game(self, game_id: UUID):
+        """
+        The game ended: cancel its reconnect and powerup timers and release its state.
+        Connected clients stay connected (they have just been sent the rankings).
+        """
+        for key in [key for key in self.pending_leaves if key[0] == game_id]:
+            timers.cancel(self.pending_leaves.pop(key))
+        for key in [key for key in self.suspended_sessions if key[0] == game_id]:
+            del self.suspended_sessions[key]
+        for key in [key for key in self.powerup_timers if key[0] == game_id]:
+            timers.cancel(self.powerup_timers.pop(key))
+        self.release_game(game_id)
+
+    def _player_states(self, game_id: UUID, player_id: UUID) -> List[dict]:
+        """Live state dicts of a player in a game: their connections and any suspended session."""
+        states = [
+            state for ws, state in self.connection_states.items()
+            if state["player_id"] == player_id and ws in self.active_connections.get(game_id, [])
+        ]
+        session = self.suspended_sessions.get((game_id, player_id))
+        if session is not None:
+            states.append(session)
+        return states
+
+    async def send_to_player(self, game_id: UUID, player_id: UUID, message: dict):
+        """Send a private message to every connection of one player in a game."""
+        for ws in list(self.active_connections.get(game_id, [])):
+            state = self.connection_states.get(ws)
+            if state is not None and state["player_id"] == player_id:
+                try:
+                    await ws.send_json(message)
+                except Exception:
+                    pass
+
+    def activate_powerup(self, game_id: UUID, player_id: UUID, powerup_id: str, state: dict):
+        """
+        Turn a powerup on for a player and (re)arm its expiry on the timing wheel.
+        Using the same powerup again while active extends it.
+        """
+        if powerup_id not in state["active_powerups"]:
+            state["active_powerups"].append(powerup_id)
+        key = (game_id, player_id, powerup_id)
+        timers.cancel(self.powerup_timers.pop(key, None))
+        duration = settings.POWERUP_DURATION_SECONDS.get(powerup_id, settings.POWERUP_DEFAULT_DURATION_SECONDS)
+        self.powerup_timers[key] = timers.schedule(duration, self._expire_powerup, game_id, player_id, powerup_id)
+
+    async def _expire_powerup(self, game_id: UUID, player_id: UUID, powerup_id: str):
+        """
+        Timing-wheel callback: the powerup is removed from the player's state,
+        so the next state frame already reflects it.
+        """
+        self.powerup_timers.pop((game_id, player_id, powerup_id), None)
+        for state in self._player_states(game_id, player_id):
+            if powerup_id in state["active_powerups"]:
+                state["active_powerups"].remove(powerup_id)
+
+        event_logs.record(game_id, EVENT_POWERUP_EXPIRED, player_id, {"powerup_id": powerup_id})
+        await self.broadcast({
+            "type": "powerup_expired",
+            "player_id": str(player_id),
+            "powerup_id": powerup_id
+        }, game_id)
+
+    async def revoke_powerup(self, game_id: UUID, player_id: UUID, powerup_id: str):
+        """End an activation early, e.g. when the inventory flush found the stock was already spent."""
+        timers.cancel(self.powerup_timers.pop((game_id, player_id, powerup_id), None))
+        await self._expire_powerup(game_id, player_id, powerup_id)
+
+    def resume_session(self, websocket: WebSocket, game_id: UUID, player_id: UUID) -> bool:
+        """
+        Reattach a reconnecting player to their suspended session, if it is still in its grace period.
+        """
+        key = (game_id, player_id)
+        session = self.suspended_sessions.pop(key, None)
+        timers.cancel(self.pending_leaves.pop(key, None))
+        if session is None:
+            return False
+
+        state = self.connection_states[websocket]
+        state["active_powerups"] = session["active_powerups"]
+        state["zoom"] = session["zoom"]
+        if session["lat"] != 0.0:
+            self.update_position(websocket, game_id, session["lat"], session["lng"])
+        return True
+
+    async def send_resume(self, websocket: WebSocket, game_id: UUID, last_tick: int, db: AsyncSession):
+        """
+        Answer a client's resume handshake with the deltas it missed since last_tick,
+        or with a keyframe (a game_state for this client only) if the gap is too old.
+        """
+        from app.core.unified_grid import project_to_observer
+
+        missed = self.frames.since(game_id, last_tick)
+        if missed is None:
+            await websocket.send_json({
+                "type": "resume",
+                "mode": "keyframe",
+                "tick": self.frames.current_tick(game_id)
+            })
+            await self.broadcast_game_state(game_id, db, only=websocket)
+            return
+
+        state = self.connection_states.get(websocket) or {}
+        events = []
+        positions = {}
+        for _, delta in missed:
+            events.extend(delta.get("events", []))
+            positions.update(delta.get("positions", {}))
+
+        # Same visibility rule as state frames: invisible players only see themselves
+        hidden = {
+            str(s["player_id"]) for ws, s in self.connection_states.items()
+            if ws in self.active_connections.get(game_id, [])
+            and s["player_id"] and s["player_id"] != state.get("player_id")
+            and "invisibility" in s["active_powerups"]
+        }
+
+        r_lat, r_lng = state.get("lat", 0.0), state.get("lng", 0.0)
+        players = []
+        for pid_str, (lat, lng) in positions.items():
+            if pid_str in hidden:
+                continue
+            if r_lat != 0.0:
+                lat, lng = project_to_observer(r_lat, r_lng, lat, lng)
+            players.append({"id": pid_str, "position": {"lat": lat, "lng": lng}})
+
+        await websocket.send_json({
+            "type": "resume",
+            "mode": "delta",
+            "from_tick": last_tick,
+            "tick": self.frames.current_tick(game_id),
+            "events": events,
+            "players": players
+        })
 
     async def broadcast(self, message: dict, game_id: UUID):
+        # Every broadcast event is a delta other clients may need to replay on resume
+        tick = self.frames.record(game_id, {"events": [message]})
+        message = {**message, "tick": tick}
         if game_id in self.active_connections:
             for connection in list(self.active_connections[game_id]):
                 try:
@@ -47,18 +314,10 @@ class ConnectionManager:
                 except Exception:
                     pass
 
-    async def broadcast_game_state(self, game_id: UUID, sender_id: UUID, true_lat: float, true_lng: float, db: AsyncSession):
+    def _collect_players(self, game_id: UUID) -> Tuple[List[UUID], Dict[UUID, dict]]:
         """
-        Custom broadcast for Unified Grid.
-        Constructs a "Game State" object with all active players for the client to render.
-        Fetches trails from PostGIS to ensure other players see the full path.
+        Active players of a game from memory (connected players plus those in their reconnect grace period).
         """
-        from app.core.unified_grid import project_to_observer
-        
-        if game_id not in self.active_connections:
-            return
-
-        # 1. Build the list of all active players from memory (for ID and metadata)
         active_player_ids = []
         active_players_metadata = {}
 
@@ -70,18 +329,135 @@ class ConnectionManager:
                      active_players_metadata[pid] = {
                          "lat": state["lat"],
                          "lng": state["lng"],
-                         "active_powerups": state["active_powerups"]
+                         "active_powerups": state["active_powerups"],
+                         "status": "active"
                      }
 
-        if not active_player_ids:
-            return
+        # Players inside their reconnect grace period stay on the map
+        for (s_game_id, pid), session in self.suspended_sessions.items():
+            if s_game_id == game_id and pid not in active_players_metadata:
+                active_player_ids.append(pid)
+                active_players_metadata[pid] = {
+                    "lat": session["lat"],
+                    "lng": session["lng"],
+                    "active_powerups": session["active_powerups"],
+                    "status": "reconnecting"
+                }
+
+        return active_player_ids, active_players_metadata
 
+    def player_positions(self, game_id: UUID) -> List[Tuple[UUID, float, float]]:
+        """
+        [(player_id, lat, lng)] of the players connected to a game on this worker that have
+        reported a position (players still at the initial 0, 0 are left out).
+        """
+        positions = []
+        for ws in self.active_connections.get(game_id, []):
+            state = self.connection_states.get(ws)
+            if state is None or not state["player_id"]:
+                continue
+            if state["lat"] == 0.0 and state["lng"] == 0.0:
+                continue
+            positions.append((state["player_id"], state["lat"], state["lng"]))
+        return positions
+
+    async def connect_spectator(self, websocket: WebSocket, game_id: UUID):
+        """
+        Register a read-only viewer. Spectators never enter the player broadcast loop;
+        they share one low-rate feed per game.
+        """
+        await websocket.accept()
+        self.spectators.setdefault(game_id, []).append(websocket)
+        if game_id not in self.spectator_tasks:
+            self.spectator_tasks[game_id] = asyncio.create_task(self._run_spectator_feed(game_id))
+
+    def disconnect_spectator(self, websocket: WebSocket, game_id: UUID):
+        viewers = self.spectators.get(game_id)
+        if viewers and websocket in viewers:
+            viewers.remove(websocket)
+        if not viewers:
+            self.spectators.pop(game_id, None)
+            task = self.spectator_tasks.pop(game_id, None)
+            if task:
+                task.cancel()
+            self.release_if_idle(game_id)
+
+    async def _build_spectator_frame(self, game_id: UUID, db: AsyncSession) -> dict:
+        """
+        One unprojected frame of the whole game, at the spectator level of detail.
+        """
+        active_player_ids, active_players_metadata = self._collect_players(game_id)
+        trails_map, territories_list = await self._fetch_geometry(game_id, active_player_ids, db)
+        tier = settings.SPECTATOR_LOD_TIER
+
+        players = []
+        for pid in active_player_ids:
+            meta = active_players_metadata[pid]
+            # Invisible players are hidden from spectators too
+            if "invisibility" in meta["active_powerups"]:
+                continue
+            _, trail_tiers = trails_map.get(pid, (None, [[]]))
+            players.append({
+                "id": str(pid),
+                "position": {"lat": meta["lat"], "lng": meta["lng"]},
+                "trail": [{"lat": lat_pt, "lng": lng_pt} for lng_pt, lat_pt in trail_tiers[min(tier, len(trail_tiers) - 1)]],
+                "status": meta["status"],
+                "powerups": meta["active_powerups"]
+            })
+
+        territories = [
+            {
+                "id": terr["id"],
+                "owner_id": terr["owner_id"],
+                "points": [{"lat": lat_pt, "lng": lng_pt} for lng_pt, lat_pt in terr["tiers"][min(tier, len(terr["tiers"]) - 1)]],
+                "area": terr["area"],
+                "lod": tier
+            }
+            for terr in territories_list
+        ]
+
+        return {
+            "type": "spectator_state",
+            "tick": self.frames.current_tick(game_id),
+            "players": players,
+            "territories": territories
+        }
+
+    async def _run_spectator_feed(self, game_id: UUID):
+        """
+        Per-game spectator loop: builds and serializes one frame per interval and
+        sends the same bytes to every spectator.
+        """
+        from app.core.database import AsyncSessionLocal
+
+        while self.spectators.get(game_id):
+            try:
+                async with AsyncSessionLocal() as db:
+                    frame = await self._build_spectator_frame(game_id, db)
+                data = json.dumps(frame)
+                viewers = list(self.spectators.get(game_id, []))
+                await asyncio.gather(*(ws.send_text(data) for ws in viewers), return_exceptions=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Spectator feed error: {e}")
+            await asyncio.sleep(settings.SPECTATOR_FRAME_INTERVAL_SECONDS)
+
+    async def _fetch_geometry(self, game_id: UUID, active_player_ids: List[UUID], db: AsyncSession) -> Tuple[dict, list]:
+        """
+        Load trails of the given players and all territories of the game.
+        Returns (player_id -> (bbox, trail tiers), list of territory polygons with LOD tiers).
+        """
         # 2. Fetch Trails for ALL active players in one go
-        # We use ST_AsGeoJSON to get the coordinates array
+        # We use ST_AsGeoJSON to get the coordinates array.
+        # Each trail is simplified into LOD tiers, cached until its point count changes.
         trails_map = {}
         
         try:
-            stmt = select(PlayerTrail.player_id, func.ST_AsGeoJSON(PlayerTrail.trail).label("geojson")).where(PlayerTrail.player_id.in_(active_player_ids))
+            stmt = select(PlayerTrail.player_id, func.ST_AsGeoJSON(PlayerTrail.trail).label("geojson")).where(
+                PlayerTrail.game_id == game_id,
+                PlayerTrail.player_id.in_(active_player_ids)
+            )
             result = await db.execute(stmt)
             for row in result:
                 pid = row.player_id
@@ -89,64 +465,145 @@ class ConnectionManager:
                 if geojson_str:
                     geojson = json.loads(geojson_str)
                     # geojson["coordinates"] is a list of [lng, lat] arrays
-                    # Convert to [{"lat": y, "lng": x}, ...]
-                    coords = [{"lat": p[1], "lng": p[0]} for p in geojson.get("coordinates", [])]
-                    trails_map[pid] = coords
+                    coords = [(p[0], p[1]) for p in geojson.get("coordinates", [])]
+                    # Trails only grow, so (length, start point) identifies a trail version
+                    trail_version = (len(coords), coords[0] if coords else None)
+                    trails_map[pid] = self.trail_lod.get_or_build(pid, trail_version, coords)
         except Exception as e:
             print(f"Error fetching trails: {e}")
+        # Drop cached tiers of players whose trail was banked or cleared
+        for pid in active_player_ids:
+            if pid not in trails_map:
+                self.trail_lod.discard(pid)
 
 
         # 4. Fetch Territories
+        # Only versions are read every frame; GeoJSON is fetched for territories whose version changed.
         territories_list = []
+        polygon_counts = self.territory_polygon_counts.setdefault(game_id, {})
+        territory_index = self.territory_interest.setdefault(game_id, InterestIndex())
         try:
-            # Fetch all territories
-            # We want the owner ID and the GeoJSON geometry
-            t_stmt = select(PlayerTerritory.player_id, func.ST_AsGeoJSON(PlayerTerritory.territory).label("geojson"), PlayerTerritory.area_sqm)
-            t_result = await db.execute(t_stmt)
-            for row in t_result:
-                t_pid = row.player_id
-                t_geojson_str = row.geojson
-                t_area = row.area_sqm
-                
-                if t_geojson_str:
-                    t_geojson = json.loads(t_geojson_str)
-                    
-                    # Convert to simple list of points for frontend Polygon [[lat, lng], ...]
-                    # GeoJSON Polygon coordinates are usually [[[lng, lat], [lng, lat], ...]] (nested list for rings)
-                    # We assume single outer ring for MVP simplicity, or handle multipolygons
-                    
-                    # Helper to extract points from a Polygon coordinate ring
-                    def extract_points(coords_ring):
-                        return [{"lat": p[1], "lng": p[0]} for p in coords_ring]
+            v_stmt = select(PlayerTerritory.id, PlayerTerritory.player_id, PlayerTerritory.version, PlayerTerritory.area_sqm).where(PlayerTerritory.game_id == game_id)
+            v_result = await db.execute(v_stmt)
+            versions = {row.id: row for row in v_result}
 
-                    # Handle Polygon vs MultiPolygon
-                    polygons = []
+            stale_ids = [tid for tid, row in versions.items() if self.territory_lod.get((tid, 0), row.version) is None]
+            if stale_ids:
+                t_stmt = select(PlayerTerritory.id, func.ST_AsGeoJSON(PlayerTerritory.territory).label("geojson")).where(
+                    PlayerTerritory.game_id == game_id,
+                    PlayerTerritory.id.in_(stale_ids)
+                )
+                t_result = await db.execute(t_stmt)
+                for row in t_result:
+                    if not row.geojson:
+                        continue
+                    t_geojson = json.loads(row.geojson)
+
+                    # Convert to simple list of outer rings for frontend Polygon
+                    # GeoJSON Polygon coordinates are [[[lng, lat], ...], ...] (nested list for rings)
+                    # We only send the outer ring of each polygon
+                    rings = []
                     if t_geojson["type"] == "Polygon":
-                        # t_geojson["coordinates"] is [outer_ring, inner_ring1, ...]
-                        # We just take the outer ring for now
                         if len(t_geojson["coordinates"]) > 0:
-                            polygons.append(extract_points(t_geojson["coordinates"][0]))
-                            
+                            rings.append(t_geojson["coordinates"][0])
                     elif t_geojson["type"] == "MultiPolygon":
                         for poly_coords in t_geojson["coordinates"]:
                             if len(poly_coords) > 0:
-                                polygons.append(extract_points(poly_coords[0]))
-                                
-                    for poly_points in polygons:
-                        territories_list.append({
-                            "owner_id": str(t_pid),
-                            "points": poly_points,
-                            "area": t_area
-                        })
+                                rings.append(poly_coords[0])
+
+                    version = versions[row.id].version
+                    for idx in range(len(rings), polygon_counts.get(row.id, 0)):
+                        territory_index.remove((row.id, idx))
+                    polygon_counts[row.id] = len(rings)
+                    for idx, ring in enumerate(rings):
+                        bbox, _ = self.territory_lod.put((row.id, idx), version, [(p[0], p[1]) for p in ring])
+                        territory_index.update((row.id, idx), sectors_for_bbox(bbox))
+
+            # Territories of this game that no longer exist (other games keep their own entries)
+            for tid in [t for t in polygon_counts if t not in versions]:
+                for idx in range(polygon_counts[tid]):
+                    territory_index.remove((tid, idx))
+                del polygon_counts[tid]
+
+            for tid, row in versions.items():
+                for idx in range(polygon_counts.get(tid, 0)):
+                    cached = self.territory_lod.get((tid, idx), row.version)
+                    if cached is None:
+                        continue
+                    bbox, tiers = cached
+                    territories_list.append({
+                        "key": (tid, idx),
+                        "id": str(tid),
+                        "owner_id": str(row.player_id),
+                        "bbox": bbox,
+                        "tiers": tiers,
+                        "area": row.area_sqm
+                    })
 
         except Exception as e:
             print(f"Error fetching territories: {e}")
 
+        return trails_map, territories_list
+
+    async def broadcast_game_state(self, game_id: UUID, db: AsyncSession, only: Optional[WebSocket] = None):
+        """
+        Custom broadcast for Unified Grid.
+        Constructs a "Game State" object with all active players for the client to render.
+        Fetches trails from PostGIS to ensure other players see the full path.
+        Territory and trail geometry is sent at a level of detail chosen per recipient.
+        With only, the frame is a keyframe sent to that single connection and no tick is recorded.
+        """
+        from app.core.unified_grid import project_to_observer
+        
+        if game_id not in self.active_connections:
+            return
+
+        # 1. Build the list of all active players from memory (for ID and metadata)
+        active_player_ids, active_players_metadata = self._collect_players(game_id)
+
+        if not active_player_ids:
+            return
+
+        # Record the positions that changed since the last tick, for resuming clients
+        if only is None:
+            last_positions = self.last_positions.setdefault(game_id, {})
+            moved = {}
+            for pid in active_player_ids:
+                pos = (active_players_metadata[pid]["lat"], active_players_metadata[pid]["lng"])
+                if last_positions.get(pid) != pos:
+                    last_positions[pid] = pos
+                    moved[str(pid)] = list(pos)
+            tick = self.frames.record(game_id, {"positions": moved})
+        else:
+            tick = self.frames.current_tick(game_id)
+
+        # 2-4. Trails and territories (LOD tiers, cached per geometry version)
+        trails_map, territories_list = await self._fetch_geometry(game_id, active_player_ids, db)
+
         # 5. Send customized state to each connected client
-        for connection in list(self.active_connections[game_id]):
+        targets = [only] if only is not None else list(self.active_connections[game_id])
+        for connection in targets:
             recipient_state = self.connection_states.get(connection)
             recipient_id = recipient_state.get("player_id") if recipient_state else None
+            recipient_zoom = recipient_state.get("zoom") if recipient_state else None
             
+            # If recipient hasn't moved, use 0,0 or their last known
+            r_lat = recipient_state["lat"] if recipient_state else 0.0
+            r_lng = recipient_state["lng"] if recipient_state else 0.0
+
+            # AREA OF INTEREST:
+            # Players come from the recipient's projected cell and its neighbour ring,
+            # territories from their real sector and its neighbour ring.
+            # A recipient without a position yet still receives everything.
+            if r_lat != 0.0:
+                player_index = self.player_interest.get(game_id)
+                nearby_players = player_index.query(projected_interest_cells(r_lat, r_lng)) if player_index else set()
+                territory_index = self.territory_interest.get(game_id)
+                nearby_territories = territory_index.query(sector_interest_cells(r_lat, r_lng)) if territory_index else set()
+            else:
+                nearby_players = None
+                nearby_territories = None
+
             payload_players = []
 
             for pid in active_player_ids:
@@ -154,36 +611,45 @@ class ConnectionManager:
                 is_me = (pid == recipient_id)
                 pid_str = str(pid)
 
+                if nearby_players is not None and not is_me and pid not in nearby_players:
+                    continue
+
                 # INVISIBILITY LOGIC:
                 # If other_player is invisible AND it's not me, SKIP adding them to payload.
                 if "invisibility" in meta["active_powerups"] and not is_me:
                     continue
 
-                # If recipient hasn't moved, use 0,0 or their last known
-                r_lat = recipient_state["lat"] if recipient_state else 0.0
-                r_lng = recipient_state["lng"] if recipient_state else 0.0
-                
+                trail_bbox, trail_tiers = trails_map.get(pid, (None, [[]]))
+
                 # Projection Logic
                 if r_lat != 0.0:
                      proj_lat, proj_lng = project_to_observer(
                          r_lat, r_lng,
                          meta["lat"], meta["lng"]
                      )
-                     
-                     # Project Trail Points
-                     # This is computationally expensive to do for every point for every player.
-                     # Optimization: Only project the last N points or simplify?
-                     # For MVP: We project ALL points.
-                     raw_trail = trails_map.get(pid, [])
+
+                     # LOD: distance from the viewer to the projected trail (approximated by its
+                     # projected bounding box corner offsets), so only nearby trails go out in full.
+                     if trail_bbox:
+                         min_lat, min_lng = project_to_observer(r_lat, r_lng, trail_bbox[1], trail_bbox[0])
+                         proj_bbox = (min_lng, min_lat, min_lng + trail_bbox[2] - trail_bbox[0], min_lat + trail_bbox[3] - trail_bbox[1])
+                     else:
+                         proj_bbox = None
+                     tier = 0 if is_me else select_tier(distance_to_bbox_m(r_lat, r_lng, proj_bbox), recipient_zoom)
+                     raw_trail = trail_tiers[min(tier, len(trail_tiers) - 1)]
+
+                     # Project only the points of the chosen tier
                      proj_trail = []
-                     for pt in raw_trail:
-                         pl, pg = project_to_observer(r_lat, r_lng, pt["lat"], pt["lng"])
+                     for lng_pt, lat_pt in raw_trail:
+                         pl, pg = project_to_observer(r_lat, r_lng, lat_pt, lng_pt)
                          proj_trail.append({"lat": pl, "lng": pg})
                      
                 else:
                      # Fallback: Raw
                      proj_lat, proj_lng = meta["lat"], meta["lng"]
-                     proj_trail = trails_map.get(pid, [])
+                     tier = tier_for_zoom(recipient_zoom)
+                     raw_trail = trail_tiers[min(tier, len(trail_tiers) - 1)]
+                     proj_trail = [{"lat": lat_pt, "lng": lng_pt} for lng_pt, lat_pt in raw_trail]
                 
                 # Construct Player Object for Payload
                 payload_players.append({
@@ -191,16 +657,57 @@ class ConnectionManager:
                     "is_me": is_me,
                     "position": {"lat": proj_lat, "lng": proj_lng},
                     "trail": proj_trail, 
-                    "status": "active",
+                    "status": meta["status"],
                     "powerups": meta["active_powerups"]
                 })
 
+            # Territories are sent unprojected; pick a tier per polygon from the viewer's real position
+            payload_territories = []
+            for terr in territories_list:
+                if nearby_territories is not None and terr["key"] not in nearby_territories:
+                    continue
+                if r_lat != 0.0:
+                    tier = select_tier(distance_to_bbox_m(r_lat, r_lng, terr["bbox"]), recipient_zoom)
+                else:
+                    tier = tier_for_zoom(recipient_zoom)
+                payload_territories.append({
+                    "id": terr["id"],
+                    "owner_id": terr["owner_id"],
+                    "points": [{"lat": lat_pt, "lng": lng_pt} for lng_pt, lat_pt in terr["tiers"][tier]],
+                    "area": terr["area"],
+                    "lod": tier
+                })
+
+            # Enter/leave notifications for entities crossing the area-of-interest boundary
+            visible_players = {p["id"] for p in payload_players}
+            visible_territories = {t["id"] for t in payload_territories}
+            interest_update = None
+            if recipient_state is not None:
+                prev_players = recipient_state["visible_players"]
+                prev_territories = recipient_state["visible_territories"]
+                if visible_players != prev_players or visible_territories != prev_territories:
+                    interest_update = {
+                        "type": "interest_update",
+                        "entered": {
+                            "players": sorted(visible_players - prev_players),
+                            "territories": sorted(visible_territories - prev_territories)
+                        },
+                        "left": {
+                            "players": sorted(prev_players - visible_players),
+                            "territories": sorted(prev_territories - visible_territories)
+                        }
+                    }
+                recipient_state["visible_players"] = visible_players
+                recipient_state["visible_territories"] = visible_territories
+
             try:
+                if interest_update:
+                    await connection.send_json(interest_update)
                 await connection.send_json({
                     "type": "game_state",
-                    "tick": 0, 
+                    "tick": tick, 
                     "players": payload_players,
-                    "territories": territories_list 
+                    "territories": payload_territories
                 })
             except Exception:
                 pass
@@ -214,18 +721,49 @@ async def game_endpoint(
     player_id: Optional[UUID] = None, # Passed via query param
     db: AsyncSession = Depends(get_db)
 ):
-    await manager.connect(websocket, game_id)
-    
     # Identify player if provided
     current_player = None
     if player_id:
-        result = await db.execute(select(Player).where(Player.id == player_id))
-        current_player = result.scalar_one_or_none()
-        
+        current_player = await player_cache.get_by_id(db, player_id)
+
+    # Without a player this is a read-only spectator on the shared low-rate feed
+    if not current_player:
+        await manager.connect_spectator(websocket, game_id)
+        try:
+            while True:
+                data = await websocket.receive_text()
+                try:
+                    if json.loads(data).get("type") == "ping":
+                        await websocket.send_json({"type": "pong"})
+                except json.JSONDecodeError:
+                    await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+        except WebSocketDisconnect:
+            manager.disconnect_spectator(websocket, game_id)
+        return
+
+    await manager.connect(websocket, game_id)
+
     # Update initial state with player ID
     if current_player:
         manager.connection_states[websocket]["player_id"] = current_player.id
 
+        # Reattach to a session still in its grace period; otherwise resume from the
+        # game's event log if this worker restarted or took the game over
+        resumed = manager.resume_session(websocket, game_id, current_player.id)
+        recovered = None if resumed else event_logs.recovered_player(game_id, current_player.id)
+        if recovered:
+            # Recovered powerups get a fresh expiry, since the old timers died with the previous worker
+            for powerup_id in recovered["active_powerups"]:
+                manager.activate_powerup(game_id, current_player.id, powerup_id, manager.connection_states[websocket])
+            if recovered["lat"] != 0.0:
+                manager.update_position(websocket, game_id, recovered["lat"], recovered["lng"])
+        # A game that is over keeps its final state: no event log or raster is reopened for it
+        if await game_status.status(db, game_id) in ("lobby", "active"):
+            event_logs.record(game_id, EVENT_JOIN, current_player.id)
+            if settings.TERRITORY_RASTER_ENABLED:
+                await rasters.ensure_loaded(db, game_id)
+        await inventory.load(db, current_player.id)
+
     try:
         while True:
             data = await websocket.receive_text()
@@ -234,14 +772,19 @@ async def game_endpoint(
                 message = json.loads(data)
                 msg_type = message.get("type")
                 
-                if msg_type == "position_update" and current_player:
+                if msg_type in ("position_update", "use_powerup") and current_player and not await game_status.is_active(db, game_id):
+                    # Moves and powerups only count while the game runs
+                    await websocket.send_json({"type": "error", "message": "Game is not active"})
+
+                elif msg_type == "position_update" and current_player:
                     lat = message.get("lat")
                     lng = message.get("lng")
                     
                     if lat is not None and lng is not None:
-                        # Update connection state for projection
-                        manager.connection_states[websocket]["lat"] = lat
-                        manager.connection_states[websocket]["lng"] = lng
+                        # Update connection state for projection and area of interest
+                        manager.update_position(websocket, game_id, lat, lng)
+                        event_logs.record(game_id, EVENT_MOVE, current_player.id, {"lat": lat, "lng": lng})
+                        heatmap.record(lat, lng)
                         
                         # --- GAME LOGIC START ---
                         
@@ -249,16 +792,22 @@ async def game_endpoint(
                         point_wkt = f'POINT({lng} {lat})'
                         
                         # 1. Check if inside OWN Territory (Safe Zone)
-                        # We need to fetch the territory first
-                        territory_sql = select(PlayerTerritory).where(PlayerTerritory.player_id == current_player.id)
+                        # Only the territory id is loaded; the full shape never leaves the DB here.
+                        territory_sql = select(PlayerTerritory.id).where(
+                            PlayerTerritory.game_id == game_id,
+                            PlayerTerritory.player_id == current_player.id
+                        )
                         t_res = await db.execute(territory_sql)
                         player_territory = t_res.scalar_one_or_none()
                         
                         is_inside = False
-                        # 1a. Check if inside OWN Territory
-                        if player_territory:
-                            check_inside = await db.execute(select(func.ST_Contains(player_territory.territory, func.ST_GeomFromText(point_wkt, 4326))))
-                            is_inside = check_inside.scalar()
+                        # 1a. Check if inside OWN Territory: an array lookup in raster mode,
+                        # otherwise a query touching only the tiles of the current sector
+                        raster = rasters.get(game_id) if settings.TERRITORY_RASTER_ENABLED else None
+                        if raster is not None:
+                            is_inside = raster.contains(current_player.id, lat, lng)
+                        elif player_territory:
+                            is_inside = await point_in_territory(db, game_id, current_player.id, lat, lng)
 
                         # 1b. Check if inside/near SAFE POINT
                         # We use ST_DWithin used against all safe points.
@@ -274,179 +823,47 @@ async def game_endpoint(
                         is_safe_zone = is_inside or (safe_point is not None)
                         
                         # 2. Handle Trail Logic
-                        trail_sql = select(PlayerTrail).where(PlayerTrail.player_id == current_player.id)
-                        tr_res = await db.execute(trail_sql)
-                        player_trail = tr_res.scalar_one_or_none()
-                        
+                        # Outside: the point extends the trail (a self-crossing trail is captured).
+                        # Safe: the trail is banked into territory.
+                        # Writes are queued and applied set-based with every other player's once per tick;
+                        # the tick flush then broadcasts the new state.
+                        reason = None
                         if is_safe_zone:
-                            # SCENARIO: Player is SAFE (Territory OR Safe Point)
-                            
-                            if player_trail:
-                                # EVENT: BANKING / SECURING TRAIL
-                                # If we hit a Safe Point specifically, OR re-entered territory, we Bank.
-                                # Logic is same: Trail -> Buffered Polygon -> Union.
-                                
-                                # Use ST_Buffer to create a corridor from the line
-                                # Buffer width: 2.0 meters (so 4m wide corridor)
-                                try:
-                                    # Convert trail to buffered polygon
-                                    buffer_sql = text("""
-                                        SELECT ST_Multi(ST_Buffer(trail::geometry, 2.0, 'endcap=round join=round'))
-                                        FROM player_trails WHERE player_id = :pid
-                                    """)
-                                    buf_res = await db.execute(buffer_sql, {"pid": current_player.id})
-                                    new_poly_geom = buf_res.scalar()
-                                    
-                                    if new_poly_geom:
-                                        # Union with existing territory
-                                        if player_territory:
-                                            update_terr_sql = text("""
-                                                UPDATE player_territories
-                                                SET territory = ST_Multi(ST_Union(territory::geometry, :new_geom::geometry))::geography,
-                                                    area_sqm = ST_Area(ST_Multi(ST_Union(territory::geometry, :new_geom::geometry))::geography)
-                                                WHERE player_id = :pid
-                                            """)
-                                            await db.execute(update_terr_sql, {"new_geom": new_poly_geom, "pid": current_player.id})
-                                        else:
-                                            # Create new territory from buffer if none exists
-                                            area_val = await db.execute(select(func.ST_Area(new_poly_geom)))
-                                            new_terr = PlayerTerritory(
-                                                player_id=current_player.id, 
-                                                territory=new_poly_geom,
-                                                area_sqm=area_val.scalar() or 0.0
-                                            )
-                                            db.add(new_terr)
-
-                                        # Clear the trail
-                                        await db.execute(text("DELETE FROM player_trails WHERE player_id = :pid"), {"pid": current_player.id})
-                                        
-                                        # Notify
-                                        await manager.broadcast({
-                                            "type": "trail_banked",
-                                            "player_id": str(current_player.id),
-                                            "reason": "safe_point" if safe_point else "territory"
-                                        }, game_id)
-                                        
-                                except Exception as e:
-                                    print(f"Banking Failed: {e}")
-                                    await db.execute(text("DELETE FROM player_trails WHERE player_id = :pid"), {"pid": current_player.id})
-                                
-                            else:
-                                pass # Just moving safely
-                        
-                        else:
-                            # SCENARIO: Player is Vulnerable (Outside)
-                            # SCENARIO: Player is OUTSIDE territory
-                            
-                            if not player_trail:
-                                # START NEW TRAIL
-                                new_trail = PlayerTrail(
-                                    player_id=current_player.id, 
-                                    trail=func.ST_GeomFromText(f'LINESTRING({lng} {lat}, {lng} {lat})', 4326)
-                                )
-                                db.add(new_trail)
-                            else:
-                                # EXTEND TRAIL
-                                # Add point
-                                await db.execute(
-                                    text("""
-                                        UPDATE player_trails 
-                                        SET trail = ST_AddPoint(trail::geometry, ST_MakePoint(:lng, :lat))::geography
-                                        WHERE player_id = :pid
-                                    """),
-                                    {"lng": lng, "lat": lat, "pid": current_player.id}
-                                )
-                                
-                                # CHECK FOR SELF-INTERSECTION (Loop Closure in Void)
-                                # If the updated trail is NOT simple, it crossed itself.
-                                # ST_IsSimple returns true if no self-intersections.
-                                is_simple_res = await db.execute(
-                                    text("SELECT ST_IsSimple(trail::geometry) FROM player_trails WHERE player_id = :pid"),
-                                    {"pid": current_player.id}
-                                )
-                                is_simple = is_simple_res.scalar()
-                                
-                                if not is_simple:
-                                    # Self-intersection detected! CAPTURE.
-                                    # For a self-intersecting linestring, ST_Polygonize is useful.
-                                    # Or ST_BuildArea?
-                                    # Simplest robust approach: ST_Buffer(trail, 0) often fixes/melts it into a polygon if closed.
-                                    # But ST_Polygonize is better for lines.
-                                    
-                                    try:
-                                        # Attempt to convert to territory
-                                        # Logic: Convert to Polygon -> Update/Create Territory -> Clear Trail
-                                        
-                                        # 1. Generate Polygon from 'non-simple' line
-                                        # ST_Node(trail) splits it at intersections. ST_Polygonize builds faces.
-                                        poly_sql = text("""
-                                            SELECT ST_Multi(ST_BuildArea(ST_Node(trail::geometry))) 
-                                            FROM player_trails WHERE player_id = :pid
-                                        """)
-                                        res = await db.execute(poly_sql, {"pid": current_player.id})
-                                        captured_geom = res.scalar()
-                                        
-                                        if captured_geom:
-                                            if player_territory:
-                                                 # Merge
-                                                await db.execute(text("""
-                                                    UPDATE player_territories
-                                                    SET territory = ST_Multi(ST_Union(territory::geometry, :new_geom::geometry))::geography,
-                                                        area_sqm = ST_Area(ST_Multi(ST_Union(territory::geometry, :new_geom::geometry))::geography)
-                                                    WHERE player_id = :pid
-                                                """), {"new_geom": captured_geom, "pid": current_player.id})
-                                            else:
-                                                # Create New
-                                                # area calculation
-                                                area_val = await db.execute(select(func.ST_Area(captured_geom)))
-                                                new_terr = PlayerTerritory(
-                                                    player_id=current_player.id,
-                                                    territory=captured_geom,
-                                                    area_sqm=area_val.scalar() or 0.0
-                                                )
-                                                db.add(new_terr)
-                                            
-                                            # Clear Trail
-                                            await db.execute(text("DELETE FROM player_trails WHERE player_id = :pid"), {"pid": current_player.id})
-                                            
-                                    except Exception as e:
-                                        print(f"Self-Intersection Capture Error: {e}")
-                                        # await db.execute(text("DELETE FROM player_trails WHERE player_id = :pid"), {"pid": current_player.id})
+                            reason = "safe_point" if safe_point else "territory"
+                        write_batcher.record_move(game_id, current_player.id, lat, lng, reason)
 
-                        
+                        # Only reads happened here; end the read transaction so the connection is not left idle in one
                         await db.commit()
                         
-                        # 3. Broadcast new state
-                        await manager.broadcast_game_state(game_id, current_player.id, lat, lng, db)
-                        
                 elif msg_type == "use_powerup" and current_player:
                     powerup_id = message.get("powerup_id") # 'shield', 'invisibility'
                     
-                    # Verify inventory
-                    stmt = select(PlayerPowerup).where(
-                        PlayerPowerup.player_id == current_player.id,
-                        PlayerPowerup.powerup_id == powerup_id,
-                        PlayerPowerup.quantity > 0
-                    )
-                    res = await db.execute(stmt)
-                    inventory_item = res.scalar_one_or_none()
+                    # Verify inventory against the cached stock; the DB is charged by the batched flush
+                    consumed = inventory.consume(game_id, current_player.id, powerup_id)
+                    if not consumed and inventory.is_stale(current_player.id):
+                        # Local stock may be stale (e.g. bought through another worker); the reload waits out
+                        # a running flush. Reconcile at most once per reload interval so repeated refused
+                        # taps are answered from memory
+                        await inventory.load(db, current_player.id)
+                        consumed = inventory.consume(game_id, current_player.id, powerup_id)
                     
-                    if inventory_item:
-                        # Decrement logic
-                        inventory_item.quantity -= 1
-                        await db.commit()
-                        
-                        # Activate powerup in session state
-                        # Note: In a real game, this would have a duration/expiry task.
-                        # For MVP we just toggle it on or add to list.
-                        if powerup_id not in manager.connection_states[websocket]["active_powerups"]:
-                            manager.connection_states[websocket]["active_powerups"].append(powerup_id)
+                    if consumed:
+                        # Activate powerup in session state; expiry is scheduled on the timing wheel
+                        manager.activate_powerup(game_id, current_player.id, powerup_id, manager.connection_states[websocket])
+                        event_logs.record(game_id, EVENT_POWERUP, current_player.id, {"powerup_id": powerup_id})
                         
                         # Broadcast update immediately so everyone sees it (e.g. they disappear)
-                        # We pass dummy lat/lng if we don't have them handy, or use stored ones
-                        clat = manager.connection_states[websocket]["lat"]
-                        clng = manager.connection_states[websocket]["lng"]
-                        await manager.broadcast_game_state(game_id, current_player.id, clat, clng, db)
+                        await manager.broadcast_game_state(game_id, db)
+
+                elif msg_type == "resume":
+                    # Client reconnected and reports the last tick it saw
+                    last_tick = message.get("last_tick")
+                    await manager.send_resume(websocket, game_id, int(last_tick or 0), db)
+
+                elif msg_type == "set_view":
+                    # Client declares its map zoom level so geometry detail can match what it renders
+                    zoom = message.get("zoom")
+                    manager.connection_states[websocket]["zoom"] = float(zoom) if zoom is not None else None
 
                 elif msg_type == "ping":
                     await websocket.send_json({"type": "pong"})
@@ -458,9 +875,8 @@ async def game_endpoint(
                 await websocket.send_json({"type": "error", "message": "Internal error"})
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, game_id)
-        if current_player:
-            await manager.broadcast({
-                "type": "player_left",
-                "player_id": str(current_player.id)
-            }, game_id)
+        state = manager.disconnect(websocket, game_id)
+        if current_player and state:
+            # player_left is only broadcast if the player does not resume within the grace period
+            manager.suspend(game_id, current_player.id, state)
+        manager.release_if_idle(game_id)
@@ -23,6 +23,95 @@ class Settings(BaseSettings):
     # Game Config
     TERRITORY_MIN_AREA_SQM: float = 100.0
     COLLISION_TOLERANCE_METERS: float = 5.0
+    TRAIL_CORRIDOR_HALF_WIDTH_M: float = 2.0  # banked trails become a corridor this far either side
+
+    # Tick Writes
+    TICK_WRITE_INTERVAL_SECONDS: float = 0.2  # queued trail/territory writes are applied once per tick
+
+    # Game Lifecycle
+    GAME_DEFAULT_DURATION_SECONDS: float = 1800.0  # used when a game has no end_time
+    LIFECYCLE_POLL_SECONDS: float = 5.0
+    GAME_STATUS_CACHE_TTL_SECONDS: float = 5.0  # cached game status lifetime
+    GAME_STATUS_CACHE_MAX_ENTRIES: int = 10000
+    PARTITION_DETACH_LOCK_TIMEOUT_MS: int = 2000  # lock wait per partition detach
+
+    # Lobby
+    LOBBY_CACHE_TTL_SECONDS: float = 2.0  # cached lobby page lifetime
+    GAME_DETAIL_CACHE_TTL_SECONDS: float = 5.0  # cached game detail lifetime
+
+    # Player Cache
+    PLAYER_CACHE_TTL_SECONDS: float = 30.0  # cached player profile lifetime
+    PLAYER_CACHE_MAX_ENTRIES: int = 50000
+    HISTORY_CACHE_TTL_SECONDS: float = 60.0  # cached newest history page lifetime
+    HISTORY_CACHE_MAX_PLAYERS: int = 10000
+
+    # Sponsored Locations
+    SPONSOR_TILE_CACHE_TTL_SECONDS: float = 30.0  # cached sponsor tile lifetime
+    SPONSOR_TILE_CACHE_MAX_TILES: int = 20000
+    SPONSOR_QUERY_MAX_TILES: int = 400  # largest area (in sector tiles, ~1km each) one query may cover
+
+    # Sponsor Proximity
+    SPONSOR_PROXIMITY_RADIUS_M: float = 40.0  # a player this close to a sponsored location is near it
+    SPONSOR_PROXIMITY_TICK_SECONDS: float = 1.0
+    SPONSOR_DWELL_SECONDS: float = 5.0  # time in range before sponsor_proximity is sent
+    SPONSOR_EXIT_GRACE_SECONDS: float = 10.0  # time out of range before a visit ends and can trigger again
+    SPONSOR_INDEX_REFRESH_SECONDS: float = 60.0  # proximity index reload interval
+
+    # Heatmap
+    HEATMAP_CELLS_PER_SECTOR: int = 32  # ~28m cells; changing it needs a fresh heatmap_tiles table
+    HEATMAP_BUCKET_SECONDS: int = 3600  # counts are kept per sector per bucket
+    HEATMAP_FLUSH_SECONDS: float = 30.0
+    HEATMAP_MAX_QUERY_HOURS: int = 24 * 31
+
+    # Leaderboards
+    LEADERBOARD_RECONCILE_SECONDS: float = 60.0  # loaded boards are reconciled with the tables this often
+    LEADERBOARD_MAX_GAME_BOARDS: int = 1000  # live boards of active games kept per worker
+    LEADERBOARD_MAX_FINAL_BOARDS: int = 1000  # boards of finished games kept per worker
+
+    # Stats Aggregation
+    STATS_FLUSH_INTERVAL_SECONDS: float = 2.0  # folded player_stats deltas are upserted this often
+
+    # Reconnect / Resume
+    RESUME_BUFFER_TICKS: int = 600  # recent per-game deltas kept for resuming clients
+    RESUME_GRACE_SECONDS: float = 15.0  # how long a dropped player's session stays alive
+
+    # Timers & Powerups
+    TIMER_TICK_SECONDS: float = 0.05  # timing wheel resolution
+    POWERUP_DURATION_SECONDS: dict = {"shield": 10.0, "invisibility": 15.0}
+    POWERUP_DEFAULT_DURATION_SECONDS: float = 60.0
+
+    # Powerup Inventory
+    INVENTORY_FLUSH_INTERVAL_SECONDS: float = 1.0  # consumed powerups are charged in the DB in batches
+    INVENTORY_RELOAD_INTERVAL_SECONDS: float = 5.0  # min age of a cached inventory before a reload
+
+    # Spectators
+    SPECTATOR_FRAME_INTERVAL_SECONDS: float = 1.0
+    SPECTATOR_LOD_TIER: int = 1  # level of detail (see app/core/lod.py) used for spectator frames
+
+    # Event Log
+    EVENT_LOG_DIR: str = "data/event_logs"
+    EVENT_LOG_FSYNC_INTERVAL_SECONDS: float = 0.5  # appends are fsynced in batches at this interval
+    EVENT_LOG_SNAPSHOT_EVERY: int = 5000  # events between snapshots
+
+    # Territory Compaction
+    TERRITORY_VERTEX_BUDGET: int = 2000  # max vertices kept per player territory
+    TERRITORY_COMPACT_THRESHOLD: int = 4000  # compact inline when a union exceeds this
+    TERRITORY_SNAP_GRID_DEG: float = 0.000001  # ~0.1m
+    TERRITORY_SLIVER_AREA_SQM: float = 1.0
+    TERRITORY_COMPACT_INTERVAL_SECONDS: float = 60.0
+    TERRITORY_TILE_MAX_VERTICES: int = 256  # ST_Subdivide limit per territory tile
+
+    # Raster Territory (optional, needs numpy)
+    TERRITORY_RASTER_ENABLED: bool = False  # ownership from per-sector grids instead of polygon unions
+    TERRITORY_RASTER_CELL_M: float = 2.0
+    TERRITORY_RASTER_PERSIST_SECONDS: float = 10.0  # how often changed raster territories are vectorized to the DB
+
+    # Geometry Worker Pool
+    GEOMETRY_POOL_WORKERS: int = -1  # processes for CPU-heavy geometry; -1 = cores - 1, 0 = run inline
+
+    # Area of Interest
+    INTEREST_CELLS_PER_SECTOR: int = 4  # interest cells per sector side for projected players
+    INTEREST_RING_RADIUS: int = 1  # neighbour ring (in cells/sectors) a client receives
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
@@ -0,0 +1,92 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Daily reward claims as one conditional upsert.
+#
+# The cooldown check, the streak, the reward and the write all happen in a single statement,
+# so a claim is one round trip and concurrent claims for the same player serialize on the
+# player_stats row: the first one wins and the rest find the row already claimed. A player
+# without a stats row gets one on their first claim. The idempotency key of the last claim
+# is stored with it, so a retried request is answered with that claim instead of an error.
+
+CLAIM_COOLDOWN_HOURS = 20   # one claim per this many hours
+STREAK_RESET_HOURS = 48     # a longer gap breaks the streak
+
+NOW = "(now() AT TIME ZONE 'utc')"  # last_daily_reward_claimed_at holds naive UTC
+
+
+def reward_sql(streak: str) -> str:
+    # Base reward 100, increases by 50 for each streak day up to 1000 max
+    return f"LEAST(100 + ({streak}) * 50, 1000)"
+
+
+def calculate_reward(streak: int) -> float:
+    return min(100 + (streak * 50), 1000)
+
+
+NEW_STREAK = f"""
+    CASE WHEN player_stats.last_daily_reward_claimed_at IS NULL
+              OR player_stats.last_daily_reward_claimed_at < {NOW} - interval '{STREAK_RESET_HOURS} hours'
+         THEN 1
+         ELSE COALESCE(player_stats.current_streak, 0) + 1
+    END
+"""
+
+CLAIM_SQL = text(f"""
+    INSERT INTO player_stats (player_id, total_area, games_played, games_won, total_earnings, longest_trail,
+                              biggest_loop, current_streak, last_daily_reward_claimed_at, last_reward_claim_key)
+    SELECT p.id, 0, 0, 0, {reward_sql("1")}, 0, 0, 1, {NOW}, :claim_key
+    FROM players p
+    WHERE p.wallet_address = :wallet
+    ON CONFLICT (player_id) DO UPDATE
+    SET current_streak = {NEW_STREAK},
+        total_earnings = COALESCE(player_stats.total_earnings, 0) + {reward_sql(NEW_STREAK)},
+        last_daily_reward_claimed_at = {NOW},
+        last_reward_claim_key = :claim_key
+    WHERE player_stats.last_daily_reward_claimed_at IS NULL
+       OR player_stats.last_daily_reward_claimed_at <= {NOW} - interval '{CLAIM_COOLDOWN_HOURS} hours'
+    RETURNING player_id, current_streak, total_earnings
+""")
+
+# Only read when the claim did not go through: tells a missing player, a retry and a repeat apart
+CLAIM_STATE_SQL = text("""
+    SELECT p.id AS player_id, s.current_streak, s.total_earnings, s.last_reward_claim_key
+    FROM players p
+    LEFT JOIN player_stats s ON s.player_id = p.id
+    WHERE p.wallet_address = :wallet
+""")
+
+
+class ClaimOutcome:
+    __slots__ = ("player_id", "claimed", "replayed", "streak", "reward_amount", "total_earnings")
+
+    def __init__(self, player_id: UUID, claimed: bool, streak: int = 0, total_earnings: float = 0.0, replayed: bool = False):
+        self.player_id = player_id
+        self.claimed = claimed          # this request (or the one it retries) was granted the reward
+        self.replayed = replayed        # answered from an earlier claim with the same idempotency key
+        self.streak = streak
+        self.reward_amount = calculate_reward(streak) if claimed else 0.0
+        self.total_earnings = total_earnings
+
+
+async def claim_daily_reward(db: AsyncSession, wallet_address: str, claim_key: Optional[str] = None) -> Optional[ClaimOutcome]:
+    """
+    Claim today's reward for a wallet. Returns None when the player does not exist and an
+    outcome with claimed=False when the reward was already claimed. Commits.
+    """
+    result = await db.execute(CLAIM_SQL, {"wallet": wallet_address, "claim_key": claim_key})
+    row = result.first()
+    await db.commit()
+    if row is not None:
+        return ClaimOutcome(row.player_id, True, row.current_streak, row.total_earnings)
+
+    state = (await db.execute(CLAIM_STATE_SQL, {"wallet": wallet_address})).first()
+    await db.commit()
+    if state is None:
+        return None
+    if claim_key is not None and state.last_reward_claim_key == claim_key:
+        return ClaimOutcome(state.player_id, True, state.current_streak, state.total_earnings, replayed=True)
+    return ClaimOutcome(state.player_id, False, state.current_streak or 0, state.total_earnings or 0.0)
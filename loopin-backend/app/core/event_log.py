@@ -0,0 +1,252 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+# Per-game append-only binary event log with periodic snapshots.
+#
+# Record layout (little endian):
+#   uint32 payload length | uint32 crc32 | uint8 event type | float64 timestamp | 16 bytes player id | payload
+# The crc covers everything after itself, so a torn write at the tail is detected and ignored on replay.
+#
+# A snapshot is a small JSON file holding the folded game state and the log offset it covers.
+# Recovery loads the snapshot and replays only the log tail after that offset.
+
+HEADER = struct.Struct("<IIBd16s")
+MOVE_PAYLOAD = struct.Struct("<dd")    # lat, lng
+AREA_PAYLOAD = struct.Struct("<d")     # territory area after a bank/capture
+
+EVENT_JOIN = 1
+EVENT_LEAVE = 2
+EVENT_MOVE = 3
+EVENT_BANK = 4
+EVENT_CAPTURE = 5
+EVENT_POWERUP = 6
+EVENT_POWERUP_EXPIRED = 7
+
+NIL_PLAYER = UUID(int=0)
+
+
+def encode_payload(event_type: int, data: dict) -> bytes:
+    if event_type == EVENT_MOVE:
+        return MOVE_PAYLOAD.pack(data["lat"], data["lng"])
+    if event_type in (EVENT_BANK, EVENT_CAPTURE):
+        return AREA_PAYLOAD.pack(data.get("area") or 0.0)
+    if event_type in (EVENT_POWERUP, EVENT_POWERUP_EXPIRED):
+        return data["powerup_id"].encode("utf-8")
+    return b""
+
+
+def decode_payload(event_type: int, payload: bytes) -> dict:
+    if event_type == EVENT_MOVE:
+        lat, lng = MOVE_PAYLOAD.unpack(payload)
+        return {"lat": lat, "lng": lng}
+    if event_type in (EVENT_BANK, EVENT_CAPTURE):
+        (area,) = AREA_PAYLOAD.unpack(payload)
+        return {"area": area}
+    if event_type in (EVENT_POWERUP, EVENT_POWERUP_EXPIRED):
+        return {"powerup_id": payload.decode("utf-8")}
+    return {}
+
+
+def encode_record(event_type: int, player_id: Optional[UUID], data: dict, timestamp: Optional[float] = None) -> bytes:
+    payload = encode_payload(event_type, data)
+    pid_bytes = (player_id or NIL_PLAYER).bytes
+    ts = timestamp if timestamp is not None else time.time()
+    body = struct.pack("<Bd16s", event_type, ts, pid_bytes) + payload
+    return HEADER.pack(len(payload), zlib.crc32(body), event_type, ts, pid_bytes) + payload
+
+
+def iter_records(buf, offset: int = 0) -> Iterator[Tuple[int, int, float, UUID, dict]]:
+    """
+    Yields (end_offset, event_type, timestamp, player_id, data) for each intact record
+    from offset. Stops at the first truncated or corrupt record.
+    """
+    size = len(buf)
+    while offset + HEADER.size <= size:
+        length, crc, event_type, ts, pid_bytes = HEADER.unpack_from(buf, offset)
+        end = offset + HEADER.size + length
+        if end > size:
+            return
+        body = bytes(buf[offset + 8:end])
+        if zlib.crc32(body) != crc:
+            return
+        payload = body[HEADER.size - 8:]
+        yield end, event_type, ts, UUID(bytes=pid_bytes), decode_payload(event_type, payload)
+        offset = end
+
+
+def apply_event(state: dict, event_type: int, player_id: UUID, data: dict):
+    """
+    Fold one event into a game state of the form
+    {"players": {player_id: {"lat", "lng", "area", "active_powerups", "connected"}}}.
+    """
+    if player_id == NIL_PLAYER:
+        return
+    players = state.setdefault("players", {})
+    player = players.setdefault(str(player_id), {
+        "lat": 0.0, "lng": 0.0, "area": 0.0, "active_powerups": [], "connected": False
+    })
+
+    if event_type == EVENT_JOIN:
+        player["connected"] = True
+    elif event_type == EVENT_LEAVE:
+        player["connected"] = False
+    elif event_type == EVENT_MOVE:
+        player["lat"] = data["lat"]
+        player["lng"] = data["lng"]
+    elif event_type in (EVENT_BANK, EVENT_CAPTURE):
+        player["area"] = data["area"]
+    elif event_type == EVENT_POWERUP:
+        if data["powerup_id"] not in player["active_powerups"]:
+            player["active_powerups"].append(data["powerup_id"])
+    elif event_type == EVENT_POWERUP_EXPIRED:
+        if data["powerup_id"] in player["active_powerups"]:
+            player["active_powerups"].remove(data["powerup_id"])
+
+
+class GameEventLog:
+    """
+    Append-only event log for one game.
+    Appends go to an in-memory buffer; flush() writes and fsyncs the whole batch at once.
+    """
+    def __init__(self, game_id: UUID, directory: str):
+        self.game_id = game_id
+        self.log_path = os.path.join(directory, f"{game_id}.log")
+        self.snapshot_path = os.path.join(directory, f"{game_id}.snap")
+        self._buffer = bytearray()
+        self._events_since_snapshot = 0
+        # Folded state, kept current so snapshots never need a replay
+        self.state, self.offset = recover_state(self.log_path, self.snapshot_path)
+        self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Drop a torn tail left by a crash so new records stay reachable on replay
+        if os.fstat(self._fd).st_size > self.offset:
+            os.ftruncate(self._fd, self.offset)
+
+    def append(self, event_type: int, player_id: Optional[UUID], data: Optional[dict] = None):
+        data = data or {}
+        self._buffer += encode_record(event_type, player_id, data)
+        apply_event(self.state, event_type, player_id or NIL_PLAYER, data)
+        self._events_since_snapshot += 1
+
+    def pending_bytes(self) -> int:
+        return len(self._buffer)
+
+    def take_batch(self) -> Tuple[bytes, Optional[str]]:
+        """
+        Detach the buffered records (and, when due, a serialized snapshot covering them)
+        so they can be written off the event loop while appends continue.
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self.offset += len(data)
+
+        snapshot = None
+        if self._events_since_snapshot >= settings.EVENT_LOG_SNAPSHOT_EVERY:
+            snapshot = json.dumps({"offset": self.offset, "state": self.state})
+            self._events_since_snapshot = 0
+        return data, snapshot
+
+    def write_batch(self, data: bytes, snapshot: Optional[str] = None):
+        """Write one batch of records with a single fsync, then the snapshot if any."""
+        if data:
+            os.write(self._fd, data)
+            os.fsync(self._fd)
+        if snapshot is not None:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+    def flush(self):
+        self.write_batch(*self.take_batch())
+
+    def close(self):
+        self.flush()
+        os.close(self._fd)
+
+
+def recover_state(log_path: str, snapshot_path: str) -> Tuple[dict, int]:
+    """
+    Rebuild a game's state from its latest snapshot plus the log tail,
+    reading the log through a memory map.
+    Returns the state and the offset just past the last intact record.
+    """
+    state = {"players": {}}
+    offset = 0
+
+    if os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path) as f:
+                snap = json.load(f)
+            state = snap["state"]
+            offset = snap["offset"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+
+    if not os.path.exists(log_path) or os.path.getsize(log_path) <= offset:
+        return state, min(offset, os.path.getsize(log_path)) if os.path.exists(log_path) else 0
+
+    with open(log_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for end, event_type, _, player_id, data in iter_records(buf, offset):
+                apply_event(state, event_type, player_id, data)
+                offset = end
+
+    return state, offset
+
+
+class EventLogRegistry:
+    """
+    Per-worker registry of open game logs, with a background fsync batcher.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.logs: Dict[UUID, GameEventLog] = {}
+
+    def get(self, game_id: UUID) -> GameEventLog:
+        log = self.logs.get(game_id)
+        if log is None:
+            os.makedirs(self.directory, exist_ok=True)
+            log = GameEventLog(game_id, self.directory)
+            self.logs[game_id] = log
+        return log
+
+    def record(self, game_id: UUID, event_type: int, player_id: Optional[UUID], data: Optional[dict] = None):
+        self.get(game_id).append(event_type, player_id, data)
+
+    def recovered_player(self, game_id: UUID, player_id: UUID) -> Optional[dict]:
+        """Last known state of a player in a game, as rebuilt from snapshot + log."""
+        return self.get(game_id).state.get("players", {}).get(str(player_id))
+
+    def close(self, game_id: UUID):
+        log = self.logs.pop(game_id, None)
+        if log is not None:
+            log.close()
+
+    async def flush_all(self):
+        for log in list(self.logs.values()):
+            if log.pending_bytes():
+                # fsync blocks, keep it off the event loop
+                data, snapshot = log.take_batch()
+                await asyncio.to_thread(log.write_batch, data, snapshot)
+
+    async def run_flusher(self):
+        while True:
+            await asyncio.sleep(settings.EVENT_LOG_FSYNC_INTERVAL_SECONDS)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                print(f"Event log flush failed: {e}")
+
+
+event_logs = EventLogRegistry(settings.EVENT_LOG_DIR)
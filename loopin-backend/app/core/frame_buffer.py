@@ -0,0 +1,51 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+
+class FrameRingBuffer:
+    """
+    Per-game tick counter plus a bounded ring buffer of recent deltas.
+
+    A delta is a small dict recorded once per tick, e.g.
+    {"events": [broadcast messages]} or {"positions": {player_id: [lat, lng]}}.
+    Reconnecting clients get the deltas after their last seen tick instead of a full state.
+    """
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or settings.RESUME_BUFFER_TICKS
+        self.ticks: Dict[UUID, int] = {}
+        self.frames: Dict[UUID, Deque[Tuple[int, dict]]] = {}
+
+    def current_tick(self, game_id: UUID) -> int:
+        return self.ticks.get(game_id, 0)
+
+    def record(self, game_id: UUID, delta: dict) -> int:
+        """Advance the game's tick and store the delta under it. Returns the new tick."""
+        tick = self.ticks.get(game_id, 0) + 1
+        self.ticks[game_id] = tick
+        frames = self.frames.get(game_id)
+        if frames is None:
+            frames = self.frames[game_id] = deque(maxlen=self.capacity)
+        frames.append((tick, delta))
+        return tick
+
+    def since(self, game_id: UUID, last_tick: int) -> Optional[List[Tuple[int, dict]]]:
+        """
+        Deltas recorded after last_tick, oldest first.
+        Returns None when the gap is older than the buffer (the caller must send a keyframe).
+        """
+        current = self.ticks.get(game_id, 0)
+        if last_tick > current:
+            return None
+        if last_tick == current:
+            return []
+        frames = self.frames.get(game_id)
+        if not frames or frames[0][0] > last_tick + 1:
+            return None
+        return [(tick, delta) for tick, delta in frames if tick > last_tick]
+
+    def drop(self, game_id: UUID):
+        self.ticks.pop(game_id, None)
+        self.frames.pop(game_id, None)
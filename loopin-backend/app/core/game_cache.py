@@ -0,0 +1,111 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.game import GameParticipant, GameSession
+from app.schemas.game import GameSessionDetail
+
+# Cached game detail responses.
+#
+# The game, its participations and their players are loaded with selectin eager loading,
+# so a detail read is always three queries however many players joined. The serialized
+# response is cached per game under a local version that joins and status changes bump.
+# Joins on other workers show up once the entry expires.
+#
+# Game statuses are cached separately for the hot paths (moves, tick writes) that must not
+# act on a game which is not running. The lifecycle job updates this worker's entries as it
+# starts and ends games, and re-reads the rest after GAME_STATUS_CACHE_TTL_SECONDS.
+
+
+def game_detail_query():
+    # Built per call: loader options configure the mappers, which needs every model imported,
+    # and this module is imported while the routers (and their models) are still loading
+    return (
+        select(GameSession)
+        .options(selectinload(GameSession.participations).selectinload(GameParticipant.player))
+    )
+
+
+class CachedDetail:
+    __slots__ = ("version", "body", "etag", "expires_at")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.expires_at = time.monotonic() + settings.GAME_DETAIL_CACHE_TTL_SECONDS
+
+
+class GameDetailCache:
+    def __init__(self):
+        self.versions: Dict[UUID, int] = {}
+        self.entries: Dict[UUID, CachedDetail] = {}
+
+    def get(self, game_id: UUID) -> Optional[CachedDetail]:
+        entry = self.entries.get(game_id)
+        if entry is None or entry.version != self.versions.get(game_id, 0) or entry.expires_at < time.monotonic():
+            return None
+        return entry
+
+    async def load(self, db: AsyncSession, game_id: UUID) -> Optional[CachedDetail]:
+        """Load and cache a game's detail response. Returns None if the game does not exist."""
+        version = self.versions.get(game_id, 0)
+        result = await db.execute(game_detail_query().where(GameSession.id == game_id))
+        game = result.scalar_one_or_none()
+        if game is None:
+            return None
+
+        detail = GameSessionDetail.model_validate(game)
+        detail.player_count = len(game.participations)
+        entry = CachedDetail(version, detail.model_dump_json().encode())
+        # Keep it only if nothing changed the game while we were loading
+        if version == self.versions.get(game_id, 0):
+            self.entries[game_id] = entry
+        return entry
+
+    def invalidate(self, game_id: UUID):
+        self.versions[game_id] = self.versions.get(game_id, 0) + 1
+        self.entries.pop(game_id, None)
+
+    def drop(self, game_id: UUID):
+        """Forget a game entirely (it ended and was archived)."""
+        self.versions.pop(game_id, None)
+        self.entries.pop(game_id, None)
+
+
+class GameStatusCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # game_id -> (status or None for an unknown game, expires_at), least recently used first
+        self.entries: "OrderedDict[UUID, Tuple[Optional[str], float]]" = OrderedDict()
+
+    async def status(self, db: AsyncSession, game_id: UUID) -> Optional[str]:
+        """The game's status ('lobby', 'active', 'ended', 'cancelled'), or None if it does not exist."""
+        entry = self.entries.get(game_id)
+        if entry is not None and entry[1] >= time.monotonic():
+            self.entries.move_to_end(game_id)
+            return entry[0]
+        result = await db.execute(select(GameSession.status).where(GameSession.id == game_id))
+        status = result.scalar_one_or_none()
+        self.set(game_id, status)
+        return status
+
+    async def is_active(self, db: AsyncSession, game_id: UUID) -> bool:
+        return await self.status(db, game_id) == "active"
+
+    def set(self, game_id: UUID, status: Optional[str]):
+        self.entries[game_id] = (status, time.monotonic() + settings.GAME_STATUS_CACHE_TTL_SECONDS)
+        self.entries.move_to_end(game_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+game_detail_cache = GameDetailCache()
+game_status = GameStatusCache(settings.GAME_STATUS_CACHE_MAX_ENTRIES)
@@ -0,0 +1,81 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Optional, Sequence
+
+from app.core.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the raster model submits work here
+    np = None
+
+# Process pool for CPU-heavy geometry (raster fills, corridor stamps, vectorization).
+#
+# Work submitted here runs in worker processes so a big capture does not stall the event loop
+# that serves every socket on this worker. Input coordinates and grids are handed over through
+# a shared memory block instead of being pickled; only the (small) results travel back.
+# Callers await the result and apply it on the event loop once it is ready.
+
+
+def _run_shared(fn: Callable, name: str, shape: tuple, dtype: str, args: tuple):
+    """Worker side: attach to the shared block, run fn on it, detach."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        result = fn(array, *args)
+        # The view must be gone before the block can be closed
+        del array
+        return result
+    finally:
+        shm.close()
+
+
+class GeometryPool:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = settings.GEOMETRY_POOL_WORKERS if workers is None else workers
+        if self.workers < 0:
+            # One per core, leaving a core for the event loop
+            self.workers = max(1, (os.cpu_count() or 2) - 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def map_shared(self, fn: Callable, array, args_list: Sequence[tuple]) -> List[Any]:
+        """
+        Run fn(array, *args) for every args in args_list, in parallel worker processes
+        that all read array from one shared memory block. Runs inline when the pool is disabled.
+        """
+        executor = self._get_executor()
+        if executor is None or not args_list:
+            return [fn(array, *args) for args in args_list]
+
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        try:
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+            shared[...] = array
+            del shared
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(
+                loop.run_in_executor(executor, _run_shared, fn, shm.name, array.shape, array.dtype.str, tuple(args))
+                for args in args_list
+            ))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def submit(self, fn: Callable, array, *args) -> Any:
+        """Run fn(array, *args) in a worker process, passing array through shared memory."""
+        return (await self.map_shared(fn, array, [args]))[0]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+geometry_pool = GeometryPool()
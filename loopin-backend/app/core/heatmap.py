@@ -0,0 +1,137 @@
+import asyncio
+import math
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index
+
+# Visit-density heatmap.
+#
+# Every accepted position fix bumps one counter in a compact integer grid kept per
+# (unified_grid sector, time bucket): HEATMAP_CELLS_PER_SECTOR x HEATMAP_CELLS_PER_SECTOR
+# cells, row-major from the sector's south-west corner. Recording is a dict lookup and an
+# increment, no I/O. A background job flushes the grids to heatmap_tiles, adding them
+# element-wise onto the stored ones, so density queries read a handful of small arrays
+# instead of the trail tables. Changing HEATMAP_CELLS_PER_SECTOR needs a fresh table.
+
+UPSERT_TILE_SQL = text("""
+    INSERT INTO heatmap_tiles (sector_x, sector_y, bucket_start, counts, total)
+    VALUES (:sx, :sy, :bucket_start, CAST(:counts AS int[]), :total)
+    ON CONFLICT (sector_x, sector_y, bucket_start) DO UPDATE
+    SET counts = (
+            SELECT array_agg(u.old + u.new ORDER BY u.i)
+            FROM unnest(heatmap_tiles.counts, EXCLUDED.counts) WITH ORDINALITY AS u(old, new, i)
+        ),
+        total = heatmap_tiles.total + EXCLUDED.total
+""")
+
+TILE_COUNTS_SQL = text("""
+    SELECT u.i, sum(u.c) AS c
+    FROM heatmap_tiles h, unnest(h.counts) WITH ORDINALITY AS u(c, i)
+    WHERE h.sector_x = :sx AND h.sector_y = :sy
+      AND h.bucket_start >= :start AND h.bucket_start < :end
+    GROUP BY u.i
+""")
+
+Key = Tuple[int, int, int]  # (sector_x, sector_y, bucket index)
+
+
+def naive_utc(when: datetime) -> datetime:
+    """A datetime as naive UTC, the form bucket_start and heatmap_tiles use. Naive values are taken as UTC."""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class HeatmapAggregator:
+    def __init__(self):
+        self.side = settings.HEATMAP_CELLS_PER_SECTOR
+        self.pending: Dict[Key, array] = {}
+
+    def _new_grid(self) -> array:
+        return array("I", bytes(4 * self.side * self.side))
+
+    def bucket_start(self, bucket: int) -> datetime:
+        return datetime.utcfromtimestamp(bucket * settings.HEATMAP_BUCKET_SECONDS)
+
+    def record(self, lat: float, lng: float, at: Optional[float] = None):
+        """Count one position fix."""
+        bucket = int((time.time() if at is None else at) // settings.HEATMAP_BUCKET_SECONDS)
+        sector_x, sector_y = get_sector_index(lat, lng)
+        key = (sector_x, sector_y, bucket)
+        grid = self.pending.get(key)
+        if grid is None:
+            grid = self.pending[key] = self._new_grid()
+        col = min(int((lng / SECTOR_SIZE_DEG - sector_x) * self.side), self.side - 1)
+        row = min(int((lat / SECTOR_SIZE_DEG - sector_y) * self.side), self.side - 1)
+        grid[row * self.side + col] += 1
+
+    async def flush(self, db: AsyncSession):
+        """Add the pending grids onto the stored ones and commit. Failed grids are kept for the next flush."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        try:
+            await db.execute(UPSERT_TILE_SQL, [
+                {
+                    "sx": sector_x,
+                    "sy": sector_y,
+                    "bucket_start": self.bucket_start(bucket),
+                    "counts": grid.tolist(),
+                    "total": sum(grid),
+                }
+                for (sector_x, sector_y, bucket), grid in pending.items()
+            ])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            for key, grid in pending.items():
+                current = self.pending.get(key)
+                if current is not None:
+                    for i, count in enumerate(current):
+                        grid[i] += count
+                self.pending[key] = grid
+            raise
+
+    async def tile(self, db: AsyncSession, sector_x: int, sector_y: int, start: datetime, end: datetime) -> List[int]:
+        """Summed counts of one sector over [start, end), including this worker's unflushed fixes."""
+        counts = [0] * (self.side * self.side)
+        result = await db.execute(TILE_COUNTS_SQL, {"sx": sector_x, "sy": sector_y, "start": start, "end": end})
+        for row in result:
+            if row.i <= len(counts):
+                counts[row.i - 1] += int(row.c)
+
+        for (pending_x, pending_y, bucket), grid in self.pending.items():
+            if (pending_x, pending_y) == (sector_x, sector_y) and start <= self.bucket_start(bucket) < end:
+                for i, count in enumerate(grid):
+                    counts[i] += count
+        return counts
+
+    def bucket_floor(self, when: datetime) -> datetime:
+        """Start of the bucket containing a datetime (naive values are taken as UTC)."""
+        when = naive_utc(when)
+        epoch = (when - datetime(1970, 1, 1)).total_seconds()
+        return self.bucket_start(math.floor(epoch / settings.HEATMAP_BUCKET_SECONDS))
+
+    async def run(self):
+        """
+        Background job: flushes the pending grids every HEATMAP_FLUSH_SECONDS.
+        """
+        from app.core.database import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(settings.HEATMAP_FLUSH_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.flush(db)
+            except Exception as e:
+                print(f"Heatmap flush failed: {e}")
+
+
+heatmap = HeatmapAggregator()
@@ -0,0 +1,100 @@
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.schemas.stats import PlayerGameHistoryPage, PlayerGameHistorySchema
+
+# Player game history, newest first.
+#
+# Pages are keyset cursors on (played_at, id) within one player, so every page is a short
+# range scan of ix_player_game_history_player_played however many games the player has
+# played; the index carries the listed columns, so the scan never visits the table.
+# The newest page, the one every history screen opens on, is cached per player and dropped
+# when a game of theirs is finalized.
+
+HISTORY_PAGE_SQL = text("""
+    SELECT id, game_id, rank, area_captured, prize_won, played_at
+    FROM player_game_history
+    WHERE player_id = :pid
+      AND (played_at, id) < (CAST(CAST(:before_time AS text) AS timestamp), CAST(:before_id AS uuid))
+    ORDER BY played_at DESC, id DESC
+    LIMIT :limit
+""")
+
+FIRST_CURSOR = ("infinity", UUID(int=(1 << 128) - 1))
+
+
+def encode_cursor(played_at: datetime, entry_id: UUID) -> str:
+    raw = json.dumps([played_at.isoformat(), str(entry_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[str, UUID]:
+    """(played_at, id) to continue before; raises ValueError on a malformed cursor."""
+    if not cursor:
+        return FIRST_CURSOR
+    try:
+        played_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return played_at, UUID(entry_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+class HistoryCache:
+    """
+    Per-worker LRU of each player's newest history page.
+    """
+    def __init__(self):
+        # player -> (limit, page, expires_at)
+        self.pages: "OrderedDict[UUID, Tuple[int, PlayerGameHistoryPage, float]]" = OrderedDict()
+
+    async def get_page(self, db: AsyncSession, player_id: UUID, cursor: Optional[str], limit: int) -> PlayerGameHistoryPage:
+        if cursor is None:
+            cached = self.pages.get(player_id)
+            if cached is not None and cached[0] == limit and cached[2] >= time.monotonic():
+                self.pages.move_to_end(player_id)
+                return cached[1]
+
+        page = await self.load(db, player_id, cursor, limit)
+        if cursor is None:
+            self.pages[player_id] = (limit, page, time.monotonic() + settings.HISTORY_CACHE_TTL_SECONDS)
+            self.pages.move_to_end(player_id)
+            while len(self.pages) > settings.HISTORY_CACHE_MAX_PLAYERS:
+                self.pages.popitem(last=False)
+        return page
+
+    async def load(self, db: AsyncSession, player_id: UUID, cursor: Optional[str], limit: int) -> PlayerGameHistoryPage:
+        before_time, before_id = decode_cursor(cursor)
+        result = await db.execute(HISTORY_PAGE_SQL, {
+            "pid": player_id,
+            "before_time": before_time,
+            "before_id": before_id,
+            # One extra row tells whether there is a next page
+            "limit": limit + 1,
+        })
+        rows = result.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].played_at, rows[-1].id)
+
+        return PlayerGameHistoryPage(
+            items=[PlayerGameHistorySchema.model_validate(dict(row._mapping)) for row in rows],
+            next_cursor=next_cursor
+        )
+
+    def invalidate(self, player_id: UUID):
+        """A new game was recorded for the player."""
+        self.pages.pop(player_id, None)
+
+
+history_cache = HistoryCache()
@@ -0,0 +1,117 @@
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index, get_sector_offset
+
+Cell = Tuple[int, int]
+
+# Area-of-interest management on top of the unified grid.
+#
+# Players are rendered projected into the observer's sector, so their interest cells live
+# in the shared sector frame: each sector is split into INTEREST_CELLS_PER_SECTOR^2 cells and
+# a player is indexed by the cell of their offset within their own sector.
+# Territories are rendered at their real coordinates, so they are indexed by the real
+# sectors their bounding box covers.
+# In both cases a recipient receives the entities in its own cell/sector plus the neighbour ring.
+
+
+class InterestIndex:
+    """
+    Cell -> entity index with a reverse map so entities can be moved or removed cheaply.
+    """
+    def __init__(self):
+        self._cells: Dict[Cell, Set[Hashable]] = defaultdict(set)
+        self._entities: Dict[Hashable, Set[Cell]] = {}
+
+    def update(self, entity: Hashable, cells: Iterable[Cell]):
+        cells = set(cells)
+        previous = self._entities.get(entity, set())
+        if cells == previous:
+            return
+        for cell in previous - cells:
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(entity)
+                if not members:
+                    del self._cells[cell]
+        for cell in cells - previous:
+            self._cells[cell].add(entity)
+        self._entities[entity] = cells
+
+    def remove(self, entity: Hashable):
+        self.update(entity, ())
+        self._entities.pop(entity, None)
+
+    def query(self, cells: Iterable[Cell]) -> Set[Hashable]:
+        found = set()
+        for cell in cells:
+            members = self._cells.get(cell)
+            if members:
+                found.update(members)
+        return found
+
+    def entities(self) -> Set[Hashable]:
+        return set(self._entities.keys())
+
+    def __contains__(self, entity: Hashable) -> bool:
+        return entity in self._entities
+
+
+def neighbour_ring(cell: Cell, radius: int = 1, limit: Optional[int] = None) -> Set[Cell]:
+    """
+    Returns the cell and its neighbours within radius.
+    With limit, cells are clamped to [0, limit) on both axes.
+    """
+    x, y = cell
+    ring = set()
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            nx, ny = x + dx, y + dy
+            if limit is not None and not (0 <= nx < limit and 0 <= ny < limit):
+                continue
+            ring.add((nx, ny))
+    return ring
+
+
+def projected_cell(lat: float, lng: float) -> Cell:
+    """
+    Interest cell of a player in the shared (projected) sector frame.
+    """
+    cells = settings.INTEREST_CELLS_PER_SECTOR
+    offset_lat, offset_lng = get_sector_offset(lat, lng)
+    cx = min(int(offset_lng / SECTOR_SIZE_DEG * cells), cells - 1)
+    cy = min(int(offset_lat / SECTOR_SIZE_DEG * cells), cells - 1)
+    return cx, cy
+
+
+def projected_interest_cells(lat: float, lng: float) -> Set[Cell]:
+    """
+    Cells of the projected frame an observer at (lat, lng) is interested in.
+    Projected positions never leave the sector, so the ring is clamped to it.
+    """
+    return neighbour_ring(
+        projected_cell(lat, lng),
+        settings.INTEREST_RING_RADIUS,
+        limit=settings.INTEREST_CELLS_PER_SECTOR,
+    )
+
+
+def sector_interest_cells(lat: float, lng: float) -> Set[Cell]:
+    """
+    Real sectors an observer at (lat, lng) is interested in: their sector and its neighbour ring.
+    """
+    return neighbour_ring(get_sector_index(lat, lng), settings.INTEREST_RING_RADIUS)
+
+
+def sectors_for_bbox(bbox: Optional[Tuple[float, float, float, float]]) -> Set[Cell]:
+    """
+    Real sectors covered by a (min_lng, min_lat, max_lng, max_lat) bounding box.
+    """
+    if bbox is None:
+        return set()
+    min_lng, min_lat, max_lng, max_lat = bbox
+    x0, x1 = math.floor(min_lng / SECTOR_SIZE_DEG), math.floor(max_lng / SECTOR_SIZE_DEG)
+    y0, y1 = math.floor(min_lat / SECTOR_SIZE_DEG), math.floor(max_lat / SECTOR_SIZE_DEG)
+    return {(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
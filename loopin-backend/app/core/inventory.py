@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+# The Player mapper's relationships resolve against this model; import it so the ORM can configure
+import app.models.powerup  # noqa: F401
+
+# Per-worker powerup inventory with write-behind consumption.
+#
+# A player's inventory is loaded when they join a game. Using a powerup is a plain in-memory
+# decrement (no await between check and decrement, so it is atomic on the event loop) and the
+# activation never waits on the database. Consumed powerups are flushed in batches by one
+# statement that locks the rows and never lets quantity go below zero.
+#
+# The database stays the arbiter across workers: if another worker (or a second game) spent the
+# same stock first, the flush charges only what is left and reports the uncovered uses so the
+# caller can revoke those activations. The returned quantities then reconcile the local cache.
+# A player cannot use the same powerup again until their previous use of it has been charged,
+# so at most one unconfirmed activation per powerup is ever live on a worker. Reloads and
+# flushes never interleave, so a reload cannot miss uses that are being charged.
+
+LOAD_INVENTORY_SQL = text("""
+    SELECT powerup_id, quantity FROM player_powerups
+    WHERE player_id = :pid
+""")
+
+# Charge a batch of uses. Rows are locked first so concurrent flushes from other workers
+# serialize and each one sees the quantity left by the previous one.
+CHARGE_USES_SQL = text("""
+    WITH uses AS (
+        SELECT * FROM unnest(
+            CAST(:player_ids AS uuid[]), CAST(:powerup_ids AS text[]), CAST(:amounts AS int[])
+        ) AS u(player_id, powerup_id, n)
+    ),
+    locked AS (
+        SELECT pp.id, pp.quantity, uses.n
+        FROM player_powerups pp
+        JOIN uses ON pp.player_id = uses.player_id AND pp.powerup_id = uses.powerup_id
+        FOR UPDATE OF pp
+    )
+    UPDATE player_powerups pp
+    SET quantity = locked.quantity - LEAST(locked.quantity, locked.n)
+    FROM locked
+    WHERE pp.id = locked.id
+    RETURNING pp.player_id, pp.powerup_id, pp.quantity, LEAST(locked.quantity, locked.n) AS charged
+""")
+
+# Purchases add stock atomically instead of read-modify-write; a first purchase creates the row
+ADD_STOCK_SQL = text("""
+    INSERT INTO player_powerups (id, player_id, powerup_id, quantity, equipped)
+    VALUES (gen_random_uuid(), :pid, :powerup, :n, true)
+    ON CONFLICT (player_id, powerup_id) DO UPDATE
+    SET quantity = player_powerups.quantity + EXCLUDED.quantity,
+        equipped = true
+    RETURNING quantity
+""")
+
+Use = Tuple[UUID, UUID, str]  # (game_id, player_id, powerup_id)
+
+
+class PowerupInventory:
+    def __init__(self):
+        # player_id -> powerup_id -> quantity available on this worker (DB quantity minus unflushed uses)
+        self.stock: Dict[UUID, Dict[str, int]] = {}
+        # player_id -> when their stock was last read from the DB (monotonic)
+        self.loaded_at: Dict[UUID, float] = {}
+        # (player_id, powerup_id) -> game ids of uses not yet charged in the DB, oldest first
+        self.pending: Dict[Tuple[UUID, str], List[UUID]] = defaultdict(list)
+        # The batch being charged by a running flush
+        self.charging: Dict[Tuple[UUID, str], List[UUID]] = {}
+        # Held by flush while its batch is in flight and by load while it reads
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession, player_id: UUID):
+        """(Re)load a player's inventory from the DB, keeping unflushed uses deducted."""
+        async with self._lock:
+            result = await db.execute(LOAD_INVENTORY_SQL, {"pid": player_id})
+            stock = defaultdict(int)
+            for powerup_id, quantity in result.fetchall():
+                stock[powerup_id] += quantity or 0
+            for (pid, powerup_id), uses in self.pending.items():
+                if pid == player_id:
+                    stock[powerup_id] -= len(uses)
+            self.stock[player_id] = dict(stock)
+            self.loaded_at[player_id] = time.monotonic()
+
+    def is_loaded(self, player_id: UUID) -> bool:
+        return player_id in self.stock
+
+    def is_stale(self, player_id: UUID) -> bool:
+        """True if the player's stock is not cached or older than INVENTORY_RELOAD_INTERVAL_SECONDS."""
+        loaded_at = self.loaded_at.get(player_id)
+        return loaded_at is None or time.monotonic() - loaded_at >= settings.INVENTORY_RELOAD_INTERVAL_SECONDS
+
+    def consume(self, game_id: UUID, player_id: UUID, powerup_id: str) -> bool:
+        """
+        Take one powerup from the local stock. The DB is charged on the next flush; until then
+        the player cannot use the same powerup again.
+        """
+        key = (player_id, powerup_id)
+        if self.pending.get(key) or key in self.charging:
+            return False
+        stock = self.stock.get(player_id)
+        if not stock or stock.get(powerup_id, 0) <= 0:
+            return False
+        stock[powerup_id] -= 1
+        self.pending[key].append(game_id)
+        return True
+
+    def credit(self, player_id: UUID, powerup_id: str, amount: int = 1):
+        """Reflect a purchase in the local stock if this worker has the player cached."""
+        stock = self.stock.get(player_id)
+        if stock is not None:
+            stock[powerup_id] = stock.get(powerup_id, 0) + amount
+
+    def evict(self, player_id: UUID):
+        """Drop a player's cached stock once they left. Pending uses are still flushed."""
+        self.stock.pop(player_id, None)
+        self.loaded_at.pop(player_id, None)
+
+    async def add_stock(self, db: AsyncSession, player_id: UUID, powerup_id: str, amount: int = 1) -> int:
+        """
+        Atomically add purchased stock in the DB and commit. The local stock is credited only
+        once the purchase is committed. Returns the new quantity.
+        """
+        result = await db.execute(ADD_STOCK_SQL, {"pid": player_id, "powerup": powerup_id, "n": amount})
+        quantity = result.scalar_one()
+        await db.commit()
+        self.credit(player_id, powerup_id, amount)
+        return quantity
+
+    async def flush(self, db: AsyncSession) -> List[Use]:
+        """
+        Charge all pending uses in one statement and commit.
+        Returns the uses the DB could not cover (stock spent elsewhere first), newest first.
+        """
+        if not self.pending:
+            return []
+        async with self._lock:
+            return await self._flush_batch(db)
+
+    async def _flush_batch(self, db: AsyncSession) -> List[Use]:
+        if not self.pending:
+            return []
+        # Swap the batch out before awaiting so uses made during the flush go to the next one
+        batch, self.pending = self.pending, defaultdict(list)
+        self.charging = batch
+
+        keys = list(batch.keys())
+        try:
+            result = await db.execute(CHARGE_USES_SQL, {
+                "player_ids": [player_id for player_id, _ in keys],
+                "powerup_ids": [powerup_id for _, powerup_id in keys],
+                "amounts": [len(batch[key]) for key in keys],
+            })
+            rows = result.fetchall()
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Put the batch back in front of anything newer and retry on the next flush
+            for key, uses in self.pending.items():
+                batch[key].extend(uses)
+            self.pending = batch
+            raise
+        finally:
+            self.charging = {}
+
+        charged = {}
+        for player_id, powerup_id, quantity, n in rows:
+            key = (player_id, powerup_id)
+            charged[key] = charged.get(key, 0) + n
+            # Reconcile the cache with the DB, minus uses made while the flush was running
+            stock = self.stock.get(player_id)
+            if stock is not None:
+                stock[powerup_id] = quantity - len(self.pending.get(key, ()))
+
+        rejected = []
+        for key, uses in batch.items():
+            uncovered = len(uses) - charged.get(key, 0)
+            if uncovered > 0:
+                player_id, powerup_id = key
+                rejected.extend((game_id, player_id, powerup_id) for game_id in reversed(uses[-uncovered:]))
+                if key not in charged and player_id in self.stock:
+                    # No DB row at all: nothing left to spend
+                    self.stock[player_id][powerup_id] = 0
+        return rejected
+
+    async def run_flusher(self):
+        """
+        Background job: flushes uses in batches and revokes activations the DB rejected.
+        """
+        from app.core.database import AsyncSessionLocal
+        from app.api.ws.game import manager
+
+        while True:
+            await asyncio.sleep(settings.INVENTORY_FLUSH_INTERVAL_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    rejected = await self.flush(db)
+                for game_id, player_id, powerup_id in rejected:
+                    await manager.revoke_powerup(game_id, player_id, powerup_id)
+            except Exception as e:
+                print(f"Powerup inventory flush failed: {e}")
+
+
+inventory = PowerupInventory()
@@ -0,0 +1,339 @@
+import asyncio
+import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.game_cache import game_status
+
+# In-memory leaderboards.
+#
+# Each board keeps its players in an indexable skip list ordered by (score desc, player id),
+# so a score change, a player's rank and the entry at a given rank are all O(log n), and a
+# page of the top K is O(log n + K). Boards are loaded from Postgres on first use, then kept
+# current by the events that change scores (captures and banks for per-game area, reward
+# claims for earnings) and periodically reconciled with the tables to repair any drift, such
+# as writes handled by other workers. Reconciling updates the boards in place, so only scores
+# that changed touch the skip lists, and scores recorded while it reads are replayed over its
+# result. Only active games get a live board; a finished game is ranked once from
+# player_game_history. Both kinds are kept in bounded LRU registries.
+
+GLOBAL_METRICS = ("total_area", "biggest_loop", "longest_trail", "total_earnings")
+
+GLOBAL_SCORES_SQL = text("""
+    SELECT player_id, total_area, biggest_loop, longest_trail, total_earnings
+    FROM player_stats
+""")
+
+GAME_SCORES_SQL = text("""
+    SELECT player_id, area_sqm FROM player_territories WHERE game_id = :gid
+""")
+
+# Scores of the live boards still active, in one pass (a game without territory yields one NULL row)
+LIVE_GAME_SCORES_SQL = text("""
+    SELECT g.id AS game_id, t.player_id, t.area_sqm
+    FROM game_sessions g
+    LEFT JOIN player_territories t ON t.game_id = g.id
+    WHERE g.id = ANY(CAST(:gids AS uuid[])) AND g.status = 'active'
+""")
+
+# Final areas of a finished game, whose territories have been dropped
+FINAL_SCORES_SQL = text("""
+    SELECT player_id, area_captured FROM player_game_history WHERE game_id = :gid
+""")
+
+MAX_LEVEL = 32
+
+# Rows applied between yields to the event loop while reconciling the global boards
+RECONCILE_CHUNK_ROWS = 1000
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Optional[Tuple[float, str]], level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        # width[i]: how many level-0 steps next[i] skips
+        self.width = [1] * level
+
+
+class SkipList:
+    """Indexable skip list of unique, ordered keys."""
+
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVEL)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, key):
+        chain = [self.head] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = 1
+        while height < MAX_LEVEL and random.random() < 0.5:
+            height += 1
+        new = _Node(key, height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [self.head] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index_of(self, key) -> int:
+        """0-based position of a key that is in the list."""
+        position = 0
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def iter_from(self, index: int):
+        """Keys from a 0-based position onwards."""
+        if index >= self.size:
+            return
+        node = self.head
+        remaining = index + 1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Scores for one metric, ranked highest first; ties go to the lower player id."""
+
+    def __init__(self):
+        self.scores: Dict[UUID, float] = {}
+        self.ranking = SkipList()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def set(self, player_id: UUID, score: float):
+        score = float(score or 0.0)
+        old = self.scores.get(player_id)
+        if old == score:
+            return
+        if old is not None:
+            self.ranking.remove((-old, str(player_id)))
+        self.scores[player_id] = score
+        self.ranking.insert((-score, str(player_id)))
+
+    def remove(self, player_id: UUID):
+        old = self.scores.pop(player_id, None)
+        if old is not None:
+            self.ranking.remove((-old, str(player_id)))
+
+    def rank_of(self, player_id: UUID) -> Optional[Tuple[int, float]]:
+        """(1-based rank, score), or None for a player not on the board."""
+        score = self.scores.get(player_id)
+        if score is None:
+            return None
+        return self.ranking.index_of((-score, str(player_id))) + 1, score
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, UUID, float]]:
+        """[(rank, player id, score)] for ranks offset+1 .. offset+limit."""
+        entries = []
+        for rank, (neg_score, player_id) in enumerate(self.ranking.iter_from(offset), start=offset + 1):
+            if len(entries) >= limit:
+                break
+            entries.append((rank, UUID(player_id), -neg_score))
+        return entries
+
+
+class LeaderboardRegistry:
+    def __init__(self):
+        # Global boards are None until first requested
+        self.global_boards: Optional[Dict[str, Leaderboard]] = None
+        # Live boards of active games, least recently used first
+        self.game_boards: "OrderedDict[UUID, Leaderboard]" = OrderedDict()
+        # Final boards of finished games (from player_game_history; they never change)
+        self.final_boards: "OrderedDict[UUID, Leaderboard]" = OrderedDict()
+        self._load_lock = asyncio.Lock()
+        # Scores recorded while the tables are being read, replayed over what was read
+        # (None when no read is running)
+        self._global_replay: Optional[Dict[Tuple[str, UUID], float]] = None
+        self._game_replay: Optional[Dict[Tuple[UUID, UUID], float]] = None
+
+    async def _sync_global(self, db: AsyncSession, boards: Dict[str, Leaderboard]):
+        """Bring the global boards in line with player_stats, yielding to the event loop between chunks."""
+        self._global_replay = {}
+        try:
+            rows = (await db.execute(GLOBAL_SCORES_SQL)).fetchall()
+            seen = set()
+            for start in range(0, len(rows), RECONCILE_CHUNK_ROWS):
+                for row in rows[start:start + RECONCILE_CHUNK_ROWS]:
+                    seen.add(row.player_id)
+                    for metric in GLOBAL_METRICS:
+                        boards[metric].set(row.player_id, getattr(row, metric))
+                await asyncio.sleep(0)
+            for board in boards.values():
+                for player_id in [player_id for player_id in board.scores if player_id not in seen]:
+                    board.remove(player_id)
+            # Newer than the rows read
+            for (metric, player_id), score in self._global_replay.items():
+                boards[metric].set(player_id, score)
+        finally:
+            self._global_replay = None
+
+    async def _load_game(self, db: AsyncSession, game_id: UUID) -> Leaderboard:
+        board = Leaderboard()
+        result = await db.execute(GAME_SCORES_SQL, {"gid": game_id})
+        for row in result:
+            board.set(row.player_id, row.area_sqm)
+        return board
+
+    async def _load_final(self, db: AsyncSession, game_id: UUID) -> Leaderboard:
+        board = Leaderboard()
+        result = await db.execute(FINAL_SCORES_SQL, {"gid": game_id})
+        for row in result:
+            board.set(row.player_id, row.area_captured)
+        return board
+
+    async def global_board(self, db: AsyncSession, metric: str) -> Leaderboard:
+        if self.global_boards is None:
+            async with self._load_lock:
+                if self.global_boards is None:
+                    boards = {metric: Leaderboard() for metric in GLOBAL_METRICS}
+                    await self._sync_global(db, boards)
+                    self.global_boards = boards
+        return self.global_boards[metric]
+
+    async def game_board(self, db: AsyncSession, game_id: UUID) -> Optional[Leaderboard]:
+        """
+        The area board of a game, or None if the game does not exist. Only active games get a
+        live board kept in memory; finished games are ranked from player_game_history and a
+        lobby game has no territory yet.
+        """
+        status = await game_status.status(db, game_id)
+        if status is None:
+            return None
+        if status == "active":
+            return await self._cached(db, game_id, self.game_boards, self._load_game, settings.LEADERBOARD_MAX_GAME_BOARDS)
+        if status in ("ended", "cancelled"):
+            return await self._cached(db, game_id, self.final_boards, self._load_final, settings.LEADERBOARD_MAX_FINAL_BOARDS)
+        return Leaderboard()
+
+    async def _cached(self, db: AsyncSession, game_id: UUID, boards: "OrderedDict[UUID, Leaderboard]", load, max_boards: int) -> Leaderboard:
+        board = boards.get(game_id)
+        if board is None:
+            async with self._load_lock:
+                board = boards.get(game_id)
+                if board is None:
+                    board = boards[game_id] = await load(db, game_id)
+                    while len(boards) > max_boards:
+                        boards.popitem(last=False)
+        boards.move_to_end(game_id)
+        return board
+
+    def record(self, metric: str, player_id: UUID, score: float):
+        """A player's global score changed (no-op until the global boards are loaded)."""
+        if self._global_replay is not None:
+            self._global_replay[(metric, player_id)] = score
+        if self.global_boards is not None:
+            self.global_boards[metric].set(player_id, score)
+
+    def record_game_area(self, game_id: UUID, player_id: UUID, area: float):
+        """A player's territory in a game changed (no-op until that board is loaded)."""
+        if self._game_replay is not None:
+            self._game_replay[(game_id, player_id)] = area
+        board = self.game_boards.get(game_id)
+        if board is not None:
+            board.set(player_id, area)
+
+    def drop_game(self, game_id: UUID):
+        self.game_boards.pop(game_id, None)
+
+    async def reconcile(self, db: AsyncSession):
+        """
+        Reconcile every loaded board with the tables. The global boards are updated in place;
+        all live game boards are re-read with one query and swapped in, and boards of games that
+        stopped being active are dropped. Scores recorded during the reads are kept.
+        """
+        if self.global_boards is not None:
+            await self._sync_global(db, self.global_boards)
+
+        game_ids = list(self.game_boards)
+        if not game_ids:
+            return
+        self._game_replay = {}
+        try:
+            result = await db.execute(LIVE_GAME_SCORES_SQL, {"gids": game_ids})
+            rebuilt: Dict[UUID, Leaderboard] = {}
+            for row in result:
+                board = rebuilt.setdefault(row.game_id, Leaderboard())
+                if row.player_id is not None:
+                    board.set(row.player_id, row.area_sqm)
+            for (game_id, player_id), area in self._game_replay.items():
+                if game_id in rebuilt:
+                    rebuilt[game_id].set(player_id, area)
+        finally:
+            self._game_replay = None
+        for game_id in game_ids:
+            # Skip games that ended (here or on another worker) or were evicted meanwhile
+            if game_id not in self.game_boards:
+                continue
+            if game_id in rebuilt:
+                self.game_boards[game_id] = rebuilt[game_id]
+            else:
+                del self.game_boards[game_id]
+
+    async def run_reconciler(self):
+        """
+        Background job: periodically reconciles the loaded boards so they cannot drift from the tables.
+        """
+        from app.core.database import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(settings.LEADERBOARD_RECONCILE_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.reconcile(db)
+            except Exception as e:
+                print(f"Leaderboard reconcile failed: {e}")
+
+
+leaderboards = LeaderboardRegistry()
@@ -0,0 +1,251 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.event_log import event_logs
+from app.core.game_cache import game_status
+from app.core.leaderboard import leaderboards
+from app.core.partitions import (
+    drop_pending_partitions, ensure_game_partitions, forget_game_partitions, schedule_partition_drop
+)
+from app.core.raster import rasters
+from app.core.write_batcher import write_batcher
+
+# Lobby -> active once start_time has passed, or once a game without a start_time is full.
+# end_time defaults to start_time + duration.
+# SKIP LOCKED lets several workers run the scheduler without double-starting a game.
+START_DUE_GAMES_SQL = text("""
+    UPDATE game_sessions g
+    SET status = 'active',
+        start_time = COALESCE(g.start_time, now() AT TIME ZONE 'utc'),
+        end_time = COALESCE(
+            g.end_time,
+            COALESCE(g.start_time, now() AT TIME ZONE 'utc') + make_interval(secs => :duration)
+        )
+    WHERE g.id IN (
+        SELECT s.id FROM game_sessions s
+        WHERE s.status = 'lobby'
+          AND (
+              s.start_time <= now() AT TIME ZONE 'utc'
+              OR (s.start_time IS NULL
+                  AND (SELECT count(*) FROM game_participants gp WHERE gp.game_id = s.id) >= s.max_players)
+          )
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING g.id
+""")
+
+# Active -> ended once end_time has passed.
+END_DUE_GAMES_SQL = text("""
+    UPDATE game_sessions g
+    SET status = 'ended'
+    WHERE g.id IN (
+        SELECT id FROM game_sessions
+        WHERE status = 'active' AND end_time <= now() AT TIME ZONE 'utc'
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING g.id
+""")
+
+# Final rankings by captured area, written for every participant in one statement.
+# Rank 1 splits the prize pool (payout itself happens on-chain via the Web3 manager).
+RECORD_GAME_HISTORY_SQL = text("""
+    WITH ranked AS (
+        SELECT gp.player_id,
+               COALESCE(t.area_sqm, 0.0) AS area,
+               rank() OVER (ORDER BY COALESCE(t.area_sqm, 0.0) DESC) AS rnk
+        FROM game_participants gp
+        LEFT JOIN player_territories t ON t.game_id = gp.game_id AND t.player_id = gp.player_id
+        WHERE gp.game_id = :gid
+    ),
+    winners AS (
+        SELECT count(*) AS n FROM ranked WHERE rnk = 1
+    )
+    INSERT INTO player_game_history (id, player_id, game_id, rank, area_captured, prize_won, played_at)
+    SELECT gen_random_uuid(), r.player_id, :gid, r.rnk, r.area,
+           CASE WHEN r.rnk = 1 THEN COALESCE(g.prize_pool, 0.0) / w.n ELSE 0.0 END,
+           now() AT TIME ZONE 'utc'
+    FROM ranked r
+    CROSS JOIN winners w
+    JOIN game_sessions g ON g.id = :gid
+    RETURNING player_id, rank, area_captured, prize_won
+""")
+
+# Rankings of a game ended by another worker
+FINAL_RANKINGS_SQL = text("""
+    SELECT player_id, rank, area_captured, prize_won FROM player_game_history WHERE game_id = :gid
+""")
+
+# Current status of the games a worker holds state for (NULL for a game that no longer exists)
+HELD_GAME_STATUS_SQL = text("""
+    SELECT u.id, g.status
+    FROM unnest(CAST(:gids AS uuid[])) AS u(id)
+    LEFT JOIN game_sessions g ON g.id = u.id
+""")
+
+
+async def start_due_games(db: AsyncSession) -> List[UUID]:
+    """
+    Move every lobby game whose start_time has passed to active.
+    """
+    result = await db.execute(START_DUE_GAMES_SQL, {"duration": settings.GAME_DEFAULT_DURATION_SECONDS})
+    started = [row.id for row in result]
+    for game_id in started:
+        await ensure_game_partitions(db, game_id)
+    await db.commit()
+    for game_id in started:
+        game_status.set(game_id, "active")
+    return started
+
+
+async def finalize_game(db: AsyncSession, game_id: UUID) -> List[dict]:
+    """
+    Bulk-write PlayerGameHistory for every participant inside the caller's transaction.
+    Returns the final rankings. Nothing outside the transaction is touched, so a failed
+    commit leaves the game to be ended again on the next poll (see release_game).
+    Raster territories must be persisted in the same transaction first.
+    """
+    return _rankings(await db.execute(RECORD_GAME_HISTORY_SQL, {"gid": game_id}))
+
+
+async def final_rankings(db: AsyncSession, game_id: UUID) -> List[dict]:
+    """The recorded rankings of an ended game."""
+    return _rankings(await db.execute(FINAL_RANKINGS_SQL, {"gid": game_id}))
+
+
+def _rankings(result) -> List[dict]:
+    rankings = [
+        {
+            "player_id": str(row.player_id),
+            "rank": row.rank,
+            "area": row.area_captured,
+            "prize": row.prize_won
+        }
+        for row in result
+    ]
+    rankings.sort(key=lambda r: r["rank"])
+    return rankings
+
+
+def release_game(game_id: UUID, status: Optional[str] = "ended"):
+    """
+    Free a finished game's per-worker state. Runs on the worker that ended the game once the
+    end is committed, and on every other worker once it sees the new status.
+    """
+    game_status.set(game_id, status)
+    write_batcher.drop_game(game_id)
+    event_logs.close(game_id)
+    rasters.drop(game_id)
+    leaderboards.drop_game(game_id)
+    forget_game_partitions(game_id)
+
+
+def held_games(manager) -> Set[UUID]:
+    """Games this worker holds per-game state for."""
+    games = manager.held_games()
+    games.update(write_batcher.pending, write_batcher.deferred)
+    games.update(event_logs.logs, rasters.games, leaderboards.game_boards)
+    return games
+
+
+async def finished_games(db: AsyncSession, game_ids: Iterable[UUID]) -> Dict[UUID, Optional[str]]:
+    """
+    game_id -> status of the given games that are no longer in the lobby or active: ended by
+    another worker, cancelled, or deleted (None).
+    """
+    game_ids = list(game_ids)
+    if not game_ids:
+        return {}
+    result = await db.execute(HELD_GAME_STATUS_SQL, {"gids": game_ids})
+    return {row.id: row.status for row in result if row.status not in ("lobby", "active")}
+
+
+async def end_due_games(db: AsyncSession) -> dict:
+    """
+    Move every active game whose end_time has passed to ended and finalize it.
+    Per-worker state is released after the commit and the game partitions are then
+    dropped in their own short transactions. Returns game_id -> rankings.
+    Other workers release their state for these games in finished_games' sweep.
+    """
+    result = await db.execute(END_DUE_GAMES_SQL)
+    ended = [row.id for row in result]
+
+    final = {}
+    persisted = {}
+    try:
+        for game_id in ended:
+            # Raster territories are persisted lazily; make sure the final shapes are in before ranking
+            persisted[game_id] = await rasters.persist(db, game_id)
+            final[game_id] = await finalize_game(db, game_id)
+        await db.commit()
+    except Exception:
+        # The games stay active; keep their shapes queued for the next attempt
+        for game_id, players in persisted.items():
+            rasters.restore_dirty(game_id, players)
+        raise
+    for game_id in ended:
+        release_game(game_id)
+        schedule_partition_drop(game_id)
+    await drop_pending_partitions(db)
+    return final
+
+
+async def run_lifecycle_loop():
+    """
+    Background job: drives games through lobby -> active -> ended and
+    notifies connected clients on this worker.
+    """
+    from app.core.database import AsyncSessionLocal
+    from app.api.ws.game import manager
+    from app.core.game_cache import game_detail_cache
+    from app.core.history import history_cache
+    from app.core.lobby import lobby_cache
+    from app.core.stats_aggregator import stats_aggregator
+
+    while True:
+        await asyncio.sleep(settings.LIFECYCLE_POLL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                started = await start_due_games(db)
+                ended = await end_due_games(db)
+                # Games this worker still holds state for that were ended elsewhere, cancelled or deleted
+                finished = await finished_games(db, held_games(manager) - set(ended))
+                for game_id, status in finished.items():
+                    release_game(game_id, status)
+                if started or ended or finished:
+                    # Games left the lobby
+                    lobby_cache.invalidate()
+                for game_id in started:
+                    game_detail_cache.invalidate(game_id)
+                for game_id in list(ended) + list(finished):
+                    game_detail_cache.drop(game_id)
+                for rankings in ended.values():
+                    stats_aggregator.record_game(rankings)
+                    for ranking in rankings:
+                        history_cache.invalidate(UUID(ranking["player_id"]))
+
+                for game_id in started:
+                    await manager.broadcast({"type": "game_started", "game_id": str(game_id)}, game_id)
+
+                for game_id, rankings in ended.items():
+                    await manager.broadcast({
+                        "type": "game_ended",
+                        "game_id": str(game_id),
+                        "rankings": rankings
+                    }, game_id)
+                    manager.finish_game(game_id)
+
+                for game_id, status in finished.items():
+                    if status == "ended" and game_id in manager.active_connections:
+                        await manager.broadcast({
+                            "type": "game_ended",
+                            "game_id": str(game_id),
+                            "rankings": await final_rankings(db, game_id)
+                        }, game_id)
+                    manager.finish_game(game_id)
+        except Exception as e:
+            print(f"Game lifecycle update failed: {e}")
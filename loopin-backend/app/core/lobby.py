@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.schemas.game import GameResponse
+
+# Lobby read model.
+#
+# A page of lobby games is read with its participant counts in one statement, ordered by
+# (start time, id) so pages are keyset cursors rather than offsets. Games without a start
+# time sort last. Rendered pages are cached for a short TTL together with their ETag, so
+# clients polling the lobby are answered without touching Postgres; joins and status
+# changes on this worker drop the cache straight away.
+
+LOBBY_PAGE_SQL = text("""
+    WITH page AS (
+        SELECT g.id, g.status, g.start_time, g.end_time, g.max_players, g.entry_fee, g.prize_pool,
+               COALESCE(g.start_time, 'infinity'::timestamp) AS sort_time
+        FROM game_sessions g
+        WHERE g.status = 'lobby'
+          AND (COALESCE(g.start_time, 'infinity'::timestamp), g.id) > (CAST(CAST(:after_time AS text) AS timestamp), CAST(:after_id AS uuid))
+        ORDER BY COALESCE(g.start_time, 'infinity'::timestamp), g.id
+        LIMIT :limit
+    )
+    SELECT page.id, page.status, page.start_time, page.end_time, page.max_players,
+           page.entry_fee, page.prize_pool, page.sort_time,
+           count(gp.player_id) AS player_count
+    FROM page
+    LEFT JOIN game_participants gp ON gp.game_id = page.id
+    GROUP BY page.id, page.status, page.start_time, page.end_time, page.max_players,
+             page.entry_fee, page.prize_pool, page.sort_time
+    ORDER BY page.sort_time, page.id
+""")
+
+FIRST_CURSOR = ("-infinity", UUID(int=0))
+MAX_CACHED_PAGES = 256
+
+_games_adapter = TypeAdapter(List[GameResponse])
+
+
+def encode_cursor(sort_time: datetime, game_id: UUID) -> str:
+    raw = json.dumps([sort_time.isoformat() if sort_time != datetime.max else "infinity", str(game_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[str, UUID]:
+    """(sort time, game id) to continue after; raises ValueError on a malformed cursor."""
+    if not cursor:
+        return FIRST_CURSOR
+    try:
+        sort_time, game_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_time, UUID(game_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+class LobbyPage:
+    __slots__ = ("body", "etag", "next_cursor", "expires_at")
+
+    def __init__(self, body: bytes, next_cursor: Optional[str]):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.next_cursor = next_cursor
+        self.expires_at = time.monotonic() + settings.LOBBY_CACHE_TTL_SECONDS
+
+
+class LobbyCache:
+    """
+    Per-worker cache of rendered lobby pages keyed by (cursor, limit).
+    """
+    def __init__(self):
+        # (cursor, limit) -> page, least recently used first
+        self.pages: "OrderedDict[Tuple[Optional[str], int], LobbyPage]" = OrderedDict()
+
+    def get(self, cursor: Optional[str], limit: int) -> Optional[LobbyPage]:
+        page = self.pages.get((cursor, limit))
+        if page is None or page.expires_at < time.monotonic():
+            return None
+        self.pages.move_to_end((cursor, limit))
+        return page
+
+    async def load(self, db: AsyncSession, cursor: Optional[str], limit: int) -> LobbyPage:
+        after_time, after_id = decode_cursor(cursor)
+        result = await db.execute(LOBBY_PAGE_SQL, {
+            "after_time": after_time,
+            "after_id": after_id,
+            # One extra row tells whether there is a next page
+            "limit": limit + 1,
+        })
+        rows = result.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].sort_time, rows[-1].id)
+
+        games = [GameResponse.model_validate(dict(row._mapping)) for row in rows]
+        page = LobbyPage(_games_adapter.dump_json(games), next_cursor)
+        self.pages[(cursor, limit)] = page
+        self.pages.move_to_end((cursor, limit))
+        self._prune()
+        return page
+
+    def _prune(self):
+        if len(self.pages) <= MAX_CACHED_PAGES:
+            return
+        now = time.monotonic()
+        for key in [key for key, cached in self.pages.items() if cached.expires_at < now]:
+            del self.pages[key]
+        # Still over the cap with live pages: evict the least recently used
+        while len(self.pages) > MAX_CACHED_PAGES:
+            self.pages.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached page (a join or status change alters counts or membership)."""
+        self.pages.clear()
+
+
+lobby_cache = LobbyCache()
@@ -0,0 +1,151 @@
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.core.projection import frame_for_point
+
+# Level-of-detail tiers for territory and trail geometry in state frames.
+# Each tier is (simplification tolerance in metres, coordinate decimals).
+# Tier 0 is full detail and is only sent near the viewer.
+LOD_TIERS = [
+    (0.0, 7),   # full detail, ~1cm precision
+    (1.0, 6),
+    (5.0, 5),
+    (20.0, 5),
+]
+
+# Max observer distance (metres) served at tiers 0..n-1; anything further gets the last tier
+LOD_DISTANCE_THRESHOLDS_M = [250.0, 1000.0, 4000.0]
+
+# Min client map zoom for tiers 0..n-1; anything lower gets the last tier
+LOD_ZOOM_THRESHOLDS = [17, 15, 13]
+
+Point = Tuple[float, float]  # (lng, lat), GeoJSON order
+
+
+def simplify(points: List[Point], tolerance: float) -> List[Point]:
+    """
+    Douglas-Peucker simplification with a tolerance in metres, measured in the
+    local metric frame of the first point's sector.
+    Endpoints are always kept, so closed rings stay closed.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+
+    originals = points
+    points = frame_for_point(points[0][1], points[0][0]).project_points(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        ax, ay = points[start]
+        bx, by = points[end]
+        dx, dy = bx - ax, by - ay
+        seg_len = math.hypot(dx, dy)
+
+        max_dist = 0.0
+        max_idx = start
+        for i in range(start + 1, end):
+            px, py = points[i]
+            if seg_len == 0:
+                dist = math.hypot(px - ax, py - ay)
+            else:
+                dist = abs(dy * px - dx * py + bx * ay - by * ax) / seg_len
+            if dist > max_dist:
+                max_dist = dist
+                max_idx = i
+
+        if max_dist > tolerance:
+            keep[max_idx] = True
+            stack.append((start, max_idx))
+            stack.append((max_idx, end))
+
+    return [p for p, k in zip(originals, keep) if k]
+
+
+def bounding_box(points: List[Point]) -> Optional[Tuple[float, float, float, float]]:
+    """Returns (min_lng, min_lat, max_lng, max_lat) or None for an empty list."""
+    if not points:
+        return None
+    lngs = [p[0] for p in points]
+    lats = [p[1] for p in points]
+    return min(lngs), min(lats), max(lngs), max(lats)
+
+
+def distance_to_bbox_m(lat: float, lng: float, bbox: Optional[Tuple[float, float, float, float]]) -> float:
+    """
+    Approximate distance in metres from a point to a bounding box (0 if inside).
+    """
+    if bbox is None:
+        return math.inf
+    min_lng, min_lat, max_lng, max_lat = bbox
+    d_lng = max(min_lng - lng, 0.0, lng - max_lng)
+    d_lat = max(min_lat - lat, 0.0, lat - max_lat)
+    frame = frame_for_point(lat, lng)
+    return math.hypot(d_lat * frame.m_per_deg_lat, d_lng * frame.m_per_deg_lng)
+
+
+def tier_for_distance(distance_m: float) -> int:
+    for tier, limit in enumerate(LOD_DISTANCE_THRESHOLDS_M):
+        if distance_m <= limit:
+            return tier
+    return len(LOD_TIERS) - 1
+
+
+def tier_for_zoom(zoom: Optional[float]) -> int:
+    if zoom is None:
+        return 0
+    for tier, min_zoom in enumerate(LOD_ZOOM_THRESHOLDS):
+        if zoom >= min_zoom:
+            return tier
+    return len(LOD_TIERS) - 1
+
+
+def select_tier(distance_m: float, zoom: Optional[float] = None) -> int:
+    """
+    Picks the LOD tier for a geometry: the coarser of the distance tier and
+    the tier implied by the client's declared zoom level.
+    """
+    return max(tier_for_distance(distance_m), tier_for_zoom(zoom))
+
+
+class LodCache:
+    """
+    Caches pre-simplified tiers of a geometry keyed by an identifier and a version.
+    A geometry is re-simplified only when its version changes.
+    """
+    def __init__(self):
+        # key -> (version, bbox, [points per tier])
+        self._entries: Dict[Hashable, Tuple[Hashable, Optional[tuple], List[List[Point]]]] = {}
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Tuple[Optional[tuple], List[List[Point]]]]:
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            return entry[1], entry[2]
+        return None
+
+    def put(self, key: Hashable, version: Hashable, points: List[Point]) -> Tuple[Optional[tuple], List[List[Point]]]:
+        tiers = []
+        for tolerance, decimals in LOD_TIERS:
+            simplified = simplify(points, tolerance)
+            tiers.append([(round(x, decimals), round(y, decimals)) for x, y in simplified])
+        bbox = bounding_box(points)
+        self._entries[key] = (version, bbox, tiers)
+        return bbox, tiers
+
+    def get_or_build(self, key: Hashable, version: Hashable, points: List[Point]) -> Tuple[Optional[tuple], List[List[Point]]]:
+        cached = self.get(key, version)
+        if cached is not None:
+            return cached
+        return self.put(key, version, points)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def retain(self, keys):
+        """Drops cached entries whose key is not in keys."""
+        keys = set(keys)
+        for key in [k for k in self._entries if k not in keys]:
+            del self._entries[key]
@@ -0,0 +1,85 @@
+from typing import Set
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Geometry tables LIST-partitioned by game_id (see app/models/player.py)
+GAME_PARTITIONED_TABLES = ["player_trails", "player_territories", "player_territory_tiles"]
+
+# Games whose partitions this worker has already created
+_known_partitions: Set[UUID] = set()
+# Ended games whose partitions this worker still has to drop
+_pending_drops: Set[UUID] = set()
+
+
+def partition_name(table: str, game_id: UUID) -> str:
+    return f"{table}_g_{game_id.hex}"
+
+
+async def ensure_game_partitions(db: AsyncSession, game_id: UUID):
+    """
+    Create the per-game partitions of every geometry table (idempotent).
+    Hot-path queries filtered by game_id then only touch this game's small partition.
+    """
+    if game_id in _known_partitions:
+        return
+
+    for table in GAME_PARTITIONED_TABLES:
+        # game_id is a UUID, so inlining it as a literal is safe; DDL cannot take bind params
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, game_id)} "
+            f"PARTITION OF {table} FOR VALUES IN ('{game_id}')"
+        ))
+
+    _known_partitions.add(game_id)
+
+
+async def drop_game_partitions(db: AsyncSession, game_id: UUID):
+    """
+    Detach and drop a finished game's partitions. Call with no transaction open on db.
+
+    DETACH takes an ACCESS EXCLUSIVE lock on the parent table (CONCURRENTLY is not allowed while
+    a DEFAULT partition exists), so each table is detached in its own short transaction under
+    PARTITION_DETACH_LOCK_TIMEOUT_MS: the lock is held only for the catalog update, and a detach
+    stuck behind a long query gives up instead of queueing every game's writes behind it.
+    Raises on a lock timeout; tables already handled are skipped when it is retried.
+    """
+    for table in GAME_PARTITIONED_TABLES:
+        name = partition_name(table, game_id)
+        try:
+            await db.execute(text(f"SET LOCAL lock_timeout = {int(settings.PARTITION_DETACH_LOCK_TIMEOUT_MS)}"))
+            exists = await db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+            if exists.scalar():
+                await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                await db.execute(text(f"DROP TABLE {name}"))
+            # Rows written before the partition existed live in the DEFAULT partition
+            await db.execute(text(f"DELETE FROM {table} WHERE game_id = :gid"), {"gid": game_id})
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    _known_partitions.discard(game_id)
+    _pending_drops.discard(game_id)
+
+
+def forget_game_partitions(game_id: UUID):
+    """Stop tracking a finished game's partitions on this worker (they are dropped elsewhere)."""
+    _known_partitions.discard(game_id)
+
+
+def schedule_partition_drop(game_id: UUID):
+    """Queue an ended game's partitions for drop_pending_partitions."""
+    _pending_drops.add(game_id)
+
+
+async def drop_pending_partitions(db: AsyncSession):
+    """Drop the partitions of every queued game; a game whose detach fails stays queued."""
+    for game_id in list(_pending_drops):
+        try:
+            await drop_game_partitions(db, game_id)
+        except Exception as e:
+            print(f"Dropping partitions of game {game_id} failed, will retry: {e}")
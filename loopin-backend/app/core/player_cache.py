@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.player import Player
+
+# Read-through cache of player profiles.
+#
+# Entries are detached snapshots of a Player and its PlayerStats (never live ORM objects),
+# held in a bounded LRU with a TTL and reachable by both player id and wallet address.
+# Concurrent misses for the same key share one query. Writers call invalidate() after
+# committing; entries written on another worker are refreshed when they expire.
+
+STATS_FIELDS = (
+    "total_area", "games_played", "games_won", "total_earnings", "longest_trail",
+    "biggest_loop", "current_streak", "last_daily_reward_claimed_at",
+)
+
+
+class StatsSnapshot:
+    __slots__ = STATS_FIELDS
+
+    def __init__(self, stats):
+        for field in STATS_FIELDS:
+            setattr(self, field, getattr(stats, field))
+
+
+class PlayerSnapshot:
+    __slots__ = ("id", "wallet_address", "username", "avatar_seed", "level", "joined_at", "stats", "expires_at")
+
+    def __init__(self, player: Player):
+        self.id: UUID = player.id
+        self.wallet_address: str = player.wallet_address
+        self.username: Optional[str] = player.username
+        self.avatar_seed: Optional[str] = player.avatar_seed
+        self.level: int = player.level
+        self.joined_at: datetime = player.joined_at
+        self.stats: Optional[StatsSnapshot] = StatsSnapshot(player.stats) if player.stats else None
+        self.expires_at = time.monotonic() + settings.PLAYER_CACHE_TTL_SECONDS
+
+
+class PlayerCache:
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.PLAYER_CACHE_MAX_ENTRIES
+        self.entries: "OrderedDict[UUID, PlayerSnapshot]" = OrderedDict()
+        self.by_wallet: Dict[str, UUID] = {}
+        # ("id" | "wallet", key) -> load in flight
+        self._inflight: Dict[Tuple[str, object], asyncio.Future] = {}
+
+    def _lookup(self, player_id: Optional[UUID]) -> Optional[PlayerSnapshot]:
+        if player_id is None:
+            return None
+        snapshot = self.entries.get(player_id)
+        if snapshot is None:
+            return None
+        if snapshot.expires_at < time.monotonic():
+            self._evict(player_id)
+            return None
+        self.entries.move_to_end(player_id)
+        return snapshot
+
+    def _store(self, snapshot: PlayerSnapshot):
+        self._evict(snapshot.id)
+        self.entries[snapshot.id] = snapshot
+        self.by_wallet[snapshot.wallet_address] = snapshot.id
+        while len(self.entries) > self.max_entries:
+            oldest = next(iter(self.entries))
+            self._evict(oldest)
+
+    def _evict(self, player_id: UUID):
+        snapshot = self.entries.pop(player_id, None)
+        if snapshot is not None and self.by_wallet.get(snapshot.wallet_address) == player_id:
+            del self.by_wallet[snapshot.wallet_address]
+
+    async def _load(self, db: AsyncSession, kind: str, key) -> Optional[PlayerSnapshot]:
+        """Run one query per key however many callers miss on it at the same time."""
+        inflight = self._inflight.get((kind, key))
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leading caller was cancelled mid-query: run the query ourselves.
+                # (When this caller is the one cancelled, the shielded future is still pending.)
+                if inflight.cancelled():
+                    return await self._load(db, kind, key)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(kind, key)] = future
+        try:
+            column = Player.id if kind == "id" else Player.wallet_address
+            result = await db.execute(select(Player).options(selectinload(Player.stats)).where(column == key))
+            player = result.scalar_one_or_none()
+            snapshot = PlayerSnapshot(player) if player else None
+            if snapshot is not None:
+                self._store(snapshot)
+            future.set_result(snapshot)
+            return snapshot
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            # Cancellation (a BaseException) skips the handler above; never leave followers waiting
+            if not future.done():
+                future.cancel()
+            del self._inflight[(kind, key)]
+
+    async def get_by_id(self, db: AsyncSession, player_id: UUID) -> Optional[PlayerSnapshot]:
+        return self._lookup(player_id) or await self._load(db, "id", player_id)
+
+    async def get_by_wallet(self, db: AsyncSession, wallet_address: str) -> Optional[PlayerSnapshot]:
+        return self._lookup(self.by_wallet.get(wallet_address)) or await self._load(db, "wallet", wallet_address)
+
+    def invalidate(self, player_id: Optional[UUID] = None, wallet_address: Optional[str] = None):
+        """Drop a player's snapshot after a write to the player or their stats."""
+        if player_id is None and wallet_address is not None:
+            player_id = self.by_wallet.get(wallet_address)
+        if player_id is not None:
+            self._evict(player_id)
+
+
+player_cache = PlayerCache()
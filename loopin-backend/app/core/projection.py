@@ -0,0 +1,96 @@
+import math
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index
+
+try:
+    import numpy as np
+except ImportError:  # optional: plain lists are used without it
+    np = None
+
+# Local metric frames per unified_grid sector.
+#
+# Each sector gets an equirectangular frame centred on the sector: x grows east and y north,
+# both in metres. Over one sector (about 1km) the error against the ellipsoid is far below
+# GPS noise, so buffering, intersections, areas and distances can all be done in plain
+# planar metres. The same frame is available to PostGIS as a proj string, so SQL and
+# Python agree on the projection.
+
+EARTH_RADIUS_M = 6371008.8  # mean radius, matching +R in the proj string
+METERS_PER_DEG = math.radians(EARTH_RADIUS_M)  # ~111195m per degree of latitude
+
+Cell = Tuple[int, int]
+
+
+class LocalFrame:
+    """
+    Equirectangular projection around (origin_lat, origin_lng), in metres.
+    to_local/to_lnglat accept scalars, sequences or numpy arrays.
+    """
+    __slots__ = ("origin_lat", "origin_lng", "m_per_deg_lat", "m_per_deg_lng")
+
+    def __init__(self, origin_lat: float, origin_lng: float):
+        self.origin_lat = origin_lat
+        self.origin_lng = origin_lng
+        self.m_per_deg_lat = METERS_PER_DEG
+        self.m_per_deg_lng = METERS_PER_DEG * math.cos(math.radians(origin_lat))
+
+    def to_local(self, lngs, lats):
+        """(x, y) in metres for lng/lat values."""
+        if np is not None and not isinstance(lngs, (int, float)):
+            lngs = np.asarray(lngs, dtype=np.float64)
+            lats = np.asarray(lats, dtype=np.float64)
+        elif not isinstance(lngs, (int, float)):
+            return (
+                [(lng - self.origin_lng) * self.m_per_deg_lng for lng in lngs],
+                [(lat - self.origin_lat) * self.m_per_deg_lat for lat in lats],
+            )
+        return (lngs - self.origin_lng) * self.m_per_deg_lng, (lats - self.origin_lat) * self.m_per_deg_lat
+
+    def to_lnglat(self, xs, ys):
+        """(lng, lat) for local x/y values in metres."""
+        if np is not None and not isinstance(xs, (int, float)):
+            xs = np.asarray(xs, dtype=np.float64)
+            ys = np.asarray(ys, dtype=np.float64)
+        elif not isinstance(xs, (int, float)):
+            return (
+                [self.origin_lng + x / self.m_per_deg_lng for x in xs],
+                [self.origin_lat + y / self.m_per_deg_lat for y in ys],
+            )
+        return self.origin_lng + xs / self.m_per_deg_lng, self.origin_lat + ys / self.m_per_deg_lat
+
+    def project_points(self, points: Sequence[Tuple[float, float]]) -> list:
+        """[(x, y)] in metres for a list of (lng, lat) points."""
+        if not points:
+            return []
+        lngs, lats = zip(*points)
+        xs, ys = self.to_local(lngs, lats)
+        return list(zip(list(xs), list(ys)))
+
+    def proj4(self) -> str:
+        """The same frame as a proj string, for ST_Transform in PostGIS."""
+        return (
+            f"+proj=eqc +lat_ts={self.origin_lat} +lat_0={self.origin_lat} +lon_0={self.origin_lng} "
+            f"+x_0=0 +y_0=0 +R={EARTH_RADIUS_M} +units=m +no_defs"
+        )
+
+
+@lru_cache(maxsize=4096)
+def frame_for_sector(index: Cell) -> LocalFrame:
+    """Cached local frame centred on the sector with the given (x, y) index."""
+    sector_x, sector_y = index
+    return LocalFrame((sector_y + 0.5) * SECTOR_SIZE_DEG, (sector_x + 0.5) * SECTOR_SIZE_DEG)
+
+
+def frame_for_point(lat: float, lng: float) -> LocalFrame:
+    """Local frame of the sector containing (lat, lng)."""
+    return frame_for_sector(get_sector_index(lat, lng))
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Planar distance in metres between two nearby points, in the first point's sector frame."""
+    frame = frame_for_point(lat1, lng1)
+    dx = (lng2 - lng1) * frame.m_per_deg_lng
+    dy = (lat2 - lat1) * frame.m_per_deg_lat
+    return math.hypot(dx, dy)
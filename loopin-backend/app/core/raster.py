@@ -0,0 +1,505 @@
+import asyncio
+import json
+import math
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.geometry_pool import geometry_pool
+from app.core.projection import METERS_PER_DEG, frame_for_sector
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index
+
+try:
+    import numpy as np
+except ImportError:  # optional: only needed with TERRITORY_RASTER_ENABLED
+    np = None
+
+# Raster ownership model.
+#
+# Each unified_grid sector touched by a game gets a compact uint16 grid of owner indexes
+# (0 = unowned) at roughly TERRITORY_RASTER_CELL_M per cell. Rows follow latitude and columns
+# longitude, and each sector is split into a whole number of cells so sectors tile exactly.
+#   - point-in-territory is a single array lookup
+#   - captures are even-odd scanline fills, banks stamp the trail corridor
+#   - area is a running sum per owner, and taking cells from another player updates both sides
+# Polygons are only produced (lazily, by vectorize) for rendering and persistence.
+# The async variants run the mask and vectorization work on the geometry process pool.
+
+Cell = Tuple[int, int]
+Point = Tuple[float, float]  # (lng, lat), GeoJSON order
+
+NO_OWNER = 0
+
+TRAIL_GEOJSON_SQL = text("""
+    SELECT ST_AsGeoJSON(trail::geometry) FROM player_trails WHERE game_id = :gid AND player_id = :pid
+""")
+
+TERRITORIES_GEOJSON_SQL = text("""
+    SELECT player_id, ST_AsGeoJSON(territory::geometry) FROM player_territories WHERE game_id = :gid
+""")
+
+# Persist a vectorized raster territory. The row-run rectangles are dissolved by PostGIS;
+# the area is the raster's own running count.
+REPLACE_TERRITORY_SQL = text("""
+    INSERT INTO player_territories (id, game_id, player_id, territory, area_sqm, version)
+    SELECT gen_random_uuid(), :gid, :pid, ST_Multi(ST_UnaryUnion(ST_GeomFromText(:wkt, 4326)))::geography, :area, 1
+    ON CONFLICT (game_id, player_id) DO UPDATE
+    SET territory = EXCLUDED.territory,
+        area_sqm = EXCLUDED.area_sqm,
+        version = player_territories.version + 1
+""")
+
+DELETE_TERRITORY_SQL = text("""
+    WITH tiles AS (
+        DELETE FROM player_territory_tiles WHERE game_id = :gid AND player_id = :pid
+    )
+    DELETE FROM player_territories WHERE game_id = :gid AND player_id = :pid
+""")
+
+
+class SectorRaster:
+    """
+    Owner grid of one sector. Cell (row, col) covers
+    lat in base_lat + [row, row + 1) * SECTOR_SIZE_DEG / rows, and likewise for lng and cols.
+    """
+    def __init__(self, index: Cell, cell_m: float, with_owners: bool = True):
+        self.index = index
+        sector_x, sector_y = index
+        self.base_lng = sector_x * SECTOR_SIZE_DEG
+        self.base_lat = sector_y * SECTOR_SIZE_DEG
+        frame = frame_for_sector(index)
+        height_m = SECTOR_SIZE_DEG * frame.m_per_deg_lat
+        width_m = SECTOR_SIZE_DEG * frame.m_per_deg_lng
+        self.rows = max(1, round(height_m / cell_m))
+        self.cols = max(1, round(width_m / cell_m))
+        self.cell_h = height_m / self.rows
+        self.cell_w = width_m / self.cols
+        self.cell_area = self.cell_h * self.cell_w
+        # Pool workers only need the cell layout, not a grid of their own
+        self.owners = np.zeros((self.rows, self.cols), dtype=np.uint16) if with_owners else None
+
+    def to_grid(self, lngs, lats):
+        """Fractional (col, row) grid coordinates of lng/lat arrays."""
+        u = (np.asarray(lngs, dtype=np.float64) - self.base_lng) / SECTOR_SIZE_DEG * self.cols
+        v = (np.asarray(lats, dtype=np.float64) - self.base_lat) / SECTOR_SIZE_DEG * self.rows
+        return u, v
+
+    def cell_of(self, lat: float, lng: float) -> Cell:
+        col = int((lng - self.base_lng) / SECTOR_SIZE_DEG * self.cols)
+        row = int((lat - self.base_lat) / SECTOR_SIZE_DEG * self.rows)
+        return min(max(row, 0), self.rows - 1), min(max(col, 0), self.cols - 1)
+
+    def fill_mask(self, rings: Sequence[Sequence[Point]]):
+        """
+        Boolean mask of the cells whose centres fall inside the rings (even-odd rule,
+        so holes and self-overlapping loops behave like polygon interiors).
+        """
+        mask = np.zeros((self.rows, self.cols), dtype=bool)
+        u0s, v0s, u1s, v1s = [], [], [], []
+        for ring in rings:
+            if len(ring) < 3:
+                continue
+            ring = np.asarray(ring, dtype=np.float64)
+            u, v = self.to_grid(ring[:, 0], ring[:, 1])
+            # Close the ring implicitly
+            u0s.append(u)
+            v0s.append(v)
+            u1s.append(np.roll(u, -1))
+            v1s.append(np.roll(v, -1))
+        if not u0s:
+            return mask
+
+        u0, v0, u1, v1 = (np.concatenate(a) for a in (u0s, v0s, u1s, v1s))
+        crossing = v0 != v1
+        u0, v0, u1, v1 = u0[crossing], v0[crossing], u1[crossing], v1[crossing]
+        if not len(u0):
+            return mask
+
+        row_lo = max(0, int(math.floor(min(v0.min(), v1.min()))))
+        row_hi = min(self.rows - 1, int(math.ceil(max(v0.max(), v1.max()))))
+        if row_lo > row_hi:
+            return mask
+
+        # Crossings of every edge with every row centre, as one (rows x edges) pass
+        centres = np.arange(row_lo, row_hi + 1, dtype=np.float64)[:, None] + 0.5
+        vmin, vmax = np.minimum(v0, v1), np.maximum(v0, v1)
+        hits = (centres >= vmin) & (centres < vmax)
+        xs = u0 + (centres - v0) * (u1 - u0) / (v1 - v0)
+
+        for offset in np.nonzero(hits.any(axis=1))[0]:
+            row_xs = np.sort(xs[offset][hits[offset]])
+            # Cells whose centre c + 0.5 lies in [start, end)
+            starts = np.clip(np.ceil(row_xs[0::2] - 0.5), 0, self.cols).astype(int)
+            ends = np.clip(np.ceil(row_xs[1::2] - 0.5), 0, self.cols).astype(int)
+            row = row_lo + offset
+            for start, end in zip(starts, ends):
+                if end > start:
+                    mask[row, start:end] = True
+        return mask
+
+    def corridor_mask(self, points: Sequence[Point], half_width_m: float):
+        """Boolean mask of the cells whose centres are within half_width_m of the polyline."""
+        mask = np.zeros((self.rows, self.cols), dtype=bool)
+        if not len(points):
+            return mask
+        points = np.asarray(points, dtype=np.float64)
+        u, v = self.to_grid(points[:, 0], points[:, 1])
+        # Work in metres so the corridor is round regardless of cell aspect
+        xs, ys = u * self.cell_w, v * self.cell_h
+        if len(xs) == 1:
+            xs, ys = np.append(xs, xs), np.append(ys, ys)
+
+        for i in range(len(xs) - 1):
+            ax, ay, bx, by = xs[i], ys[i], xs[i + 1], ys[i + 1]
+            c0 = max(0, int((min(ax, bx) - half_width_m) / self.cell_w))
+            c1 = min(self.cols, int((max(ax, bx) + half_width_m) / self.cell_w) + 1)
+            r0 = max(0, int((min(ay, by) - half_width_m) / self.cell_h))
+            r1 = min(self.rows, int((max(ay, by) + half_width_m) / self.cell_h) + 1)
+            if c0 >= c1 or r0 >= r1:
+                continue
+
+            cx = (np.arange(c0, c1) + 0.5) * self.cell_w
+            cy = (np.arange(r0, r1) + 0.5) * self.cell_h
+            px, py = np.meshgrid(cx, cy)
+            dx, dy = bx - ax, by - ay
+            seg_len2 = dx * dx + dy * dy
+            if seg_len2 == 0:
+                t = np.zeros_like(px)
+            else:
+                t = np.clip(((px - ax) * dx + (py - ay) * dy) / seg_len2, 0.0, 1.0)
+            dist2 = (px - (ax + t * dx)) ** 2 + (py - (ay + t * dy)) ** 2
+            mask[r0:r1, c0:c1] |= dist2 <= half_width_m * half_width_m
+        return mask
+
+    def unpack(self, packed):
+        """Mask returned by a pool job (np.packbits) back to a boolean grid."""
+        return np.unpackbits(packed, count=self.rows * self.cols).reshape(self.rows, self.cols).astype(bool)
+
+    def runs(self, owner: int) -> List[Tuple[int, int, int, int]]:
+        return owner_runs(self.owners, owner)
+
+
+def owner_runs(owners, owner: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Owned cells as rectangles (row0, row1, col0, col1), end-exclusive.
+    A run continues the identical run of the row above, so solid areas become one rectangle.
+    """
+    owned = (owners == owner).astype(np.int8)
+    edges = np.diff(np.pad(owned, ((0, 0), (1, 1))), axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+
+    rects = []
+    active: Dict[Tuple[int, int], int] = {}  # runs of the previous row -> first row
+    prev_row = None
+    for row, group in groupby(zip(start_rows.tolist(), start_cols.tolist(), end_cols.tolist()), key=itemgetter(0)):
+        current = {}
+        for _, col0, col1 in group:
+            first = active.pop((col0, col1), None) if prev_row == row - 1 else None
+            current[(col0, col1)] = row if first is None else first
+        # Runs of the previous row that did not continue are finished
+        for (col0, col1), first in active.items():
+            rects.append((first, prev_row + 1, col0, col1))
+        active, prev_row = current, row
+    for (col0, col1), first in active.items():
+        rects.append((first, prev_row + 1, col0, col1))
+    return rects
+
+
+class GameRaster:
+    """
+    Raster ownership of one game across all sectors it touched.
+    """
+    def __init__(self, cell_m: Optional[float] = None):
+        if np is None:
+            raise RuntimeError("TERRITORY_RASTER_ENABLED requires numpy")
+        self.cell_m = cell_m or settings.TERRITORY_RASTER_CELL_M
+        self.sectors: Dict[Cell, SectorRaster] = {}
+        # Owner indexes are small ints so grids stay uint16; index 0 means unowned
+        self.owner_index: Dict[UUID, int] = {}
+        self.owner_ids: List[Optional[UUID]] = [None]
+        self.area: Dict[int, float] = {}
+        # Players whose persisted polygon is behind the raster
+        self.dirty: Set[UUID] = set()
+
+    def _owner(self, player_id: UUID) -> int:
+        index = self.owner_index.get(player_id)
+        if index is None:
+            index = len(self.owner_ids)
+            self.owner_index[player_id] = index
+            self.owner_ids.append(player_id)
+        return index
+
+    def _sector(self, index: Cell) -> SectorRaster:
+        sector = self.sectors.get(index)
+        if sector is None:
+            sector = self.sectors[index] = SectorRaster(index, self.cell_m)
+        return sector
+
+    def _sectors_for(self, points: Iterable[Point], pad_deg: float = 0.0) -> List[SectorRaster]:
+        points = list(points)
+        if not points:
+            return []
+        lngs, lats = zip(*points)
+        x0, y0 = get_sector_index(min(lats) - pad_deg, min(lngs) - pad_deg)
+        x1, y1 = get_sector_index(max(lats) + pad_deg, max(lngs) + pad_deg)
+        return [self._sector((x, y)) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def owner_at(self, lat: float, lng: float) -> Optional[UUID]:
+        sector = self.sectors.get(get_sector_index(lat, lng))
+        if sector is None:
+            return None
+        return self.owner_ids[sector.owners[sector.cell_of(lat, lng)]]
+
+    def contains(self, player_id: UUID, lat: float, lng: float) -> bool:
+        index = self.owner_index.get(player_id)
+        if index is None:
+            return False
+        sector = self.sectors.get(get_sector_index(lat, lng))
+        return sector is not None and sector.owners[sector.cell_of(lat, lng)] == index
+
+    def area_of(self, player_id: UUID) -> float:
+        index = self.owner_index.get(player_id)
+        return self.area.get(index, 0.0) if index is not None else 0.0
+
+    def _assign(self, sector: SectorRaster, mask, owner: int) -> Dict[UUID, float]:
+        """Give the masked cells to owner, keeping every owner's running area. Returns area taken per previous owner."""
+        previous = sector.owners[mask]
+        if not len(previous):
+            return {}
+        ids, counts = np.unique(previous, return_counts=True)
+        taken = {}
+        for prev, count in zip(ids.tolist(), counts.tolist()):
+            if prev == owner:
+                continue
+            area = count * sector.cell_area
+            self.area[owner] = self.area.get(owner, 0.0) + area
+            if prev != NO_OWNER:
+                self.area[prev] = self.area.get(prev, 0.0) - area
+                taken[self.owner_ids[prev]] = taken.get(self.owner_ids[prev], 0.0) + area
+        sector.owners[mask] = owner
+        return taken
+
+    def _apply(self, player_id: UUID, masks) -> Dict[UUID, float]:
+        owner = self._owner(player_id)
+        stolen: Dict[UUID, float] = {}
+        for sector, mask in masks:
+            for victim, area in self._assign(sector, mask, owner).items():
+                stolen[victim] = stolen.get(victim, 0.0) + area
+        self.dirty.add(player_id)
+        self.dirty.update(stolen)
+        return stolen
+
+    def fill_polygon(self, player_id: UUID, rings: Sequence[Sequence[Point]]) -> Dict[UUID, float]:
+        """
+        Capture the area enclosed by rings (even-odd). Returns the area taken from each other player.
+        """
+        rings = [ring for ring in rings if len(ring) >= 3]
+        sectors = self._sectors_for(point for ring in rings for point in ring)
+        return self._apply(player_id, ((sector, sector.fill_mask(rings)) for sector in sectors))
+
+    def stamp_corridor(self, player_id: UUID, points: Sequence[Point], half_width_m: float) -> Dict[UUID, float]:
+        """
+        Bank the corridor half_width_m around a trail. Returns the area taken from each other player.
+        """
+        pad_deg = half_width_m / METERS_PER_DEG * 2
+        sectors = self._sectors_for(points, pad_deg)
+        return self._apply(player_id, ((sector, sector.corridor_mask(points, half_width_m)) for sector in sectors))
+
+    async def fill_polygon_async(self, player_id: UUID, rings: Sequence[Sequence[Point]]) -> Dict[UUID, float]:
+        """fill_polygon with the per-sector masks computed on the geometry pool."""
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if not rings:
+            return {}
+        sectors = self._sectors_for(point for ring in rings for point in ring)
+        coords = np.asarray([point for ring in rings for point in ring], dtype=np.float64)
+        ring_ends = np.cumsum([len(ring) for ring in rings]).tolist()
+        packed = await geometry_pool.map_shared(
+            _fill_mask_job, coords, [(ring_ends, sector.index, self.cell_m) for sector in sectors]
+        )
+        # Applied back on the event loop, where the grids live
+        return self._apply(player_id, ((sector, sector.unpack(p)) for sector, p in zip(sectors, packed)))
+
+    async def stamp_corridor_async(self, player_id: UUID, points: Sequence[Point], half_width_m: float) -> Dict[UUID, float]:
+        """stamp_corridor with the per-sector masks computed on the geometry pool."""
+        if not points:
+            return {}
+        sectors = self._sectors_for(points, half_width_m / METERS_PER_DEG * 2)
+        coords = np.asarray(points, dtype=np.float64)
+        packed = await geometry_pool.map_shared(
+            _corridor_mask_job, coords, [(sector.index, self.cell_m, half_width_m) for sector in sectors]
+        )
+        return self._apply(player_id, ((sector, sector.unpack(p)) for sector, p in zip(sectors, packed)))
+
+    def vectorize(self, player_id: UUID) -> Optional[str]:
+        """
+        MULTIPOLYGON WKT of the player's cells as merged rectangles, or None if they own nothing.
+        """
+        index = self.owner_index.get(player_id)
+        if index is None or self.area.get(index, 0.0) <= 0:
+            return None
+        return _rects_to_wkt((sector, sector.runs(index)) for sector in self.sectors.values())
+
+    async def vectorize_async(self, player_id: UUID) -> Optional[str]:
+        """vectorize with the run extraction of each sector done on the geometry pool."""
+        index = self.owner_index.get(player_id)
+        if index is None or self.area.get(index, 0.0) <= 0:
+            return None
+        sectors = [sector for sector in self.sectors.values() if (sector.owners == index).any()]
+        runs = await asyncio.gather(*(geometry_pool.submit(owner_runs, sector.owners, index) for sector in sectors))
+        return _rects_to_wkt(zip(sectors, runs))
+
+
+def _rects_to_wkt(sector_runs) -> Optional[str]:
+    polygons = []
+    for sector, runs in sector_runs:
+        lat_step = SECTOR_SIZE_DEG / sector.rows
+        lng_step = SECTOR_SIZE_DEG / sector.cols
+        for row0, row1, col0, col1 in runs:
+            x0 = sector.base_lng + col0 * lng_step
+            x1 = sector.base_lng + col1 * lng_step
+            y0 = sector.base_lat + row0 * lat_step
+            y1 = sector.base_lat + row1 * lat_step
+            polygons.append(f"(({x0} {y0}, {x1} {y0}, {x1} {y1}, {x0} {y1}, {x0} {y0}))")
+    if not polygons:
+        return None
+    return f"MULTIPOLYGON({', '.join(polygons)})"
+
+
+# Geometry pool jobs: module level so worker processes can unpickle them.
+# Masks travel back bit-packed, 1/8 of a byte per cell.
+
+def _fill_mask_job(coords, ring_ends: List[int], index: Cell, cell_m: float):
+    sector = SectorRaster(index, cell_m, with_owners=False)
+    rings = [coords[start:end] for start, end in zip([0] + ring_ends[:-1], ring_ends)]
+    return np.packbits(sector.fill_mask(rings))
+
+
+def _corridor_mask_job(coords, index: Cell, cell_m: float, half_width_m: float):
+    sector = SectorRaster(index, cell_m, with_owners=False)
+    return np.packbits(sector.corridor_mask(coords, half_width_m))
+
+
+def _polygon_rings(geojson: str) -> List[List[Point]]:
+    """All rings (outer and holes) of a Polygon/MultiPolygon GeoJSON string."""
+    geometry = json.loads(geojson)
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [[(x, y) for x, y in ring[:-1]] for polygon in polygons for ring in polygon]
+
+
+class RasterRegistry:
+    """
+    Per-worker raster models of the games served here, with lazy polygon persistence.
+    """
+    def __init__(self):
+        self.games: Dict[UUID, GameRaster] = {}
+
+    def get(self, game_id: UUID) -> Optional[GameRaster]:
+        return self.games.get(game_id)
+
+    async def ensure_loaded(self, db: AsyncSession, game_id: UUID) -> GameRaster:
+        """Build the game's raster from its persisted territories the first time it is needed."""
+        raster = self.games.get(game_id)
+        if raster is not None:
+            return raster
+
+        raster = GameRaster()
+        result = await db.execute(TERRITORIES_GEOJSON_SQL, {"gid": game_id})
+        for player_id, geojson in result.fetchall():
+            if geojson:
+                raster.fill_polygon(player_id, _polygon_rings(geojson))
+        # Freshly loaded shapes match the DB already
+        raster.dirty.clear()
+        # Another connection may have loaded it while we awaited
+        return self.games.setdefault(game_id, raster)
+
+    async def _trail_points(self, db: AsyncSession, game_id: UUID, player_id: UUID) -> List[Point]:
+        result = await db.execute(TRAIL_GEOJSON_SQL, {"gid": game_id, "pid": player_id})
+        geojson = result.scalar()
+        if not geojson:
+            return []
+        return [(x, y) for x, y in json.loads(geojson)["coordinates"]]
+
+    async def bank_trail(self, db: AsyncSession, game_id: UUID, player_id: UUID, half_width_m: float) -> float:
+        """Stamp the player's current trail corridor into the raster. Returns their new area."""
+        raster = await self.ensure_loaded(db, game_id)
+        await raster.stamp_corridor_async(player_id, await self._trail_points(db, game_id, player_id), half_width_m)
+        return raster.area_of(player_id)
+
+    async def capture_trail(self, db: AsyncSession, game_id: UUID, player_id: UUID) -> float:
+        """Fill the loop enclosed by the player's current trail. Returns their new area."""
+        raster = await self.ensure_loaded(db, game_id)
+        await raster.fill_polygon_async(player_id, [await self._trail_points(db, game_id, player_id)])
+        return raster.area_of(player_id)
+
+    async def persist(self, db: AsyncSession, game_id: UUID) -> Set[UUID]:
+        """
+        Write vectorized polygons of the game's dirty players and refresh their tiles (caller commits).
+        Returns the players written; if the caller's commit fails, pass them to restore_dirty.
+        """
+        from app.core.territory import refresh_territory_tiles
+
+        raster = self.games.get(game_id)
+        if raster is None:
+            return set()
+        # Swap the set out before awaiting so changes made meanwhile go to the next pass
+        dirty, raster.dirty = raster.dirty, set()
+        try:
+            for player_id in dirty:
+                wkt = await raster.vectorize_async(player_id)
+                if wkt is None:
+                    await db.execute(DELETE_TERRITORY_SQL, {"gid": game_id, "pid": player_id})
+                    continue
+                await db.execute(REPLACE_TERRITORY_SQL, {
+                    "gid": game_id,
+                    "pid": player_id,
+                    "wkt": wkt,
+                    "area": raster.area_of(player_id),
+                })
+                await refresh_territory_tiles(db, game_id, player_id)
+        except Exception:
+            raster.dirty |= dirty
+            raise
+        return dirty
+
+    def restore_dirty(self, game_id: UUID, players: Set[UUID]):
+        """Mark players as changed again after the transaction persisting them failed."""
+        raster = self.games.get(game_id)
+        if raster is not None:
+            raster.dirty |= players
+
+    def drop(self, game_id: UUID):
+        self.games.pop(game_id, None)
+
+    async def run_persister(self):
+        """
+        Background job: persists raster territories of players that changed since the last pass.
+        """
+        from app.core.database import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(settings.TERRITORY_RASTER_PERSIST_SECONDS)
+            for game_id in list(self.games):
+                try:
+                    async with AsyncSessionLocal() as db:
+                        persisted = await self.persist(db, game_id)
+                        try:
+                            await db.commit()
+                        except Exception:
+                            self.restore_dirty(game_id, persisted)
+                            raise
+                except Exception as e:
+                    print(f"Raster territory persist failed for {game_id}: {e}")
+
+
+rasters = RasterRegistry()
@@ -0,0 +1,208 @@
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.projection import METERS_PER_DEG
+
+try:
+    import numpy as np
+except ImportError:  # optional: distances are computed pair by pair without it
+    np = None
+
+# Players walking past sponsored locations.
+#
+# Sponsored locations are held in an in-memory grid whose cells are one proximity radius
+# tall, so a player's candidates are the locations in the few cells around them. Once per
+# tick every active player of a game is matched in one pass: candidate pairs are gathered
+# from the grid, then all pair distances are computed together. A sponsor_proximity event
+# goes to the player only after they have stayed in range for SPONSOR_DWELL_SECONDS, once
+# per visit; a visit ends when they have been out of range for SPONSOR_EXIT_GRACE_SECONDS.
+
+ALL_LOCATIONS_SQL = text("""
+    SELECT id, sponsor_id, name, bid_price,
+           ST_Y(location::geometry) AS lat, ST_X(location::geometry) AS lng
+    FROM sponsored_locations
+""")
+
+
+class SponsorPoint:
+    __slots__ = ("id", "sponsor_id", "name", "bid_price", "lat", "lng")
+
+    def __init__(self, id: UUID, sponsor_id: UUID, name: Optional[str], bid_price: float, lat: float, lng: float):
+        self.id = id
+        self.sponsor_id = sponsor_id
+        self.name = name
+        self.bid_price = bid_price or 0.0
+        self.lat = lat
+        self.lng = lng
+
+
+class Visit:
+    __slots__ = ("entered_at", "last_seen", "notified")
+
+    def __init__(self, now: float):
+        self.entered_at = now
+        self.last_seen = now
+        self.notified = False
+
+
+class SponsorProximityIndex:
+    def __init__(self):
+        self.points: List[SponsorPoint] = []
+        self.ids: Dict[UUID, int] = {}
+        # (lat cell, lng cell) -> indexes into points
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self._lats = None
+        self._lngs = None
+        self.radius_m = settings.SPONSOR_PROXIMITY_RADIUS_M
+        # One radius of latitude; a radius spans more cells of longitude away from the equator
+        self.cell_deg = self.radius_m / METERS_PER_DEG
+        # game -> (player, location) -> visit
+        self.visits: Dict[UUID, Dict[Tuple[UUID, UUID], Visit]] = {}
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def add(self, point: SponsorPoint):
+        """Index a location (replacing an earlier entry with the same id)."""
+        if point.id in self.ids:
+            self.points[self.ids[point.id]] = point
+            self._rebuild()
+            return
+        self.ids[point.id] = len(self.points)
+        self.points.append(point)
+        self.cells.setdefault(self._cell(point.lat, point.lng), []).append(len(self.points) - 1)
+        self._lats = self._lngs = None
+
+    def _rebuild(self):
+        self.ids = {point.id: i for i, point in enumerate(self.points)}
+        self.cells = {}
+        for i, point in enumerate(self.points):
+            self.cells.setdefault(self._cell(point.lat, point.lng), []).append(i)
+        self._lats = self._lngs = None
+
+    async def load(self, db: AsyncSession):
+        """Rebuild the index from sponsored_locations."""
+        result = await db.execute(ALL_LOCATIONS_SQL)
+        self.points = [
+            SponsorPoint(row.id, row.sponsor_id, row.name, row.bid_price, row.lat, row.lng)
+            for row in result
+        ]
+        self._rebuild()
+
+    def match(self, players: List[Tuple[UUID, float, float]]) -> List[Tuple[UUID, SponsorPoint, float]]:
+        """[(player, location, distance m)] for every player within radius of a location."""
+        pair_players: List[int] = []
+        pair_points: List[int] = []
+        for i, (_, lat, lng) in enumerate(players):
+            lat_cell, lng_cell = self._cell(lat, lng)
+            span = math.ceil(1.0 / max(math.cos(math.radians(lat)), 0.01))
+            for d_lat in (-1, 0, 1):
+                for d_lng in range(-span, span + 1):
+                    for p in self.cells.get((lat_cell + d_lat, lng_cell + d_lng), ()):
+                        pair_players.append(i)
+                        pair_points.append(p)
+        if not pair_players:
+            return []
+
+        if np is None:
+            matches = []
+            for i, p in zip(pair_players, pair_points):
+                _, lat, lng = players[i]
+                point = self.points[p]
+                dist = math.hypot(
+                    (point.lng - lng) * METERS_PER_DEG * math.cos(math.radians(lat)),
+                    (point.lat - lat) * METERS_PER_DEG
+                )
+                if dist <= self.radius_m:
+                    matches.append((players[i][0], point, dist))
+            return matches
+
+        if self._lats is None:
+            self._lats = np.array([point.lat for point in self.points], dtype=np.float64)
+            self._lngs = np.array([point.lng for point in self.points], dtype=np.float64)
+        player_idx = np.asarray(pair_players)
+        point_idx = np.asarray(pair_points)
+        player_lats = np.array([lat for _, lat, _ in players], dtype=np.float64)[player_idx]
+        player_lngs = np.array([lng for _, _, lng in players], dtype=np.float64)[player_idx]
+        dists = np.hypot(
+            (self._lngs[point_idx] - player_lngs) * METERS_PER_DEG * np.cos(np.radians(player_lats)),
+            (self._lats[point_idx] - player_lats) * METERS_PER_DEG
+        )
+        return [
+            (players[pair_players[k]][0], self.points[pair_points[k]], float(dists[k]))
+            for k in np.flatnonzero(dists <= self.radius_m).tolist()
+        ]
+
+    def step(self, game_id: UUID, players: List[Tuple[UUID, float, float]], now: Optional[float] = None) -> List[Tuple[UUID, SponsorPoint, float, float]]:
+        """
+        Advance one game's visits by a tick. Returns [(player, location, distance m, dwell s)]
+        for the visits that crossed the dwell threshold this tick.
+        """
+        now = time.monotonic() if now is None else now
+        visits = self.visits.setdefault(game_id, {})
+        due = []
+        for player_id, point, dist in self.match(players):
+            key = (player_id, point.id)
+            visit = visits.get(key)
+            if visit is None:
+                visit = visits[key] = Visit(now)
+            visit.last_seen = now
+            if not visit.notified and now - visit.entered_at >= settings.SPONSOR_DWELL_SECONDS:
+                visit.notified = True
+                due.append((player_id, point, dist, now - visit.entered_at))
+
+        cutoff = now - settings.SPONSOR_EXIT_GRACE_SECONDS
+        for key in [key for key, visit in visits.items() if visit.last_seen < cutoff]:
+            del visits[key]
+        return due
+
+    def drop_game(self, game_id: UUID):
+        self.visits.pop(game_id, None)
+
+    async def run(self):
+        """
+        Background job: matches each game's connected players against the index once per
+        tick and sends sponsor_proximity to players whose dwell crossed the threshold.
+        """
+        from app.core.database import AsyncSessionLocal
+        from app.api.ws.game import manager
+
+        loaded_at = None
+        while True:
+            await asyncio.sleep(settings.SPONSOR_PROXIMITY_TICK_SECONDS)
+            try:
+                if loaded_at is None or time.monotonic() - loaded_at >= settings.SPONSOR_INDEX_REFRESH_SECONDS:
+                    async with AsyncSessionLocal() as db:
+                        await self.load(db)
+                    loaded_at = time.monotonic()
+
+                for game_id in list(self.visits):
+                    if game_id not in manager.active_connections:
+                        self.drop_game(game_id)
+
+                for game_id in list(manager.active_connections):
+                    players = manager.player_positions(game_id)
+                    for player_id, point, dist, dwell in self.step(game_id, players):
+                        await manager.send_to_player(game_id, player_id, {
+                            "type": "sponsor_proximity",
+                            "location_id": str(point.id),
+                            "sponsor_id": str(point.sponsor_id),
+                            "name": point.name,
+                            "bid_price": point.bid_price,
+                            "lat": point.lat,
+                            "lng": point.lng,
+                            "distance_m": round(dist, 1),
+                            "dwell_seconds": round(dwell, 1)
+                        })
+            except Exception as e:
+                print(f"Sponsor proximity tick failed: {e}")
+
+
+sponsor_proximity = SponsorProximityIndex()
@@ -0,0 +1,154 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.projection import METERS_PER_DEG, Cell, distance_m
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index
+from app.schemas.sponsor import SponsoredLocationResponse
+
+# Area queries on sponsored locations.
+#
+# Locations are cached per unified_grid sector tile, each tile ranked by bid_price. A bbox or
+# radius query only touches the tiles it covers: cached tiles cost nothing, and all missing
+# tiles are read together in one statement whose per-tile envelopes hit the GiST index on
+# sponsored_locations.location. Creating a location drops its tile on this worker; other
+# workers see it once their copy of the tile expires.
+
+TILE_LOCATIONS_SQL = text("""
+    WITH tiles AS (
+        SELECT x, y FROM unnest(CAST(:xs AS int[]), CAST(:ys AS int[])) AS t(x, y)
+    )
+    SELECT t.x, t.y, l.id, l.sponsor_id, l.name, l.bid_price,
+           ST_Y(l.location::geometry) AS lat, ST_X(l.location::geometry) AS lng
+    FROM tiles t
+    JOIN sponsored_locations l
+      ON l.location && ST_MakeEnvelope(t.x * :deg, t.y * :deg, (t.x + 1) * :deg, (t.y + 1) * :deg, 4326)::geography
+     -- Points on a shared edge belong to the tile that floor() puts them in
+     AND floor(ST_X(l.location::geometry) / :deg) = t.x
+     AND floor(ST_Y(l.location::geometry) / :deg) = t.y
+""")
+
+TOP_LOCATIONS_SQL = text("""
+    SELECT id, sponsor_id, name, bid_price,
+           ST_Y(location::geometry) AS lat, ST_X(location::geometry) AS lng
+    FROM sponsored_locations
+    ORDER BY bid_price DESC NULLS LAST, id
+    LIMIT :limit
+""")
+
+
+def _response(row) -> SponsoredLocationResponse:
+    return SponsoredLocationResponse(
+        id=row.id, sponsor_id=row.sponsor_id, name=row.name,
+        bid_price=row.bid_price or 0.0, lat=row.lat, lng=row.lng
+    )
+
+
+def _rank_key(location: SponsoredLocationResponse):
+    return -(location.bid_price or 0.0), str(location.id)
+
+
+def tiles_for_bbox(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Cell]:
+    min_x, min_y = get_sector_index(min_lat, min_lng)
+    max_x, max_y = get_sector_index(max_lat, max_lng)
+    return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+
+def radius_bbox(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle."""
+    dlat = radius_m / METERS_PER_DEG
+    dlng = radius_m / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+class SponsorTileCache:
+    """
+    Per-worker cache of sponsored locations per sector tile, ranked by bid_price.
+    """
+    def __init__(self):
+        # tile -> (locations ranked by bid, expires_at), least recently used first
+        self.tiles: "OrderedDict[Cell, Tuple[List[SponsoredLocationResponse], float]]" = OrderedDict()
+        # Bumped by every invalidation, so a load that raced one does not store stale tiles
+        self.version = 0
+
+    async def _tiles(self, db: AsyncSession, cells: List[Cell]) -> List[List[SponsoredLocationResponse]]:
+        now = time.monotonic()
+        served: Dict[Cell, List[SponsoredLocationResponse]] = {}
+        missing = []
+        for cell in cells:
+            entry = self.tiles.get(cell)
+            if entry is not None and entry[1] >= now:
+                served[cell] = entry[0]
+                self.tiles.move_to_end(cell)
+            else:
+                missing.append(cell)
+
+        if missing:
+            version = self.version
+            result = await db.execute(TILE_LOCATIONS_SQL, {
+                "xs": [x for x, _ in missing],
+                "ys": [y for _, y in missing],
+                "deg": SECTOR_SIZE_DEG,
+            })
+            loaded: Dict[Cell, List[SponsoredLocationResponse]] = {cell: [] for cell in missing}
+            for row in result:
+                loaded[(row.x, row.y)].append(_response(row))
+            expires_at = time.monotonic() + settings.SPONSOR_TILE_CACHE_TTL_SECONDS
+            for cell, locations in loaded.items():
+                locations.sort(key=_rank_key)
+                served[cell] = locations
+                # An invalidation during the read may have made these stale; serve them but do not keep them
+                if self.version == version:
+                    self.tiles[cell] = (locations, expires_at)
+                    self.tiles.move_to_end(cell)
+            self._prune(now)
+        return [served[cell] for cell in cells]
+
+    def _prune(self, now: float):
+        if len(self.tiles) <= settings.SPONSOR_TILE_CACHE_MAX_TILES:
+            return
+        for cell in [cell for cell, entry in self.tiles.items() if entry[1] < now]:
+            del self.tiles[cell]
+        # Still over the cap with live tiles: evict the least recently used
+        while len(self.tiles) > settings.SPONSOR_TILE_CACHE_MAX_TILES:
+            self.tiles.popitem(last=False)
+
+    async def in_bbox(self, db: AsyncSession, min_lat: float, min_lng: float, max_lat: float, max_lng: float, limit: Optional[int]) -> List[SponsoredLocationResponse]:
+        """Locations inside the box, highest bid first. Raises ValueError for an oversized box."""
+        cells = tiles_for_bbox(min_lat, min_lng, max_lat, max_lng)
+        if len(cells) > settings.SPONSOR_QUERY_MAX_TILES:
+            raise ValueError(f"Area too large: covers {len(cells)} tiles, at most {settings.SPONSOR_QUERY_MAX_TILES} allowed")
+        matches = [
+            location
+            for tile in await self._tiles(db, cells)
+            for location in tile
+            if min_lat <= location.lat <= max_lat and min_lng <= location.lng <= max_lng
+        ]
+        matches.sort(key=_rank_key)
+        return matches[:limit]
+
+    async def in_radius(self, db: AsyncSession, lat: float, lng: float, radius_m: float, limit: int) -> List[SponsoredLocationResponse]:
+        """Locations within radius_m of a point, highest bid first."""
+        candidates = await self.in_bbox(db, *radius_bbox(lat, lng, radius_m), limit=None)
+        return [
+            location for location in candidates
+            if distance_m(lat, lng, location.lat, location.lng) <= radius_m
+        ][:limit]
+
+    async def top(self, db: AsyncSession, limit: int) -> List[SponsoredLocationResponse]:
+        """Highest bids anywhere (no area given)."""
+        result = await db.execute(TOP_LOCATIONS_SQL, {"limit": limit})
+        return [_response(row) for row in result]
+
+    def invalidate(self, lat: float, lng: float):
+        """A location was created at (lat, lng)."""
+        self.version += 1
+        self.tiles.pop(get_sector_index(lat, lng), None)
+
+
+sponsor_tiles = SponsorTileCache()
@@ -0,0 +1,155 @@
+import asyncio
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Asynchronous player_stats aggregation.
+#
+# The game loop only drops small events into an in-process queue (put_nowait, no I/O).
+# A background job drains the queue, folds the events into one delta per player and
+# applies all of them in a single upsert over unnest() arrays: sums for totals and counts,
+# GREATEST for personal bests. Deltas are additive, so every worker can flush its own.
+
+EVENT_TERRITORY_GAINED = "territory_gained"
+EVENT_LOOP_CLOSED = "loop_closed"
+EVENT_TRAIL_FINISHED = "trail_finished"
+EVENT_GAME_PLAYED = "game_played"
+
+APPLY_DELTAS_SQL = text("""
+    INSERT INTO player_stats (player_id, total_area, games_played, games_won, total_earnings,
+                              longest_trail, biggest_loop, current_streak)
+    SELECT d.player_id, d.area, d.played, d.won, 0, d.trail, d.loop_area, 0
+    FROM unnest(
+        CAST(:player_ids AS uuid[]), CAST(:areas AS float8[]), CAST(:played AS int[]),
+        CAST(:won AS int[]), CAST(:trails AS float8[]), CAST(:loops AS float8[])
+    ) AS d(player_id, area, played, won, trail, loop_area)
+    ON CONFLICT (player_id) DO UPDATE
+    SET total_area = COALESCE(player_stats.total_area, 0) + EXCLUDED.total_area,
+        games_played = COALESCE(player_stats.games_played, 0) + EXCLUDED.games_played,
+        games_won = COALESCE(player_stats.games_won, 0) + EXCLUDED.games_won,
+        longest_trail = GREATEST(COALESCE(player_stats.longest_trail, 0), EXCLUDED.longest_trail),
+        biggest_loop = GREATEST(COALESCE(player_stats.biggest_loop, 0), EXCLUDED.biggest_loop)
+    RETURNING player_id, total_area, longest_trail, biggest_loop
+""")
+
+
+class StatsDelta:
+    __slots__ = ("area", "played", "won", "trail", "loop_area")
+
+    def __init__(self):
+        self.area = 0.0       # summed
+        self.played = 0       # summed
+        self.won = 0          # summed
+        self.trail = 0.0      # max
+        self.loop_area = 0.0  # max
+
+    def merge(self, other: "StatsDelta"):
+        self.area += other.area
+        self.played += other.played
+        self.won += other.won
+        self.trail = max(self.trail, other.trail)
+        self.loop_area = max(self.loop_area, other.loop_area)
+
+
+class StatsAggregator:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.deltas: Dict[UUID, StatsDelta] = {}
+
+    def emit(self, kind: str, player_id: UUID, value: float = 0.0):
+        """Queue one stats event. Never blocks and never touches the database."""
+        self.queue.put_nowait((kind, player_id, value))
+
+    def record_tick(self, result):
+        """Queue the stats events of one flushed tick (a write_batcher TickResult)."""
+        for player_id, area in result.gained.items():
+            if area > 0:
+                self.emit(EVENT_TERRITORY_GAINED, player_id, area)
+        for player_id, area in result.loops.items():
+            self.emit(EVENT_LOOP_CLOSED, player_id, area)
+        for player_id, length in result.trail_lengths.items():
+            self.emit(EVENT_TRAIL_FINISHED, player_id, length)
+
+    def record_game(self, rankings: List[dict]):
+        """Queue games_played (and games_won for rank 1) for a finalized game's rankings."""
+        for ranking in rankings:
+            self.emit(EVENT_GAME_PLAYED, UUID(ranking["player_id"]), 1.0 if ranking["rank"] == 1 else 0.0)
+
+    def drain(self):
+        """Fold every queued event into the per-player deltas."""
+        while True:
+            try:
+                kind, player_id, value = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            delta = self.deltas.get(player_id)
+            if delta is None:
+                delta = self.deltas[player_id] = StatsDelta()
+            if kind == EVENT_TERRITORY_GAINED:
+                delta.area += value
+            elif kind == EVENT_LOOP_CLOSED:
+                delta.loop_area = max(delta.loop_area, value)
+            elif kind == EVENT_TRAIL_FINISHED:
+                delta.trail = max(delta.trail, value)
+            elif kind == EVENT_GAME_PLAYED:
+                delta.played += 1
+                delta.won += int(value)
+
+    async def flush(self, db: AsyncSession) -> List:
+        """
+        Apply the folded deltas in one upsert and commit. Returns the updated rows.
+        On failure the deltas are kept and retried with the next flush.
+        """
+        self.drain()
+        if not self.deltas:
+            return []
+        deltas, self.deltas = self.deltas, {}
+        player_ids = list(deltas)
+        try:
+            result = await db.execute(APPLY_DELTAS_SQL, {
+                "player_ids": player_ids,
+                "areas": [deltas[pid].area for pid in player_ids],
+                "played": [deltas[pid].played for pid in player_ids],
+                "won": [deltas[pid].won for pid in player_ids],
+                "trails": [deltas[pid].trail for pid in player_ids],
+                "loops": [deltas[pid].loop_area for pid in player_ids],
+            })
+            rows = result.fetchall()
+            await db.commit()
+            return rows
+        except Exception:
+            await db.rollback()
+            for player_id, delta in deltas.items():
+                if player_id in self.deltas:
+                    delta.merge(self.deltas[player_id])
+                self.deltas[player_id] = delta
+            raise
+
+    async def run(self):
+        """
+        Background job: flushes aggregated stats every STATS_FLUSH_INTERVAL_SECONDS and
+        pushes the new totals to the leaderboards and the player cache.
+        """
+        from app.core.database import AsyncSessionLocal
+        from app.core.leaderboard import leaderboards
+        from app.core.player_cache import player_cache
+
+        while True:
+            await asyncio.sleep(settings.STATS_FLUSH_INTERVAL_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = await self.flush(db)
+                for row in rows:
+                    leaderboards.record("total_area", row.player_id, row.total_area)
+                    leaderboards.record("longest_trail", row.player_id, row.longest_trail)
+                    leaderboards.record("biggest_loop", row.player_id, row.biggest_loop)
+                    player_cache.invalidate(player_id=row.player_id)
+            except Exception as e:
+                print(f"Stats flush failed: {e}")
+
+
+stats_aggregator = StatsAggregator()
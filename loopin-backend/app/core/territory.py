@@ -0,0 +1,318 @@
+import asyncio
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.projection import frame_for_point
+from app.core.unified_grid import SECTOR_SIZE_DEG, get_sector_index
+
+# Simplification tolerances (degrees) tried in order until a territory fits its vertex budget.
+# 1e-6 deg is roughly 0.1m, 2e-5 deg roughly 2m.
+SIMPLIFY_TOLERANCES = [0.000001, 0.000002, 0.000005, 0.00001, 0.00002]
+
+# Shared compaction pipeline, reading from the named CTE with at most one "geom" row:
+#   1. Snap vertices to a fixed grid (drops near-duplicate points from round buffer joins)
+#   2. Topology-preserving simplification with the smallest tolerance that fits the budget
+#   3. Drop sliver parts below the minimum area and re-union what is left
+# Produces a CTE named "compacted" holding a valid MultiPolygon (or NULL if only slivers remained
+# or the source had no row).
+_COMPACT_SQL_TEMPLATE = """
+    snapped AS (
+        SELECT ST_MakeValid(ST_SnapToGrid(geom, :grid)) AS geom FROM {source}
+    ),
+    simplified AS (
+        SELECT COALESCE(
+            (
+                SELECT s.geom
+                FROM unnest(CAST(:tolerances AS float8[])) WITH ORDINALITY AS tol(t, ord)
+                CROSS JOIN LATERAL (
+                    SELECT ST_SimplifyPreserveTopology(snapped.geom, tol.t) AS geom
+                ) s
+                WHERE ST_NPoints(s.geom) <= :budget
+                ORDER BY tol.ord
+                LIMIT 1
+            ),
+            ST_SimplifyPreserveTopology(snapped.geom, :max_tolerance)
+        ) AS geom
+        FROM snapped
+    ),
+    compacted AS (
+        SELECT ST_Multi(ST_Union(d.geom)) AS geom
+        FROM simplified
+        CROSS JOIN LATERAL ST_Dump(ST_CollectionExtract(ST_MakeValid(simplified.geom), 3)) d
+        WHERE ST_Area(d.geom::geography) >= :sliver_sqm
+    )"""
+
+
+def _compact_sql(source: str) -> str:
+    return _COMPACT_SQL_TEMPLATE.format(source=source)
+
+
+# Union a new polygon into a player's territory.
+# Only a merged shape over the inline threshold is fed to the compaction pipeline; below it
+# "oversized" is empty, the pipeline runs on no rows and the union is kept as is.
+# The area is computed exactly once from whichever geometry is kept.
+MERGE_TERRITORY_SQL = text("""
+    WITH merged AS (
+        SELECT ST_Multi(ST_Union(territory::geometry, CAST(:new_geom AS geometry))) AS geom
+        FROM player_territories WHERE game_id = :gid AND player_id = :pid
+    ),
+    oversized AS (
+        SELECT geom FROM merged WHERE ST_NPoints(geom) > :threshold
+    ),""" + _compact_sql("oversized") + """,
+    chosen AS (
+        SELECT COALESCE(c.geom, m.geom) AS geom,
+               c.geom IS NOT NULL AS compact
+        FROM merged m
+        LEFT JOIN compacted c ON TRUE
+    ),
+    measured AS (
+        SELECT geom, compact, ST_Area(geom::geography) AS area FROM chosen WHERE geom IS NOT NULL
+    )
+    UPDATE player_territories t
+    SET territory = m.geom::geography,
+        area_sqm = m.area,
+        version = t.version + 1
+    FROM measured m
+    WHERE t.game_id = :gid AND t.player_id = :pid
+    RETURNING t.area_sqm, m.compact
+""")
+
+# Insert a first territory for a player, measured in one pass and compacted under the same
+# inline threshold as a merge, so a small first loop is kept as captured.
+# A territory created concurrently for the same player is unioned with instead.
+CREATE_TERRITORY_SQL = text("""
+    WITH merged AS (
+        SELECT ST_Multi(CAST(:new_geom AS geometry)) AS geom
+    ),
+    oversized AS (
+        SELECT geom FROM merged WHERE ST_NPoints(geom) > :threshold
+    ),""" + _compact_sql("oversized") + """,
+    chosen AS (
+        SELECT COALESCE(c.geom, m.geom) AS geom
+        FROM merged m
+        LEFT JOIN compacted c ON TRUE
+    ),
+    measured AS (
+        SELECT geom, ST_Area(geom::geography) AS area FROM chosen WHERE geom IS NOT NULL
+    )
+    INSERT INTO player_territories (id, game_id, player_id, territory, area_sqm, version)
+    SELECT gen_random_uuid(), :gid, :pid, m.geom::geography, m.area, 1 FROM measured m
+    ON CONFLICT (game_id, player_id) DO UPDATE
+    SET territory = ST_Multi(ST_Union(player_territories.territory::geometry, EXCLUDED.territory::geometry))::geography,
+        area_sqm = ST_Area(ST_Union(player_territories.territory::geometry, EXCLUDED.territory::geometry)::geography),
+        version = player_territories.version + 1
+    RETURNING area_sqm
+""")
+
+# Background pass: compact a single territory regardless of the inline threshold.
+COMPACT_TERRITORY_SQL = text("""
+    WITH merged AS (
+        SELECT territory::geometry AS geom FROM player_territories WHERE game_id = :gid AND id = :tid
+    ),""" + _compact_sql("merged") + """,
+    measured AS (
+        SELECT geom, ST_Area(geom::geography) AS area FROM compacted WHERE geom IS NOT NULL
+    )
+    UPDATE player_territories t
+    SET territory = m.geom::geography,
+        area_sqm = m.area,
+        version = t.version + 1
+    FROM measured m
+    WHERE t.game_id = :gid AND t.id = :tid
+    RETURNING t.area_sqm
+""")
+
+OVERSIZED_TERRITORIES_SQL = text("""
+    SELECT id, game_id, player_id FROM player_territories
+    WHERE ST_NPoints(territory::geometry) > :budget
+    ORDER BY ST_NPoints(territory::geometry) DESC
+    LIMIT :limit
+""")
+
+
+# Rewrite a player's territory tiles for the sectors overlapping :bounds
+# (or every sector the territory covers when :bounds is NULL).
+# Each sector piece is further split with ST_Subdivide so no tile exceeds :max_vertices.
+REFRESH_TILES_SQL = text("""
+    WITH territory AS (
+        SELECT territory::geometry AS geom FROM player_territories WHERE game_id = :gid AND player_id = :pid
+    ),
+    bounds AS (
+        SELECT COALESCE(CAST(:bounds AS geometry), (SELECT geom FROM territory)) AS geom
+    ),
+    sectors AS (
+        SELECT sx, sy
+        FROM bounds,
+             generate_series(floor(ST_XMin(bounds.geom) / :size)::int, floor(ST_XMax(bounds.geom) / :size)::int) AS sx,
+             generate_series(floor(ST_YMin(bounds.geom) / :size)::int, floor(ST_YMax(bounds.geom) / :size)::int) AS sy
+        WHERE bounds.geom IS NOT NULL
+    ),
+    cleared AS (
+        DELETE FROM player_territory_tiles pt
+        USING sectors s
+        WHERE pt.game_id = :gid AND pt.player_id = :pid
+          AND (:full_rebuild OR (pt.sector_x = s.sx AND pt.sector_y = s.sy))
+    )
+    INSERT INTO player_territory_tiles (id, game_id, player_id, sector_x, sector_y, tile)
+    SELECT gen_random_uuid(), :gid, :pid, s.sx, s.sy, piece.geom::geography
+    FROM sectors s
+    CROSS JOIN territory t
+    CROSS JOIN LATERAL (
+        SELECT ST_MakeEnvelope(s.sx * :size, s.sy * :size, (s.sx + 1) * :size, (s.sy + 1) * :size, 4326) AS geom
+    ) env
+    CROSS JOIN LATERAL ST_Dump(
+        ST_CollectionExtract(ST_Intersection(t.geom, env.geom), 3)
+    ) part
+    CROSS JOIN LATERAL ST_Subdivide(part.geom, :max_vertices) AS piece(geom)
+    WHERE ST_Intersects(t.geom, env.geom)
+""")
+
+# Corridors around the trails of several players, each buffered in metres in the local frame
+# of the sector the player is in. (Buffering the SRID 4326 geometry directly would buffer by degrees.)
+TRAIL_CORRIDORS_SQL = text("""
+    WITH players AS (
+        SELECT * FROM unnest(CAST(:player_ids AS uuid[]), CAST(:projs AS text[])) AS p(player_id, proj)
+    )
+    SELECT t.player_id, ST_Multi(ST_Transform(
+        ST_Buffer(ST_Transform(t.trail::geometry, p.proj), :width, 'endcap=round join=round'),
+        p.proj, 4326
+    )) AS corridor
+    FROM player_trails t
+    JOIN players p ON p.player_id = t.player_id
+    WHERE t.game_id = :gid
+""")
+
+# Point check touching only the tiles of the sector the point lies in.
+POINT_IN_TERRITORY_SQL = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM player_territory_tiles
+        WHERE game_id = :gid AND player_id = :pid
+          AND sector_x = :sx AND sector_y = :sy
+          AND ST_Intersects(tile, ST_GeogFromText(:pt))
+    )
+""")
+
+
+def _compaction_params() -> dict:
+    return {
+        "grid": settings.TERRITORY_SNAP_GRID_DEG,
+        "tolerances": SIMPLIFY_TOLERANCES,
+        "max_tolerance": SIMPLIFY_TOLERANCES[-1],
+        "budget": settings.TERRITORY_VERTEX_BUDGET,
+        "sliver_sqm": settings.TERRITORY_SLIVER_AREA_SQM,
+    }
+
+
+async def merge_territory(db: AsyncSession, game_id: UUID, player_id: UUID, new_geom, has_territory: bool) -> float:
+    """
+    Union new_geom into the player's territory (or create it), compacting inline
+    when the result is over TERRITORY_COMPACT_THRESHOLD vertices.
+    Returns the new territory area in square metres.
+    """
+    params = _compaction_params()
+    params.update({
+        "gid": game_id,
+        "pid": player_id,
+        "new_geom": new_geom,
+        "threshold": settings.TERRITORY_COMPACT_THRESHOLD,
+    })
+
+    if has_territory:
+        result = await db.execute(MERGE_TERRITORY_SQL, params)
+        row = result.fetchone()
+        area, compacted = (row.area_sqm, row.compact) if row else (0.0, False)
+    else:
+        result = await db.execute(CREATE_TERRITORY_SQL, params)
+        area, compacted = result.scalar() or 0.0, True
+
+    # Only the sectors touched by new_geom changed, unless compaction reshaped everything
+    await refresh_territory_tiles(db, game_id, player_id, None if compacted else new_geom)
+    return area or 0.0
+
+
+async def refresh_territory_tiles(db: AsyncSession, game_id: UUID, player_id: UUID, changed_geom=None):
+    """
+    Rebuild the sector tiles of a player's territory.
+    With changed_geom only the sectors overlapping it are rewritten; without it, all tiles are.
+    """
+    await db.execute(REFRESH_TILES_SQL, {
+        "gid": game_id,
+        "pid": player_id,
+        "bounds": changed_geom,
+        "full_rebuild": changed_geom is None,
+        "size": SECTOR_SIZE_DEG,
+        "max_vertices": settings.TERRITORY_TILE_MAX_VERTICES,
+    })
+
+
+async def trail_corridors(db: AsyncSession, game_id: UUID, positions: Dict[UUID, Tuple[float, float]]) -> Dict[UUID, Any]:
+    """
+    Trails of several players buffered by TRAIL_CORRIDOR_HALF_WIDTH_M metres, as 4326 MultiPolygons,
+    in one statement. positions maps player id -> (lat, lng), which picks each player's metric frame.
+    Players without a trail are left out.
+    """
+    if not positions:
+        return {}
+    player_ids = list(positions)
+    result = await db.execute(TRAIL_CORRIDORS_SQL, {
+        "gid": game_id,
+        "player_ids": player_ids,
+        "projs": [frame_for_point(*positions[player_id]).proj4() for player_id in player_ids],
+        "width": settings.TRAIL_CORRIDOR_HALF_WIDTH_M,
+    })
+    return {row.player_id: row.corridor for row in result if row.corridor is not None}
+
+
+async def point_in_territory(db: AsyncSession, game_id: UUID, player_id: UUID, lat: float, lng: float) -> bool:
+    """
+    Check whether a point lies inside the player's territory using only the
+    tiles of the sector containing it.
+    """
+    sector_x, sector_y = get_sector_index(lat, lng)
+    result = await db.execute(POINT_IN_TERRITORY_SQL, {
+        "gid": game_id,
+        "pid": player_id,
+        "sx": sector_x,
+        "sy": sector_y,
+        "pt": f"SRID=4326;POINT({lng} {lat})",
+    })
+    return bool(result.scalar())
+
+
+async def compact_territories(db: AsyncSession, limit: int = 50) -> int:
+    """
+    Compact the largest territories that exceed the vertex budget.
+    Returns the number of territories rewritten.
+    """
+    result = await db.execute(OVERSIZED_TERRITORIES_SQL, {
+        "budget": settings.TERRITORY_VERTEX_BUDGET,
+        "limit": limit,
+    })
+    territories = [(row.id, row.game_id, row.player_id) for row in result]
+
+    params = _compaction_params()
+    for tid, game_id, player_id in territories:
+        await db.execute(COMPACT_TERRITORY_SQL, {**params, "gid": game_id, "tid": tid})
+        await refresh_territory_tiles(db, game_id, player_id)
+
+    await db.commit()
+    return len(territories)
+
+
+async def run_compaction_loop():
+    """
+    Background job: periodically compacts oversized territories so that
+    territories which stayed under the inline threshold still converge to the budget.
+    """
+    from app.core.database import AsyncSessionLocal
+
+    while True:
+        await asyncio.sleep(settings.TERRITORY_COMPACT_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await compact_territories(db)
+        except Exception as e:
+            print(f"Territory compaction failed: {e}")
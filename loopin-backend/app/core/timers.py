@@ -0,0 +1,133 @@
+import asyncio
+import math
+import time
+from typing import Any, Callable, List, Optional
+
+from app.core.config import settings
+
+# Hierarchical timing wheel (same scheme as the classic Linux kernel timer wheel).
+#
+# Level 0 has one slot per tick; each higher level covers WHEEL_SIZE times the span of the one below.
+# A timer is placed in the coarsest level that still separates it from "now" and is cascaded one
+# level down whenever the level below wraps around, so scheduling, cancelling and firing are all
+# O(1) amortized per timer, independent of how many timers are pending.
+
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS  # 64 slots per level
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4  # 64^4 ticks, about 9.7 days at 50ms per tick
+
+
+class TimerHandle:
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: int, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimingWheel:
+    def __init__(self, tick_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.tick_seconds = tick_seconds or settings.TIMER_TICK_SECONDS
+        self.clock = clock
+        self.origin = clock()
+        # Next tick to be processed
+        self.current = 0
+        self.levels: List[List[List[TimerHandle]]] = [
+            [[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)
+        ]
+        self.pending = 0
+
+    def _insert(self, timer: TimerHandle):
+        delta = timer.deadline - self.current
+        if delta < 0:
+            # Already due: fire on the tick being processed
+            self.levels[0][self.current & WHEEL_MASK].append(timer)
+            return
+        for level in range(WHEEL_LEVELS):
+            if delta < 1 << (WHEEL_BITS * (level + 1)):
+                slot = (timer.deadline >> (WHEEL_BITS * level)) & WHEEL_MASK
+                self.levels[level][slot].append(timer)
+                return
+        # Beyond the wheel's span: park it at the far edge of the top level; it is re-placed when cascaded
+        top = WHEEL_LEVELS - 1
+        horizon = self.current + (1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1
+        self.levels[top][(horizon >> (WHEEL_BITS * top)) & WHEEL_MASK].append(timer)
+
+    def _cascade(self, level: int, slot: int) -> int:
+        timers = self.levels[level][slot]
+        self.levels[level][slot] = []
+        for timer in timers:
+            if not timer.cancelled:
+                self._insert(timer)
+        return slot
+
+    def schedule(self, delay_seconds: float, callback: Callable, *args: Any) -> TimerHandle:
+        """
+        Call callback(*args) after delay_seconds (rounded up to the next tick).
+        The callback may be a plain function or a coroutine function.
+        """
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        timer = TimerHandle(self.current + ticks, callback, args)
+        self._insert(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer: Optional[TimerHandle]):
+        if timer is not None and not timer.cancelled:
+            timer.cancel()
+            self.pending -= 1
+
+    def advance(self, target_tick: int) -> List[TimerHandle]:
+        """
+        Process every tick up to and including target_tick and return the expired timers.
+        """
+        expired = []
+        while self.current <= target_tick:
+            if self.pending == 0:
+                # Nothing scheduled: jump straight to the target
+                self.current = target_tick + 1
+                break
+
+            index = self.current & WHEEL_MASK
+            if index == 0:
+                # Level 0 wrapped: pull the next slot of each higher level down, as far as it wraps
+                for level in range(1, WHEEL_LEVELS):
+                    if self._cascade(level, (self.current >> (WHEEL_BITS * level)) & WHEEL_MASK) != 0:
+                        break
+
+            slot = self.levels[0][index]
+            if slot:
+                self.levels[0][index] = []
+                for timer in slot:
+                    if not timer.cancelled:
+                        timer.cancelled = True  # fired timers cannot be cancelled again
+                        self.pending -= 1
+                        expired.append(timer)
+            self.current += 1
+        return expired
+
+    def now_tick(self) -> int:
+        return int((self.clock() - self.origin) / self.tick_seconds)
+
+    async def run(self):
+        """
+        Per-worker driver: advances the wheel every tick and runs expired callbacks.
+        """
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            for timer in self.advance(self.now_tick()):
+                try:
+                    result = timer.callback(*timer.args)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    print(f"Timer callback failed: {e}")
+
+
+timers = TimingWheel()
@@ -14,6 +14,13 @@ def get_sector_base(lat: float, lng: float) -> tuple[float, float]:
     sector_lng = math.floor(lng / SECTOR_SIZE_DEG) * SECTOR_SIZE_DEG
     return sector_lat, sector_lng
 
+def get_sector_index(lat: float, lng: float) -> tuple[int, int]:
+    """
+    Returns the integer (x, y) index of the sector containing the given point.
+    x follows longitude and y follows latitude, matching floor(coord / SECTOR_SIZE_DEG) in SQL.
+    """
+    return math.floor(lng / SECTOR_SIZE_DEG), math.floor(lat / SECTOR_SIZE_DEG)
+
 def get_sector_offset(lat: float, lng: float) -> tuple[float, float]:
     """
     Returns the relative offset of the point within its sector.
@@ -0,0 +1,291 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.event_log import event_logs, EVENT_BANK, EVENT_CAPTURE
+from app.core.leaderboard import leaderboards
+from app.core.raster import rasters
+from app.core.stats_aggregator import stats_aggregator
+from app.core.territory import merge_territory, trail_corridors
+
+# Per-tick batching of trail and territory writes.
+#
+# Position updates only queue their writes here. Once per tick every game's queue is applied
+# in one transaction with a handful of set-based statements:
+#   1. all trail appends as one upsert over unnest() arrays, reporting which trails now cross themselves
+#   2. captures for those trails (areas built in one statement, one union per player)
+#   3. banks for players back in a safe zone (corridors buffered in one statement, one union per player)
+#   4. one delete for the trails that were captured or banked
+# so commits per second follow ticks x games rather than players x updates.
+
+GAME_STATUS_FOR_SHARE_SQL = text("""
+    SELECT status FROM game_sessions WHERE id = :gid FOR SHARE
+""")
+
+APPEND_TRAILS_SQL = text("""
+    WITH points AS (
+        SELECT * FROM unnest(
+            CAST(:player_ids AS uuid[]), CAST(:lngs AS float8[]), CAST(:lats AS float8[])
+        ) WITH ORDINALITY AS p(player_id, lng, lat, ord)
+    ),
+    lines AS (
+        SELECT player_id, array_agg(ST_SetSRID(ST_MakePoint(lng, lat), 4326) ORDER BY ord) AS pts
+        FROM points GROUP BY player_id
+    )
+    INSERT INTO player_trails (id, game_id, player_id, trail)
+    SELECT gen_random_uuid(), :gid, player_id,
+           -- A new trail starts as a degenerate two-point line, like a single fix always did
+           ST_MakeLine(CASE WHEN cardinality(pts) = 1 THEN pts || pts ELSE pts END)::geography
+    FROM lines
+    ON CONFLICT (game_id, player_id) DO UPDATE
+    SET trail = ST_MakeLine(player_trails.trail::geometry, EXCLUDED.trail::geometry)::geography
+    RETURNING player_id, ST_IsSimple(trail::geometry) AS is_simple
+""")
+
+# ST_Node splits a self-crossing trail at its intersections and ST_BuildArea builds the enclosed faces
+CAPTURE_AREAS_SQL = text("""
+    SELECT player_id, area, ST_Area(area::geography) AS loop_sqm
+    FROM (
+        SELECT player_id, ST_Multi(ST_BuildArea(ST_Node(trail::geometry))) AS area
+        FROM player_trails
+        WHERE game_id = :gid AND player_id = ANY(CAST(:player_ids AS uuid[]))
+    ) loops
+""")
+
+PLAYERS_WITH_TERRITORY_SQL = text("""
+    SELECT player_id, area_sqm FROM player_territories
+    WHERE game_id = :gid AND player_id = ANY(CAST(:player_ids AS uuid[]))
+""")
+
+PLAYERS_WITH_TRAIL_SQL = text("""
+    SELECT player_id FROM player_trails
+    WHERE game_id = :gid AND player_id = ANY(CAST(:player_ids AS uuid[]))
+""")
+
+DELETE_TRAILS_SQL = text("""
+    DELETE FROM player_trails
+    WHERE game_id = :gid AND player_id = ANY(CAST(:player_ids AS uuid[]))
+    RETURNING player_id, ST_Length(trail) AS length_m
+""")
+
+
+class PendingWrites:
+    """Writes queued for one game during one tick."""
+    __slots__ = ("appends", "banks", "positions")
+
+    def __init__(self):
+        # player -> [(lat, lng)] in arrival order
+        self.appends: Dict[UUID, List[Tuple[float, float]]] = {}
+        # player -> (lat, lng, reason) for players who reached a safe zone
+        self.banks: Dict[UUID, Tuple[float, float, str]] = {}
+        # latest position per player, for the state broadcast after the flush
+        self.positions: Dict[UUID, Tuple[float, float]] = {}
+
+
+class TickResult:
+    __slots__ = ("captured", "banked", "gained", "loops", "trail_lengths")
+
+    def __init__(self):
+        self.captured: Dict[UUID, float] = {}               # player -> new area
+        self.banked: Dict[UUID, Tuple[float, str]] = {}     # player -> (new area, reason)
+        self.gained: Dict[UUID, float] = {}                 # player -> territory growth this tick
+        self.loops: Dict[UUID, float] = {}                  # player -> area of the loop they closed
+        self.trail_lengths: Dict[UUID, float] = {}          # player -> length of the trail captured or banked
+
+
+class TickWriteBatcher:
+    def __init__(self):
+        self.pending: Dict[UUID, PendingWrites] = {}
+        # Moves that came after a bank in the same tick wait for the next one,
+        # so the bank only ever sees the trail that led into the safe zone
+        self.deferred: Dict[UUID, PendingWrites] = {}
+
+    def record_move(self, game_id: UUID, player_id: UUID, lat: float, lng: float, safe_reason: Optional[str] = None):
+        """
+        Queue the writes for one position update: extend the trail when outside,
+        or bank it when safe_reason says the player is in a safe zone.
+        """
+        current = self.pending.setdefault(game_id, PendingWrites())
+        current.positions[player_id] = (lat, lng)
+
+        deferred = self.deferred.get(game_id)
+        if player_id in current.banks or (deferred and (player_id in deferred.appends or player_id in deferred.banks)):
+            batch = self.deferred.setdefault(game_id, PendingWrites())
+        else:
+            batch = current
+
+        if safe_reason is not None:
+            batch.banks[player_id] = (lat, lng, safe_reason)
+        else:
+            batch.appends.setdefault(player_id, []).append((lat, lng))
+
+    def drop_game(self, game_id: UUID):
+        """Discard the queued writes of a game that is no longer active."""
+        self.pending.pop(game_id, None)
+        self.deferred.pop(game_id, None)
+
+    def take(self, game_id: UUID) -> Optional[PendingWrites]:
+        """Detach a game's batch for this tick; deferred moves become the next tick's batch."""
+        batch = self.pending.pop(game_id, None)
+        deferred = self.deferred.pop(game_id, None)
+        if deferred is not None:
+            self.pending[game_id] = deferred
+        return batch
+
+    async def flush_game(self, db: AsyncSession, game_id: UUID, batch: PendingWrites) -> TickResult:
+        """
+        Apply one game's batch in a single transaction. A game that is no longer active
+        gets no writes: its row is share-locked first, so the batch either lands before
+        the lifecycle job ends the game or sees it ended.
+        """
+        result = TickResult()
+
+        status = await db.execute(GAME_STATUS_FOR_SHARE_SQL, {"gid": game_id})
+        if status.scalar() != "active":
+            await db.rollback()
+            self.drop_game(game_id)
+            return result
+
+        # 1. Append every queued point; the upsert reports which trails now cross themselves
+        crossed = []
+        if batch.appends:
+            player_ids, lngs, lats = [], [], []
+            for player_id, points in batch.appends.items():
+                for lat, lng in points:
+                    player_ids.append(player_id)
+                    lngs.append(lng)
+                    lats.append(lat)
+            appended = await db.execute(APPEND_TRAILS_SQL, {
+                "gid": game_id, "player_ids": player_ids, "lngs": lngs, "lats": lats
+            })
+            crossed = [row.player_id for row in appended if not row.is_simple]
+
+        # 2. Self-intersection: capture the enclosed area
+        if crossed:
+            await self._capture(db, game_id, crossed, result)
+
+        # 3. Bank trails of players who reached a safe zone
+        banking = {pid: bank for pid, bank in batch.banks.items() if pid not in result.captured}
+        failed_banks = []
+        if banking:
+            failed_banks = await self._bank(db, game_id, banking, result)
+
+        # 4. Clear captured and banked trails (a failed bank still drops its trail)
+        finished = list(result.captured) + list(result.banked) + failed_banks
+        if finished:
+            deleted = await db.execute(DELETE_TRAILS_SQL, {"gid": game_id, "player_ids": finished})
+            result.trail_lengths = {
+                row.player_id: row.length_m or 0.0 for row in deleted
+                if row.player_id in result.captured or row.player_id in result.banked
+            }
+
+        await db.commit()
+        return result
+
+    async def _capture(self, db: AsyncSession, game_id: UUID, player_ids: List[UUID], result: TickResult):
+        if settings.TERRITORY_RASTER_ENABLED:
+            raster = await rasters.ensure_loaded(db, game_id)
+            for player_id in player_ids:
+                try:
+                    before = raster.area_of(player_id)
+                    result.captured[player_id] = await rasters.capture_trail(db, game_id, player_id)
+                    result.gained[player_id] = max(0.0, result.captured[player_id] - before)
+                    # The raster does not keep the loop's own area; the newly filled area is the closest it has
+                    result.loops[player_id] = result.gained[player_id]
+                except Exception as e:
+                    print(f"Self-Intersection Capture Error: {e}")
+            return
+
+        areas = await db.execute(CAPTURE_AREAS_SQL, {"gid": game_id, "player_ids": player_ids})
+        areas = [(row.player_id, row.area, row.loop_sqm) for row in areas if row.area is not None]
+        owners = await self._players_with_territory(db, game_id, [player_id for player_id, _, _ in areas])
+        for player_id, area_geom, loop_sqm in areas:
+            try:
+                # Savepoint, so one failed union does not roll back the rest of the tick
+                async with db.begin_nested():
+                    result.captured[player_id] = await merge_territory(db, game_id, player_id, area_geom, player_id in owners)
+                result.gained[player_id] = max(0.0, result.captured[player_id] - owners.get(player_id, 0.0))
+                result.loops[player_id] = loop_sqm or 0.0
+            except Exception as e:
+                print(f"Self-Intersection Capture Error: {e}")
+
+    async def _bank(self, db: AsyncSession, game_id: UUID, banking: Dict[UUID, Tuple[float, float, str]], result: TickResult) -> List[UUID]:
+        failed = []
+        if settings.TERRITORY_RASTER_ENABLED:
+            with_trail = await db.execute(PLAYERS_WITH_TRAIL_SQL, {"gid": game_id, "player_ids": list(banking)})
+            raster = await rasters.ensure_loaded(db, game_id)
+            for player_id in [row.player_id for row in with_trail]:
+                try:
+                    before = raster.area_of(player_id)
+                    area = await rasters.bank_trail(db, game_id, player_id, settings.TRAIL_CORRIDOR_HALF_WIDTH_M)
+                    result.banked[player_id] = (area, banking[player_id][2])
+                    result.gained[player_id] = max(0.0, area - before)
+                except Exception as e:
+                    print(f"Banking Failed: {e}")
+                    failed.append(player_id)
+            return failed
+
+        corridors = await trail_corridors(db, game_id, {pid: (lat, lng) for pid, (lat, lng, _) in banking.items()})
+        owners = await self._players_with_territory(db, game_id, list(corridors))
+        for player_id, corridor in corridors.items():
+            try:
+                async with db.begin_nested():
+                    area = await merge_territory(db, game_id, player_id, corridor, player_id in owners)
+                result.banked[player_id] = (area, banking[player_id][2])
+                result.gained[player_id] = max(0.0, area - owners.get(player_id, 0.0))
+            except Exception as e:
+                print(f"Banking Failed: {e}")
+                failed.append(player_id)
+        return failed
+
+    async def _players_with_territory(self, db: AsyncSession, game_id: UUID, player_ids: List[UUID]) -> Dict[UUID, float]:
+        """player -> current area, for the players that already hold territory."""
+        if not player_ids:
+            return {}
+        rows = await db.execute(PLAYERS_WITH_TERRITORY_SQL, {"gid": game_id, "player_ids": player_ids})
+        return {row.player_id: row.area_sqm or 0.0 for row in rows}
+
+    async def run(self):
+        """
+        Background job: flushes every game's queued writes once per tick, then logs and
+        broadcasts the outcome to the clients on this worker.
+        """
+        from app.core.database import AsyncSessionLocal
+        from app.api.ws.game import manager
+
+        while True:
+            await asyncio.sleep(settings.TICK_WRITE_INTERVAL_SECONDS)
+            for game_id in list(self.pending):
+                batch = self.take(game_id)
+                if batch is None:
+                    continue
+                try:
+                    async with AsyncSessionLocal() as db:
+                        result = await self.flush_game(db, game_id, batch)
+
+                        for player_id, area in result.captured.items():
+                            event_logs.record(game_id, EVENT_CAPTURE, player_id, {"area": area})
+                            leaderboards.record_game_area(game_id, player_id, area)
+                        for player_id, (area, reason) in result.banked.items():
+                            event_logs.record(game_id, EVENT_BANK, player_id, {"area": area})
+                            leaderboards.record_game_area(game_id, player_id, area)
+                            await manager.broadcast({
+                                "type": "trail_banked",
+                                "player_id": str(player_id),
+                                "reason": reason
+                            }, game_id)
+
+                        stats_aggregator.record_tick(result)
+
+                        # One state broadcast per game per tick; it carries every player that moved
+                        if batch.positions:
+                            await manager.broadcast_game_state(game_id, db)
+                except Exception as e:
+                    print(f"Tick write flush failed for {game_id}: {e}")
+
+
+write_batcher = TickWriteBatcher()
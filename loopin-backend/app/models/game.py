@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -18,6 +18,11 @@ class GameSession(Base):
     end_time = Column(DateTime, nullable=True)
 
     participations = relationship("GameParticipant", back_populates="game", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Keyset order of the lobby read model (see app/core/lobby.py)
+        Index("ix_game_sessions_status_start", "status", text("COALESCE(start_time, 'infinity'::timestamp)"), "id"),
+    )
     # Helper to get players directly if needed, but via association object is cleaner for extra fields
     # players = relationship("Player", secondary="game_participants", back_populates="games") # Optional
 
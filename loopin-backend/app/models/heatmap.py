@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.core.database import Base
+
+class HeatmapTile(Base):
+    __tablename__ = "heatmap_tiles"
+
+    # One unified_grid sector during one time bucket (see app/core/heatmap.py)
+    sector_x = Column(Integer, primary_key=True)
+    sector_y = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    # Visit counts per cell, row-major from the sector's south-west corner
+    counts = Column(ARRAY(Integer), nullable=False)
+    total = Column(BigInteger, default=0)
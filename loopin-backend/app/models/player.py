@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float, Integer, DateTime
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, DateTime, Index, DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography
@@ -24,6 +24,7 @@ class Player(Base):
     
     trails = relationship("PlayerTrail", back_populates="player", cascade="all, delete-orphan")
     territories = relationship("PlayerTerritory", back_populates="player", cascade="all, delete-orphan")
+    territory_tiles = relationship("PlayerTerritoryTile", back_populates="player", cascade="all, delete-orphan")
 
 class PlayerStats(Base):
     __tablename__ = "player_stats"
@@ -37,6 +38,7 @@ class PlayerStats(Base):
     biggest_loop = Column(Float, default=0.0)
     current_streak = Column(Integer, default=0)
     last_daily_reward_claimed_at = Column(DateTime, nullable=True)
+    last_reward_claim_key = Column(String, nullable=True)  # idempotency key of the last daily claim
 
     player = relationship("Player", back_populates="stats")
 
@@ -54,21 +56,76 @@ class PlayerGameHistory(Base):
     player = relationship("Player", back_populates="game_history")
     game = relationship("GameSession")
 
+    __table_args__ = (
+        # Covers the keyset pages of a player's history (see app/core/history.py) with index-only scans
+        Index(
+            "ix_player_game_history_player_played", "player_id", "played_at", "id",
+            postgresql_include=["game_id", "rank", "area_captured", "prize_won"]
+        ),
+        # Final standings of one game (see app/core/leaderboard.py)
+        Index("ix_player_game_history_game", "game_id"),
+    )
+
 class PlayerTrail(Base):
     __tablename__ = "player_trails"
 
+    # Geometry tables are LIST-partitioned by game, so the partition key is part of the primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), primary_key=True)
     player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     trail = Column(Geography("LINESTRING", srid=4326), nullable=False)
 
     player = relationship("Player", back_populates="trails")
 
+    __table_args__ = (
+        Index("ux_player_trails_game_player", "game_id", "player_id", unique=True),
+        {"postgresql_partition_by": "LIST (game_id)"},
+    )
+
 class PlayerTerritory(Base):
     __tablename__ = "player_territories"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), primary_key=True)
     player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     territory = Column(Geography("POLYGON", srid=4326), nullable=False)
     area_sqm = Column(Float, nullable=False)
+    version = Column(Integer, nullable=False, default=1) # bumped on every geometry change
 
     player = relationship("Player", back_populates="territories")
+
+    __table_args__ = (
+        Index("ux_player_territories_game_player", "game_id", "player_id", unique=True),
+        {"postgresql_partition_by": "LIST (game_id)"},
+    )
+
+class PlayerTerritoryTile(Base):
+    """
+    Player territory split along unified_grid sector boundaries (and further subdivided),
+    so containment checks and partial updates only touch a small piece of the shape.
+    """
+    __tablename__ = "player_territory_tiles"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), primary_key=True)
+    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    sector_x = Column(Integer, nullable=False)
+    sector_y = Column(Integer, nullable=False)
+    # GeoAlchemy2 creates a GiST index on the tile column
+    tile = Column(Geography("POLYGON", srid=4326, spatial_index=True), nullable=False)
+
+    player = relationship("Player", back_populates="territory_tiles")
+
+    __table_args__ = (
+        Index("ix_player_territory_tiles_game_player_sector", "game_id", "player_id", "sector_x", "sector_y"),
+        {"postgresql_partition_by": "LIST (game_id)"},
+    )
+
+# Every partitioned geometry table gets a DEFAULT partition so rows for a game whose
+# partition has not been created yet still land somewhere (see app.core.partitions).
+for _table in (PlayerTrail.__table__, PlayerTerritory.__table__, PlayerTerritoryTile.__table__):
+    event.listen(
+        _table,
+        "after_create",
+        DDL(f"CREATE TABLE IF NOT EXISTS {_table.name}_default PARTITION OF {_table.name} DEFAULT")
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Text, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, Float, Text, ForeignKey, Integer, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -24,6 +24,11 @@ class PlayerPowerup(Base):
     powerup_id = Column(String(50), ForeignKey("powerups.id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, default=0)
     equipped = Column(Boolean, default=False)
+
+    __table_args__ = (
+        # Purchases upsert on it (see app/core/inventory.py)
+        UniqueConstraint("player_id", "powerup_id"),
+    )
     
     # Relationships
     player = relationship("Player", back_populates="powerups")
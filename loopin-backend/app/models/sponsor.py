@@ -20,7 +20,8 @@ class SponsoredLocation(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     sponsor_id = Column(UUID(as_uuid=True), ForeignKey("sponsors.id"), nullable=False)
     name = Column(String(255), nullable=True)
-    location = Column(Geography("POINT", srid=4326), nullable=False)
+    # GeoAlchemy2 creates a GiST index on the location column
+    location = Column(Geography("POINT", srid=4326, spatial_index=True), nullable=False)
     bid_price = Column(Float, default=0.0)
 
     sponsor = relationship("Sponsor", back_populates="locations")
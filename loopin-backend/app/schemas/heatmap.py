@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+class HeatmapTileResponse(BaseModel):
+    sector_x: int
+    sector_y: int
+    # Bounds of the sector; counts are row-major from (south, west), cells_per_side per row
+    south: float
+    west: float
+    cell_size_deg: float
+    cells_per_side: int
+    start: datetime
+    end: datetime
+    total: int
+    counts: List[int]
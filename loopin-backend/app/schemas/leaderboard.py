@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    player_id: UUID
+    score: float
+
+class LeaderboardResponse(BaseModel):
+    metric: str
+    total: int
+    entries: List[LeaderboardEntry]
+    # The requesting player's own entry, when player_id was given and they are ranked
+    me: Optional[LeaderboardEntry] = None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class PlayerStatsSchema(BaseModel):
     player_id: UUID
@@ -24,3 +24,8 @@ class PlayerGameHistorySchema(BaseModel):
     played_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class PlayerGameHistoryPage(BaseModel):
+    items: List[PlayerGameHistorySchema]
+    # Pass back as ?cursor= for the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
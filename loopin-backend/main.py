@@ -20,6 +20,83 @@ app.include_router(rewards.router, prefix="/api/v1/rewards", tags=["rewards"])
 from app.api.v1 import players
 app.include_router(players.router, prefix="/api/v1/players", tags=["players"])
 
+from app.api.v1 import leaderboards
+app.include_router(leaderboards.router, prefix="/api/v1/leaderboards", tags=["leaderboards"])
+
+from app.api.v1 import heatmap
+app.include_router(heatmap.router, prefix="/api/v1/heatmap", tags=["heatmap"])
+
+@app.on_event("startup")
+async def start_background_jobs():
+    import asyncio
+    from app.core.event_log import event_logs
+    from app.core.heatmap import heatmap
+    from app.core.inventory import inventory
+    from app.core.leaderboard import leaderboards
+    from app.core.lifecycle import run_lifecycle_loop
+    from app.core.sponsor_proximity import sponsor_proximity
+    from app.core.stats_aggregator import stats_aggregator
+    from app.core.territory import run_compaction_loop
+    from app.core.timers import timers
+    from app.core.write_batcher import write_batcher
+    # Keep references so the tasks are not garbage collected
+    app.state.background_tasks = [
+        asyncio.create_task(run_compaction_loop()),
+        asyncio.create_task(run_lifecycle_loop()),
+        asyncio.create_task(event_logs.run_flusher()),
+        asyncio.create_task(timers.run()),
+        asyncio.create_task(inventory.run_flusher()),
+        asyncio.create_task(write_batcher.run()),
+        asyncio.create_task(leaderboards.run_reconciler()),
+        asyncio.create_task(stats_aggregator.run()),
+        asyncio.create_task(sponsor_proximity.run()),
+        asyncio.create_task(heatmap.run()),
+    ]
+    if settings.TERRITORY_RASTER_ENABLED:
+        from app.core.raster import rasters
+        app.state.background_tasks.append(asyncio.create_task(rasters.run_persister()))
+
+@app.on_event("shutdown")
+async def flush_event_logs():
+    from app.core.event_log import event_logs
+    for game_id in list(event_logs.logs):
+        event_logs.close(game_id)
+
+@app.on_event("shutdown")
+async def stop_geometry_pool():
+    from app.core.geometry_pool import geometry_pool
+    geometry_pool.shutdown()
+
+@app.on_event("shutdown")
+async def flush_powerup_inventory():
+    from app.core.database import AsyncSessionLocal
+    from app.core.inventory import inventory
+    try:
+        async with AsyncSessionLocal() as db:
+            await inventory.flush(db)
+    except Exception as e:
+        print(f"Final powerup inventory flush failed: {e}")
+
+@app.on_event("shutdown")
+async def flush_player_stats():
+    from app.core.database import AsyncSessionLocal
+    from app.core.stats_aggregator import stats_aggregator
+    try:
+        async with AsyncSessionLocal() as db:
+            await stats_aggregator.flush(db)
+    except Exception as e:
+        print(f"Final player stats flush failed: {e}")
+
+@app.on_event("shutdown")
+async def flush_heatmap():
+    from app.core.database import AsyncSessionLocal
+    from app.core.heatmap import heatmap
+    try:
+        async with AsyncSessionLocal() as db:
+            await heatmap.flush(db)
+    except Exception as e:
+        print(f"Final heatmap flush failed: {e}")
+
 @app.get("/")
 async def root():
     return {"message": "Loopin Backend Online", "docs": "/docs"}
@@ -0,0 +1,27 @@
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal
+from app.core.territory import refresh_territory_tiles
+from app.models.player import PlayerTerritory
+
+async def backfill_territory_tiles():
+    async with AsyncSessionLocal() as db:
+        print("Rebuilding territory tiles...")
+
+        result = await db.execute(select(PlayerTerritory.game_id, PlayerTerritory.player_id))
+        territories = result.all()
+
+        for game_id, player_id in territories:
+            await refresh_territory_tiles(db, game_id, player_id)
+
+        await db.commit()
+        print(f"Rebuilt tiles for {len(territories)} territories.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_territory_tiles())
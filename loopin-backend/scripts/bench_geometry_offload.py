@@ -0,0 +1,84 @@
+import asyncio
+import math
+import os
+import sys
+import time
+import uuid
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.geometry_pool import GeometryPool
+from app.core import raster as raster_module
+from app.core.raster import GameRaster
+
+# Measures how long the event loop stalls while many players capture large loops at once.
+# A heartbeat coroutine wakes every HEARTBEAT_MS and records how late it woke up;
+# the captures run once inline on the event loop and once on the geometry process pool.
+
+BASE_LAT, BASE_LNG = 12.9716, 77.5946
+PLAYERS = 16
+CAPTURES_PER_PLAYER = 4
+LOOP_RADIUS_M = 600.0  # spans several sectors
+LOOP_VERTICES = 2000
+HEARTBEAT_MS = 5.0
+
+
+def loop_ring(i: int):
+    # A wobbly closed loop around a point that drifts per capture
+    cx = BASE_LNG + (i % 7) * 0.002
+    cy = BASE_LAT + (i % 5) * 0.002
+    ring = []
+    for k in range(LOOP_VERTICES):
+        a = 2 * math.pi * k / LOOP_VERTICES
+        r = LOOP_RADIUS_M * (1 + 0.15 * math.sin(9 * a + i))
+        ring.append((cx + r * math.cos(a) / 111195.0 / math.cos(math.radians(cy)), cy + r * math.sin(a) / 111195.0))
+    return ring
+
+
+async def heartbeat(lateness: list, stop: asyncio.Event):
+    interval = HEARTBEAT_MS / 1000
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lateness.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def player(raster: GameRaster, player_id: uuid.UUID, index: int):
+    for c in range(CAPTURES_PER_PLAYER):
+        await raster.fill_polygon_async(player_id, [loop_ring(index * CAPTURES_PER_PLAYER + c)])
+
+
+async def run(label: str, workers: int):
+    pool = GeometryPool(workers)
+    raster_module.geometry_pool = pool
+    raster = GameRaster()
+
+    # Warm the pool up so process start-up is not counted as a stall
+    if workers:
+        await raster.fill_polygon_async(uuid.uuid4(), [loop_ring(0)])
+
+    lateness = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lateness, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(player(raster, uuid.uuid4(), i) for i in range(PLAYERS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    pool.shutdown()
+
+    lateness.sort()
+    p99 = lateness[int(len(lateness) * 0.99) - 1] if lateness else 0.0
+    print(f"--- {label} ---")
+    print(f"  captures: {PLAYERS * CAPTURES_PER_PLAYER} in {elapsed:.2f}s")
+    print(f"  heartbeats: {len(lateness)}, p99 stall {p99:.1f} ms, max stall {max(lateness, default=0):.1f} ms")
+
+
+async def main():
+    await run("inline on the event loop", workers=0)
+    await run(f"geometry pool ({max(1, (os.cpu_count() or 2) - 1)} workers)", workers=-1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+from app.core.database import AsyncSessionLocal
+from app.core.daily_rewards import calculate_reward, claim_daily_reward
+from app.models.player import PlayerStats
+# The Player mapper's relationships resolve against these; import them so the ORM can configure
+import app.models.game  # noqa: F401
+import app.models.powerup  # noqa: F401
+
+# Simulates the midnight burst on the daily reward endpoint.
+# Every player double-taps claim a few times at once and their app retries one request
+# with the same idempotency key. Each player must end up with exactly one reward.
+# Runs once with the old read-check-write flow and once with the single-statement claim.
+
+PLAYERS = 200
+TAPS_PER_PLAYER = 4
+RETRIES_PER_PLAYER = 2
+CONCURRENCY = 32  # requests in flight, roughly a worker's connection pool
+
+
+async def legacy_claim(wallet: str, player_id: uuid.UUID, claim_key: str) -> bool:
+    # The flow the endpoint used to run: read stats, check the cooldown in Python, write back
+    async with AsyncSessionLocal() as db:
+        stats = (await db.execute(select(PlayerStats).where(PlayerStats.player_id == player_id))).scalar_one()
+        now = datetime.utcnow()
+        last = stats.last_daily_reward_claimed_at
+        if last and now - last < timedelta(hours=20):
+            return False
+        streak = 0 if not last or now - last > timedelta(hours=48) else (stats.current_streak or 0)
+        stats.current_streak = streak + 1
+        stats.total_earnings = (stats.total_earnings or 0.0) + calculate_reward(streak + 1)
+        stats.last_daily_reward_claimed_at = now
+        await db.commit()
+        return True
+
+
+async def atomic_claim(wallet: str, player_id: uuid.UUID, claim_key: str) -> bool:
+    async with AsyncSessionLocal() as db:
+        outcome = await claim_daily_reward(db, wallet, claim_key)
+        return outcome is not None and outcome.claimed and not outcome.replayed
+
+
+async def seed(db, run_id: str):
+    players = []
+    for i in range(PLAYERS):
+        player_id = uuid.uuid4()
+        wallet = f"bench_reward_{run_id}_{i}"
+        await db.execute(
+            text("INSERT INTO players (id, wallet_address, level) VALUES (:id, :wallet, 1)"),
+            {"id": player_id, "wallet": wallet}
+        )
+        # Yesterday's claim, so today's continues a streak of 3
+        await db.execute(
+            text("""
+                INSERT INTO player_stats (player_id, total_area, games_played, games_won, total_earnings,
+                                          longest_trail, biggest_loop, current_streak, last_daily_reward_claimed_at)
+                VALUES (:id, 0, 0, 0, 0, 0, 0, 3, (now() AT TIME ZONE 'utc') - interval '30 hours')
+            """),
+            {"id": player_id}
+        )
+        players.append((player_id, wallet))
+    await db.commit()
+    return players
+
+
+async def run(label: str, claim):
+    run_id = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        players = await seed(db, run_id)
+
+    requests = []
+    for player_id, wallet in players:
+        for tap in range(TAPS_PER_PLAYER):
+            requests.append((wallet, player_id, f"{wallet}:{tap}"))
+        # Retries reuse the key of the first tap
+        for _ in range(RETRIES_PER_PLAYER):
+            requests.append((wallet, player_id, f"{wallet}:0"))
+
+    gate = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    errors = []
+
+    async def fire(wallet, player_id, claim_key):
+        async with gate:
+            start = time.perf_counter()
+            try:
+                return await claim(wallet, player_id, claim_key)
+            except Exception as e:
+                # Serialization and lock failures count as refused claims, but are reported
+                errors.append(type(e).__name__)
+                return False
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    granted = await asyncio.gather(*(fire(*r) for r in requests))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            text("""
+                SELECT s.current_streak, s.total_earnings FROM player_stats s
+                JOIN players p ON p.id = s.player_id WHERE p.wallet_address LIKE :prefix
+            """),
+            {"prefix": f"bench_reward_{run_id}_%"}
+        )
+        rows = rows.fetchall()
+        await db.execute(text("DELETE FROM players WHERE wallet_address LIKE :prefix"), {"prefix": f"bench_reward_{run_id}_%"})
+        await db.commit()
+
+    expected = calculate_reward(4)
+    overpaid = sum(1 for row in rows if row.total_earnings > expected)
+    # Racing read-check-write claims overwrite each other's earnings, so also count the grants themselves
+    grants = {}
+    for (_, player_id, _), ok in zip(requests, granted):
+        grants[player_id] = grants.get(player_id, 0) + int(ok)
+    granted_twice = sum(1 for n in grants.values() if n > 1)
+    latencies.sort()
+    print(f"--- {label} ---")
+    print(f"  requests: {len(requests)} in {elapsed:.2f}s ({len(requests) / elapsed:.0f} claims/s)")
+    print(f"  p50 {1000 * latencies[len(latencies) // 2]:.1f} ms, p99 {1000 * latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+    print(f"  rewards granted: {sum(granted)} for {PLAYERS} players")
+    print(f"  players granted more than once: {granted_twice}")
+    print(f"  players paid more than once: {overpaid}")
+    if errors:
+        print(f"  failed requests: {len(errors)} ({', '.join(sorted(set(errors)))})")
+
+
+async def main():
+    await run("read-check-write", legacy_claim)
+    await run("single-statement claim", atomic_claim)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+import math
+import os
+import sys
+import time
+import uuid
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import AsyncSessionLocal
+from app.core.partitions import ensure_game_partitions
+from app.core.projection import frame_for_point
+from app.core.territory import merge_territory
+
+# Simulates a long game: a player banks many short buffered trail corridors
+# that wander around a base point. With compaction the per-union cost should
+# stay flat; without it (threshold set absurdly high) it grows with every bank.
+
+BASE_LAT, BASE_LNG = 12.9716, 77.5946
+BANKS = 500
+STEP_DEG = 0.00005  # ~5m
+
+
+def corridor_wkt(i: int) -> str:
+    # A short zig-zag trail around a slowly rotating heading
+    heading = i * 0.37
+    points = []
+    lat = BASE_LAT + math.sin(i * 0.05) * 0.002
+    lng = BASE_LNG + math.cos(i * 0.05) * 0.002
+    for k in range(8):
+        lat += math.sin(heading + k * 0.6) * STEP_DEG
+        lng += math.cos(heading + k * 0.6) * STEP_DEG
+        points.append(f"{lng} {lat}")
+    return f"LINESTRING({', '.join(points)})"
+
+
+async def run(label: str, threshold: int):
+    from app.core.config import settings
+    settings.TERRITORY_COMPACT_THRESHOLD = threshold
+
+    async with AsyncSessionLocal() as db:
+        game_id = uuid.uuid4()
+        player_id = uuid.uuid4()
+        await db.execute(
+            text("INSERT INTO game_sessions (id, status) VALUES (:id, 'active')"),
+            {"id": game_id}
+        )
+        await db.execute(
+            text("INSERT INTO players (id, wallet_address, level) VALUES (:id, :wallet, 1)"),
+            {"id": player_id, "wallet": f"bench_{player_id.hex}"}
+        )
+        await ensure_game_partitions(db, game_id)
+
+        frame = frame_for_point(BASE_LAT, BASE_LNG)
+        timings = []
+        has_territory = False
+        for i in range(BANKS):
+            buf = await db.execute(
+                text("""
+                    SELECT ST_Multi(ST_Transform(
+                        ST_Buffer(ST_Transform(ST_GeomFromText(:wkt, 4326), :proj), 2.0, 'endcap=round join=round'),
+                        :proj, 4326
+                    ))
+                """),
+                {"wkt": corridor_wkt(i), "proj": frame.proj4()}
+            )
+            new_geom = buf.scalar()
+
+            start = time.perf_counter()
+            await merge_territory(db, game_id, player_id, new_geom, has_territory)
+            timings.append(time.perf_counter() - start)
+            has_territory = True
+
+        npoints = await db.execute(
+            text("SELECT ST_NPoints(territory::geometry) FROM player_territories WHERE game_id = :gid AND player_id = :pid"),
+            {"gid": game_id, "pid": player_id}
+        )
+
+        print(f"--- {label} ---")
+        window = BANKS // 5
+        for w in range(0, BANKS, window):
+            chunk = timings[w:w + window]
+            print(f"  banks {w:4d}-{w + len(chunk) - 1:4d}: {1000 * sum(chunk) / len(chunk):7.2f} ms/union")
+        print(f"  final vertices: {npoints.scalar()}")
+
+        await db.rollback()
+
+
+async def main():
+    await run("without compaction", threshold=10**9)
+    await run("with compaction", threshold=4000)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
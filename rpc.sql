@@ -189,7 +189,10 @@ BEGIN
     IF v_old_trail IS NULL THEN
         -- Start new trail with 2 points (approx current pos)
         v_new_trail := ST_MakeLine(v_point::geometry, v_point::geometry)::geography;
-        INSERT INTO player_trails (player_id, game_id, trail) VALUES (p_player_id, p_game_id, v_new_trail);
+        -- One trail per player and game: a trail started concurrently is extended instead
+        INSERT INTO player_trails (player_id, game_id, trail) VALUES (p_player_id, p_game_id, v_new_trail)
+        ON CONFLICT (game_id, player_id) DO UPDATE
+        SET trail = ST_MakeLine(player_trails.trail::geometry, EXCLUDED.trail::geometry)::geography;
         RETURN;
     END IF;
 
@@ -261,7 +264,7 @@ BEGIN
                                 -- Check if anything is left
                                 IF ST_IsEmpty(v_diff_poly) THEN
                                     -- Totally eaten
-                                    DELETE FROM player_territories WHERE id = r_victim.id;
+                                    DELETE FROM player_territories WHERE game_id = p_game_id AND id = r_victim.id;
                                 ELSE
                                     -- Partial eat
                                     -- Check if remaining area is valid (e.g. > 1sqm) and update
@@ -269,19 +272,25 @@ BEGIN
                                     v_victim_area := ST_Area(v_diff_poly::geography);
                                     
                                     IF v_victim_area < 1.0 THEN
-                                         DELETE FROM player_territories WHERE id = r_victim.id;
+                                         DELETE FROM player_territories WHERE game_id = p_game_id AND id = r_victim.id;
                                     ELSE
                                          UPDATE player_territories 
-                                         SET territory = v_diff_poly::geography,
-                                             area_sqm = v_victim_area
-                                         WHERE id = r_victim.id;
+                                         SET territory = ST_Multi(v_diff_poly)::geography,
+                                             area_sqm = v_victim_area,
+                                             version = version + 1
+                                         WHERE game_id = p_game_id AND id = r_victim.id;
                                     END IF;
                                 END IF;
                             END LOOP;
                         END;
 
+                        -- One territory per player and game: later captures are unioned into it
                         INSERT INTO player_territories (player_id, game_id, territory, area_sqm)
-                        VALUES (p_player_id, p_game_id, v_loop_poly::geography, v_area);
+                        VALUES (p_player_id, p_game_id, ST_Multi(v_loop_poly::geometry)::geography, v_area)
+                        ON CONFLICT (game_id, player_id) DO UPDATE
+                        SET territory = ST_Multi(ST_Union(player_territories.territory::geometry, EXCLUDED.territory::geometry))::geography,
+                            area_sqm = player_territories.area_sqm + EXCLUDED.area_sqm,
+                            version = player_territories.version + 1;
                         
                         -- Reset Trail. 
                         -- Ideally we keep the "tail" of the trail that wasn't part of the polygon?
@@ -13,6 +13,9 @@ CREATE TABLE IF NOT EXISTS game_sessions (
     end_time TIMESTAMP
 );
 
+-- Keyset order of the lobby read model (see app/core/lobby.py)
+CREATE INDEX IF NOT EXISTS ix_game_sessions_status_start ON game_sessions(status, (COALESCE(start_time, 'infinity'::timestamp)), id);
+
 -- Create players table
 CREATE TABLE IF NOT EXISTS players (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -45,9 +48,12 @@ CREATE TABLE IF NOT EXISTS player_stats (
     longest_trail FLOAT DEFAULT 0.0,
     biggest_loop FLOAT DEFAULT 0.0,
     current_streak INTEGER DEFAULT 0,
-    last_daily_reward_claimed_at TIMESTAMP
+    last_daily_reward_claimed_at TIMESTAMP,
+    last_reward_claim_key VARCHAR -- idempotency key of the last daily reward claim, so retries replay it
 );
 
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS last_reward_claim_key VARCHAR;
+
 -- Create player_game_history table
 CREATE TABLE IF NOT EXISTS player_game_history (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -59,6 +65,14 @@ CREATE TABLE IF NOT EXISTS player_game_history (
     played_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Covers the keyset pages of a player's history with index-only scans
+CREATE INDEX IF NOT EXISTS ix_player_game_history_player_played
+    ON player_game_history(player_id, played_at, id)
+    INCLUDE (game_id, rank, area_captured, prize_won);
+
+-- Final standings of one game
+CREATE INDEX IF NOT EXISTS ix_player_game_history_game ON player_game_history(game_id);
+
 -- Create powerups table
 CREATE TABLE IF NOT EXISTS powerups (
     id VARCHAR(50) PRIMARY KEY, -- e.g. 'shield', 'ghost'
@@ -78,22 +92,94 @@ CREATE TABLE IF NOT EXISTS player_powerups (
     UNIQUE(player_id, powerup_id)
 );
 
+-- Geometry tables are LIST-partitioned by game_id: the backend creates one partition per game
+-- when it starts and drops it when the game ends (see app/core/partitions.py). Rows of a game
+-- without a partition yet land in the DEFAULT partition.
+
+-- Databases created by an earlier version of this file have unpartitioned geometry tables;
+-- move them aside so the partitioned tables can be created and the rows copied back below
+DO $$
+BEGIN
+    IF to_regclass('player_trails') IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'player_trails'::regclass) THEN
+        ALTER TABLE player_trails RENAME TO player_trails_unpartitioned;
+        ALTER TABLE player_trails_unpartitioned RENAME CONSTRAINT player_trails_pkey TO player_trails_unpartitioned_pkey;
+    END IF;
+    IF to_regclass('player_territories') IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'player_territories'::regclass) THEN
+        ALTER TABLE player_territories RENAME TO player_territories_unpartitioned;
+        ALTER TABLE player_territories_unpartitioned RENAME CONSTRAINT player_territories_pkey TO player_territories_unpartitioned_pkey;
+    END IF;
+END $$;
+
 -- Create player_trails table
 CREATE TABLE IF NOT EXISTS player_trails (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     player_id UUID NOT NULL REFERENCES players(id) ON DELETE CASCADE,
     game_id UUID NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
-    trail GEOGRAPHY(LINESTRING, 4326) NOT NULL
-);
+    trail GEOGRAPHY(LINESTRING, 4326) NOT NULL,
+    PRIMARY KEY (id, game_id)
+) PARTITION BY LIST (game_id);
+
+CREATE TABLE IF NOT EXISTS player_trails_default PARTITION OF player_trails DEFAULT;
+
+-- One trail per player and game (the batched trail upsert conflicts on it)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_player_trails_game_player ON player_trails(game_id, player_id);
 
 -- Create player_territories table
 CREATE TABLE IF NOT EXISTS player_territories (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     player_id UUID NOT NULL REFERENCES players(id) ON DELETE CASCADE,
     game_id UUID NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
     territory GEOGRAPHY(POLYGON, 4326) NOT NULL,
-    area_sqm FLOAT NOT NULL
-);
+    area_sqm FLOAT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1, -- bumped on every geometry change, keys the clients' geometry caches
+    PRIMARY KEY (id, game_id)
+) PARTITION BY LIST (game_id);
+
+CREATE TABLE IF NOT EXISTS player_territories_default PARTITION OF player_territories DEFAULT;
+
+ALTER TABLE player_territories ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- One territory per player and game (the raster territory upsert conflicts on it)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_player_territories_game_player ON player_territories(game_id, player_id);
+
+-- Create player_territory_tiles table: each territory split along unified_grid sector
+-- boundaries (and subdivided), so containment checks only touch one sector's pieces
+CREATE TABLE IF NOT EXISTS player_territory_tiles (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    player_id UUID NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+    game_id UUID NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
+    sector_x INTEGER NOT NULL,
+    sector_y INTEGER NOT NULL,
+    tile GEOGRAPHY(POLYGON, 4326) NOT NULL,
+    PRIMARY KEY (id, game_id)
+) PARTITION BY LIST (game_id);
+
+CREATE TABLE IF NOT EXISTS player_territory_tiles_default PARTITION OF player_territory_tiles DEFAULT;
+
+CREATE INDEX IF NOT EXISTS ix_player_territory_tiles_game_player_sector ON player_territory_tiles(game_id, player_id, sector_x, sector_y);
+CREATE INDEX IF NOT EXISTS idx_player_territory_tiles_tile ON player_territory_tiles USING GIST(tile);
+
+-- Copy the rows of converted tables back, keeping one row per player and game
+-- (the largest territory where older code had stored several)
+DO $$
+BEGIN
+    IF to_regclass('player_trails_unpartitioned') IS NOT NULL THEN
+        INSERT INTO player_trails (id, player_id, game_id, trail)
+        SELECT DISTINCT ON (game_id, player_id) id, player_id, game_id, trail
+        FROM player_trails_unpartitioned
+        ORDER BY game_id, player_id, ST_NPoints(trail::geometry) DESC;
+        DROP TABLE player_trails_unpartitioned;
+    END IF;
+    IF to_regclass('player_territories_unpartitioned') IS NOT NULL THEN
+        INSERT INTO player_territories (id, player_id, game_id, territory, area_sqm)
+        SELECT DISTINCT ON (game_id, player_id) id, player_id, game_id, territory, area_sqm
+        FROM player_territories_unpartitioned
+        ORDER BY game_id, player_id, area_sqm DESC;
+        DROP TABLE player_territories_unpartitioned;
+    END IF;
+END $$;
 
 -- Create sponsors table
 CREATE TABLE IF NOT EXISTS sponsors (
@@ -111,6 +197,9 @@ CREATE TABLE IF NOT EXISTS sponsored_locations (
     bid_price FLOAT DEFAULT 0.0
 );
 
+-- Area queries read sponsored locations per sector tile envelope (see app/core/sponsor_tiles.py)
+CREATE INDEX IF NOT EXISTS idx_sponsored_locations_location ON sponsored_locations USING GIST(location);
+
 -- Create safe_points table
 CREATE TABLE IF NOT EXISTS safe_points (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -119,6 +208,17 @@ CREATE TABLE IF NOT EXISTS safe_points (
     type VARCHAR(20) DEFAULT 'standard' -- standard, bunker, etc.
 );
 
+-- Create heatmap_tiles table: visit counts of one unified_grid sector during one time bucket,
+-- row-major from the sector's south-west corner (see app/core/heatmap.py)
+CREATE TABLE IF NOT EXISTS heatmap_tiles (
+    sector_x INTEGER NOT NULL,
+    sector_y INTEGER NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    counts INTEGER[] NOT NULL,
+    total BIGINT DEFAULT 0,
+    PRIMARY KEY (sector_x, sector_y, bucket_start)
+);
+
 -- Create leaderboard_all_time view
 CREATE OR REPLACE VIEW leaderboard_all_time AS
 SELECT